@@ -1,32 +1,477 @@
 #!/usr/bin/env python
 #
 
-from time import sleep
-
-from selenium import webdriver
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions
-from selenium.webdriver.support.wait import WebDriverWait
-
-from lib.log import Log
-from lib.pca.pca_3x.constants.test_resources import PCA3_TENANT_NAME
-from lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants import NAMES_LIST_XPATH, \
-    NEXT_PAGE_BUTTONS_XPATH, OCID_OF_LIST_ITEM_XPATH, LIST_OF_ITEMS_ON_PAGE_XPATH, STATE_XPATH
-from lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants import DRG_DETAILS_COMPARTMENT_DROPDOWN, \
-    DRG_DETAILS_COMPARTMENT_SELECTION_LIST_XPATH, DRG_DETAILS_COMPARTMENT_SELECTION_XPATH, COMPARTMENT_RELOAD_BUTTON, \
-    DRG_ALREADY_SELECTED_COMPARTMENT_XPATH
-from lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants import LIST_FILTER_TAG_XPATH, \
-    VCN_LIST_DEFINED_TAGS_TAB_XPATH, VCN_LIST_FREEFORM_TAGS_TAB_XPATH, VCN_LIST_FILTER_TAG_BUTTON_XPATH, \
-    VCN_CREATE_DNS_HOSTNAMES_CHECKBOX_XPATH
-from lib.pca.pca_3x.constants.ui_constants.driver_constants import OSSE_CHROMEDRIVER_WINDOWS_PATH, \
-    OSSE_CHROMEDRIVER_LINUX_PATH
-from lib.pca.pca_3x.constants.ui_constants.ui_constants import CONTAINS_TEXT_HEADER
-from lib.pca.pca_3x.utils.CE.IAM.compartment_utils.compartment_rest import CompartmentRestUtils
-from tests.pca_3x.config import OSSE_UI_OPERATING_SYSTEM
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import traceback
+from bisect import bisect_left
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial, wraps
+from importlib import import_module
+from queue import Queue
+from time import monotonic, sleep, time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from weakref import WeakKeyDictionary
 
+from lib.log import Log  # noqa: F401, sets up the testware log handlers the helper records propagate to
 
+# Names this module has always exposed from the wider testware. They are imported on first access rather than at
+# import time, as loading the ui_constants, REST utils and test config trees is slow.
+_LAZY_ATTRIBUTES = {
+    'PCA3_TENANT_NAME': 'lib.pca.pca_3x.constants.test_resources',
+    'NAMES_LIST_XPATH': 'lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants',
+    'NEXT_PAGE_BUTTONS_XPATH': 'lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants',
+    'OCID_OF_LIST_ITEM_XPATH': 'lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants',
+    'LIST_OF_ITEMS_ON_PAGE_XPATH': 'lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants',
+    'STATE_XPATH': 'lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants',
+    'DRG_DETAILS_COMPARTMENT_DROPDOWN': 'lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants',
+    'DRG_DETAILS_COMPARTMENT_SELECTION_LIST_XPATH':
+        'lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants',
+    'DRG_DETAILS_COMPARTMENT_SELECTION_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants',
+    'COMPARTMENT_RELOAD_BUTTON': 'lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants',
+    'DRG_ALREADY_SELECTED_COMPARTMENT_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants',
+    'LIST_FILTER_TAG_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants',
+    'VCN_LIST_DEFINED_TAGS_TAB_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants',
+    'VCN_LIST_FREEFORM_TAGS_TAB_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants',
+    'VCN_LIST_FILTER_TAG_BUTTON_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants',
+    'VCN_CREATE_DNS_HOSTNAMES_CHECKBOX_XPATH': 'lib.pca.pca_3x.constants.ui_constants.Networking.vcn_create_constants',
+    'OSSE_CHROMEDRIVER_WINDOWS_PATH': 'lib.pca.pca_3x.constants.ui_constants.driver_constants',
+    'OSSE_CHROMEDRIVER_LINUX_PATH': 'lib.pca.pca_3x.constants.ui_constants.driver_constants',
+    'CONTAINS_TEXT_HEADER': 'lib.pca.pca_3x.constants.ui_constants.ui_constants',
+    'CompartmentRestUtils': 'lib.pca.pca_3x.utils.CE.IAM.compartment_utils.compartment_rest',
+    'OSSE_UI_OPERATING_SYSTEM': 'tests.pca_3x.config',
+}
+
+
+def __getattr__(name):
+    """
+    __getattr__
+
+    Resolves the names in _LAZY_ATTRIBUTES on first access and keeps them as module globals from then on
+
+    :param name: Attribute being looked up on the module
+    :return: The imported object
+    """
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if '.ui_constants.' in module_name and not module_name.endswith('.driver_constants'):
+        value = getattr(_load_locator_constants(module_name), name)
+    else:
+        value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+class _LazyImport:
+    """
+    _LazyImport
+
+    Stands in for a module level import of a module or module attribute, importing it on first attribute access
+    """
+
+    def __init__(self, module_name, attribute=None):
+        """
+        :param module_name: Module to import
+        :param attribute: Attribute of the module to stand in for. The module itself if not given
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def __getattr__(self, name):
+        if self._target is None:
+            target = import_module(self._module_name)
+            self._target = target if self._attribute is None else getattr(target, self._attribute)
+        return getattr(self._target, name)
+
+
+By = _LazyImport('selenium.webdriver.common.by', 'By')
+expected_conditions = _LazyImport('selenium.webdriver.support.expected_conditions')
+_exceptions = _LazyImport('selenium.common.exceptions')
+
+# Named driver profiles for setup_driver. "default" is the long standing setup. "fast" returns from navigation once
+# the DOM is ready, runs headless, blocks images, fonts and analytics through DevTools and keeps a disk cache, which
+# means it is not incognito. Each browser gets its own cache directory, removed again when the driver quits.
+DRIVER_PROFILES = {
+    'default': {},
+    'fast': {
+        'page_load_strategy': 'eager',
+        'headless': True,
+        'window_size': '1366,768',
+        'incognito': False,
+        'disk_cache': True,
+        'blocked_urls': [
+            '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+            '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*omtrdc.net*',
+        ],
+    },
+}
+_default_driver_profile = os.environ.get('UI_DRIVER_PROFILE', 'default')
+
+# A typed locator, e.g Locator(By.ID, "name"), accepted by every helper in place of its locator string. As it is a
+# tuple it can also be passed straight to find_element(*locator) and expected_conditions.
+Locator = namedtuple('Locator', ['by', 'value'])
+
+# Strategy of a locator constant, from the end of its name
+LOCATOR_NAME_SUFFIXES = (('_XPATH', 'xpath'), ('_CSS', 'css selector'), ('_SELECTOR', 'css selector'),
+                         ('_CLASS_NAME', 'class name'), ('_CLASS', 'class name'), ('_ID', 'id'))
+
+# Rewrite XPath locators into the equivalent CSS selector where there is one, as browsers match CSS faster. Opt in
+# with UI_REWRITE_XPATH_TO_CSS=1, so suites only switch the strategy their locators go through once they have checked
+# the rewritten selectors against their pages.
+REWRITE_XPATH_TO_CSS = os.environ.get('UI_REWRITE_XPATH_TO_CSS', '0') != '0'
+_XPATH_STEP = re.compile(r"""(//|/)(\*|[A-Za-z][\w-]*)((?:\[(?:[^\[\]'"]|'[^']*'|"[^"]*")*\])*)""")
+_XPATH_PREDICATE = re.compile(r"""\[((?:[^\[\]'"]|'[^']*'|"[^"]*")*)\]""")
+_XPATH_CONDITION = re.compile(r"""\s*(?:
+    (?P<position>\d+|last\(\s*\))
+  | contains\(\s*concat\(\s*(?:'\x20'|"\x20")\s*,\s*normalize-space\(\s*@class\s*\)\s*,\s*(?:'\x20'|"\x20")\s*\)\s*,
+        \s*(?:'\x20(?P<class_token>[\w-]+)\x20'|"\x20(?P<class_token2>[\w-]+)\x20")\s*\)
+  | (?P<function>contains|starts-with)\(\s*@(?P<function_attribute>[\w-]+)\s*,
+        \s*(?P<function_value>'[^']*'|"[^"]*")\s*\)
+  | @(?P<equals_attribute>[\w-]+)\s*=\s*(?P<equals_value>'[^']*'|"[^"]*")
+  | @(?P<attribute>[\w-]+)
+)\s*(?:and\b|$)""", re.VERBOSE)
+_locator_registry = None
+_locator_registry_lock = threading.Lock()
+
+# Result of read_elements_by_xpath. element is the live WebElement, attributes a dict of the requested attributes.
+ElementState = namedtuple('ElementState', ['element', 'text', 'attributes', 'displayed', 'enabled', 'selected'])
+
+# One row of a paginated console list from iter_list_rows. element is the name cell, page counts from 1 and index
+# is the position of the row on its page.
+ListRow = namedtuple('ListRow', ['name', 'ocid', 'state', 'page', 'index', 'element'])
+
+# Outcome of one flow from run_flows_in_parallel
+FlowResult = namedtuple('FlowResult', ['name', 'passed', 'duration', 'error', 'screenshot', 'log_file', 'worker_pid'])
+
+# Browser settings and DriverRecycler of the current run_flows_in_parallel worker process
+_flow_worker_state = {}
+
+# How long a run_flows_in_parallel flow may run before its worker is killed and the flow failed. 0 waits forever.
+FLOW_TIMEOUT_SECONDS = float(os.environ.get('UI_FLOW_TIMEOUT_SECONDS', 3600))
+
+# Element caches for drivers that opted in through enable_element_cache
+_element_caches = WeakKeyDictionary()
+_element_caches_lock = threading.Lock()
+
+# Helpers AsyncUiSession exposes by running them as they are on the shared command pool. They issue a bounded number
+# of WebDriver commands and never sleep.
+_ASYNC_PASSTHROUGH_HELPERS = frozenset([
+    'find_by_id', 'find_by_xpath', 'get_element_by_xpath', 'get_elements_by_xpath',
+    'get_first_element_of_list_by_xpath', 'get_texts_by_xpath', 'open_url', 'read_elements_by_xpath',
+    'reset_driver_state', 'take_screenshot',
+])
+# Helpers that wait or back off between retries, which AsyncUiSession runs step by step from the _<name>_steps
+# generator each of them is written as
+_ASYNC_STEPPED_HELPERS = frozenset([
+    'clear_field_by_class_name', 'clear_field_by_id', 'clear_field_by_xpath', 'click_by_class', 'click_element_by_id',
+    'click_element_by_xpath', 'click_then_wait_for_element_not_to_be_present', 'fill_in_text_element_by_class',
+    'fill_in_text_element_by_id', 'fill_in_text_element_by_xpath', 'find_and_click_checkbox_from_display_name',
+    'launch_menu', 'wait_for_by_id_then_click', 'wait_for_by_id_then_fill_in', 'wait_for_by_xpath_then_click',
+    'wait_for_by_xpath_then_fill_in', 'wait_for_by_xpath_then_get_text', 'wait_for_element_not_to_be_clickable',
+    'wait_for_element_to_be_clickable', 'wait_for_page_changes',
+])
+
+# Thread pool shared by every AsyncUiSession, see configure_async_command_pool
+_async_command_pool = None
+_async_command_pool_lock = threading.Lock()
+
+# How long REST lookups are served from the cache shared across the run, see CachedRestLookups
+REST_LOOKUP_TTL_SECONDS = float(os.environ.get('UI_REST_LOOKUP_TTL_SECONDS', 300))
+_rest_lookup_cache = None
+_rest_lookup_cache_lock = threading.Lock()
+_compartment_rest_utils = {}
+_rest_utils_lock = threading.Lock()
+
+# Routes learnt by launch_menu when it is asked to use them, see RouteCache. They are only kept for the run unless
+# UI_ROUTE_CACHE_FILE names a file to keep them in across runs. Routes are learnt per console origin and per value of
+# the query parameters in ROUTE_SCOPE_PARAMS, which are also carried over from the current page when a route is used.
+ROUTE_CACHE_FILE = os.environ.get('UI_ROUTE_CACHE_FILE') or None
+ROUTE_SCOPE_PARAMS = tuple(os.environ.get('UI_ROUTE_SCOPE_PARAMS', 'region,tenant,tenancy').split(','))
+_route_cache = None
+_route_cache_lock = threading.Lock()
+
+# Where save_session_snapshot keeps the encrypted login state and how long a snapshot is trusted. The encryption key is
+# never stored next to the snapshot: it comes from UI_SESSION_SNAPSHOT_KEY, or from a file kept elsewhere, e.g a
+# secrets mount, named by UI_SESSION_SNAPSHOT_KEY_FILE. Without either, snapshots are not used.
+SESSION_SNAPSHOT_FILE = os.environ.get('UI_SESSION_SNAPSHOT_FILE', os.path.join(os.path.expanduser('~'), '.cache',
+                                                                               'base_ui_session.snapshot'))
+SESSION_SNAPSHOT_TTL_SECONDS = float(os.environ.get('UI_SESSION_SNAPSHOT_TTL_SECONDS', 3600))
+SESSION_SNAPSHOT_KEY_FILE = os.environ.get('UI_SESSION_SNAPSHOT_KEY_FILE') or None
+
+# Writer behind take_screenshot and the failure screenshots, see configure_screenshots
+_screenshot_writer = None
+_screenshot_writer_lock = threading.Lock()
+
+# Helper logging, see HelperLog and configure_helper_logging. Records below the level are dropped before their message
+# is built, and a record a call repeats per row or per poll is written once in every HELPER_LOG_REPEAT_EVERY.
+HELPER_LOG_LEVEL = os.environ.get('UI_LOG_LEVEL', 'INFO').upper()
+HELPER_LOG_REPEAT_EVERY = int(os.environ.get('UI_LOG_REPEAT_EVERY', 50))
+HELPER_LOG_IN_BACKGROUND = os.environ.get('UI_LOG_IN_BACKGROUND', '1') != '0'
+_helper_log_lock = threading.Lock()
+
+# Upper bounds, in seconds, of the helper latency histogram buckets. Slower calls land in a final "inf" bucket.
+HELPER_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_HISTOGRAM_LABELS = [str(bound) for bound in HELPER_LATENCY_BUCKETS] + ['inf']
+
+# Helper instrumentation state, see enable_helper_instrumentation
+_instrumentation_enabled = False
+_helper_metrics = {}
+_helper_metrics_lock = threading.Lock()
+_helper_calls = threading.local()
+_helper_metrics_export_path = None
+
+# Thresholds at which DriverRecycler swaps a browser for a fresh one between flows, and what its recycles cost
+BROWSER_RECYCLE_MAX_RSS_BYTES = int(float(os.environ.get('UI_BROWSER_RECYCLE_MAX_RSS_MB', 2048)) * 1024 * 1024)
+BROWSER_RECYCLE_MAX_COMMANDS = int(os.environ.get('UI_BROWSER_RECYCLE_MAX_COMMANDS', 20000))
+_browser_recycle_metrics = {'recycles': 0, 'seconds': 0.0, 'reasons': {}, 'rss_bytes': [], 'commands': []}
+
+# Polling bounds for wait_until. Polls start fine grained and back off towards the maximum.
+WAIT_MIN_POLL_INTERVAL = 0.05
+WAIT_MAX_POLL_INTERVAL = 0.5
+
+# W3C default of the script timeout, assumed for drivers whose timeout was not set through set_script_timeout
+SCRIPT_TIMEOUT_SECONDS = 30
+# Script timeouts set through set_script_timeout, which wait_for_xpath_with_observer puts back after its wait
+_script_timeouts = WeakKeyDictionary()
+
+# Defaults of the retry policy the interaction helpers share, see RetryPolicy and set_retry_policy. The budget caps
+# how many interactions of the whole run may be retried, so a flaky page fails fast instead of stalling every helper
+# after it. An interaction is charged once, however many times it is retried within its attempts or wait. The budget
+# is kept per process, so each run_flows_in_parallel worker has a budget of its own.
+RETRY_BASE_DELAY = float(os.environ.get('UI_RETRY_BASE_DELAY', 0.05))
+RETRY_MAX_DELAY = float(os.environ.get('UI_RETRY_MAX_DELAY', 0.8))
+RETRY_MAX_ATTEMPTS = int(os.environ.get('UI_RETRY_MAX_ATTEMPTS', 5))
+RETRY_BUDGET = int(os.environ.get('UI_RETRY_BUDGET', 500))
+_retry_policy = None
+_retry_budget = {'limit': RETRY_BUDGET, 'spent': 0, 'refused': 0, 'kinds': {}}
+
+_READ_ELEMENTS_SCRIPT = """
+var nodes = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var names = arguments[1], rows = [];
+for (var i = 0; i < nodes.snapshotLength; i++) {
+    var element = nodes.snapshotItem(i);
+    if (element.nodeType !== 1) { element = element.parentElement; }
+    var attributes = {};
+    for (var j = 0; j < names.length; j++) { attributes[names[j]] = element.getAttribute(names[j]); }
+    var style = window.getComputedStyle(element);
+    rows.push({
+        element: element,
+        text: (element.innerText || element.textContent || '').trim(),
+        attributes: attributes,
+        displayed: style.visibility !== 'hidden' && style.display !== 'none' &&
+            !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length),
+        enabled: !element.disabled,
+        selected: !!(element.checked || element.selected)
+    });
+}
+return rows;
+"""
+
+_READ_LIST_PAGE_SCRIPT = """
+function nodes(xpath) {
+    var result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), out = [];
+    for (var i = 0; i < result.snapshotLength; i++) { out.push(result.snapshotItem(i)); }
+    return out;
+}
+function text(node) { return ((node.nodeType === 1 ? node.innerText : node.textContent) || '').trim(); }
+function rowOf(node) {
+    var element = node.nodeType === 1 ? node : node.parentElement;
+    return element && element.closest('tr, [role="row"], li');
+}
+function cellsByRow(cells) {
+    var byRow = new Map();
+    cells.forEach(function (cell) {
+        var row = rowOf(cell);
+        if (row && !byRow.has(row)) { byRow.set(row, text(cell)); }
+    });
+    return byRow;
+}
+function column(cells, rows) {
+    if (!rows) { return cells.map(text); }
+    var byRow = cellsByRow(cells);
+    return rows.map(function (row) { return byRow.has(row) ? byRow.get(row) : null; });
+}
+var names = nodes(arguments[0]);
+var rows = names.map(rowOf);
+rows = rows.every(function (row) { return row; }) ? rows : null;
+var next = document.evaluate(arguments[3], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return {
+    names: names.map(text),
+    name_elements: names,
+    ocids: column(nodes(arguments[1]), rows),
+    states: column(nodes(arguments[2]), rows),
+    paired: !!rows,
+    next: next,
+    next_enabled: !!next && !next.disabled && next.getAttribute('aria-disabled') !== 'true'
+};
+"""
+
+_FILL_FORM_SCRIPT = """
+function find(spec) {
+    switch (spec.by) {
+        case 'id': return document.getElementById(spec.locator);
+        case 'name': return document.getElementsByName(spec.locator)[0] || null;
+        case 'class name': return document.getElementsByClassName(spec.locator)[0] || null;
+        case 'css selector': return document.querySelector(spec.locator);
+        default: return document.evaluate(spec.locator, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+            .singleNodeValue;
+    }
+}
+var specs = arguments[0], elements = [], missing = [];
+for (var i = 0; i < specs.length; i++) {
+    elements.push(find(specs[i]));
+    if (!elements[i]) { missing.push(specs[i].locator); }
+}
+if (missing.length) { return {missing: missing, results: []}; }
+var results = [];
+for (var i = 0; i < specs.length; i++) {
+    var element = elements[i], spec = specs[i], tag = element.tagName.toLowerCase();
+    if (spec.keys || element.isContentEditable || (tag === 'input' && element.type === 'file')) {
+        results.push({status: 'keys', value: null, valid: true, message: ''});
+        continue;
+    }
+    element.focus();
+    if (tag === 'input' && (element.type === 'checkbox' || element.type === 'radio')) {
+        if (element.checked !== !!spec.value) { element.click(); }
+    } else {
+        var prototype = tag === 'textarea' ? HTMLTextAreaElement.prototype :
+            tag === 'select' ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+        Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, spec.value);
+        element.dispatchEvent(new Event('input', {bubbles: true}));
+        element.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    element.dispatchEvent(new Event('blur'));
+    var isToggle = tag === 'input' && (element.type === 'checkbox' || element.type === 'radio');
+    results.push({
+        status: 'filled',
+        value: isToggle ? element.checked : element.value,
+        valid: element.checkValidity ? element.checkValidity() : true,
+        message: element.validationMessage || ''
+    });
+}
+return {missing: [], results: results};
+"""
+
+_LIST_ITEM_NAMES_SCRIPT = """
+var items = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var names = [];
+for (var i = 0; i < items.snapshotLength; i++) {
+    var item = items.snapshotItem(i);
+    names.push((item.innerText || item.textContent || '').trim().split('\\n')[0].trim());
+}
+return names;
+"""
+
+_CLICK_LIST_ITEM_SCRIPT = """
+var items = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var name = arguments[1], position = arguments[2];
+for (var i = position === null ? 0 : position; i < items.snapshotLength; i++) {
+    var item = items.snapshotItem(i);
+    if ((item.innerText || item.textContent || '').trim().split('\\n')[0].trim() !== name) {
+        if (position !== null) { return false; }
+        continue;
+    }
+    item.scrollIntoView({block: 'center'});
+    item.click();
+    return true;
+}
+return false;
+"""
+
+_READ_STORAGE_SCRIPT = """
+function read(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) { items[storage.key(i)] = storage.getItem(storage.key(i)); }
+    return items;
+}
+return {local: read(window.localStorage), session: read(window.sessionStorage)};
+"""
+
+_WRITE_STORAGE_SCRIPT = """
+function write(storage, items) {
+    storage.clear();
+    for (var key in items) { storage.setItem(key, items[key]); }
+}
+write(window.localStorage, arguments[0]);
+write(window.sessionStorage, arguments[1]);
+"""
+
+_PAGE_SNAPSHOT_SCRIPT = """
+if (!window.__baseUiSnapshot) {
+    var state = window.__baseUiSnapshot = {version: 0};
+    new MutationObserver(function () { state.version++; }).observe(document.documentElement,
+        {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return {html: document.documentElement.outerHTML, version: window.__baseUiSnapshot.version, url: location.href};
+"""
+
+_PAGE_VERSION_SCRIPT = """
+return window.__baseUiSnapshot ? window.__baseUiSnapshot.version : -1;
+"""
+
+_OBSERVE_XPATH_SCRIPT = """
+var xpath = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+function found() {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+        .singleNodeValue !== null;
+}
+if (found()) { done(true); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    if (found()) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+timer = setTimeout(function () { observer.disconnect(); done(found()); }, timeoutMs);
+"""
+
+
+def _instrumented(helper):
+    """
+    _instrumented
+
+    Decorator recording timing, WebDriver command counts and retries for a helper while helper instrumentation is
+    enabled. When it is disabled the only cost is one flag check per call.
+
+    :param helper: Helper function taking the driver as its first argument
+    :return: Wrapped helper
+    """
+    @wraps(helper)
+    def wrapper(driver, *args, **kwargs):
+        if not _instrumentation_enabled:
+            return helper(driver, *args, **kwargs)
+        _count_driver_commands(driver)
+        calls = _active_helper_calls()
+        call = _HelperCall()
+        calls.append(call)
+        start = monotonic()
+        failed = True
+        try:
+            result = helper(driver, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            calls.pop()
+            _record_helper_call(helper.__name__, monotonic() - start, call, failed)
+    return wrapper
+
+
+@_instrumented
 def clear_field_by_class_name(driver, class_name):
     """
     clear_field_by_class_name
@@ -36,10 +481,9 @@ def clear_field_by_class_name(driver, class_name):
     :param driver: Webdriver controller for the web page
     :param class_name: Name of the class to find and clear
     """
-    Log.info(f"Clearing field with class name {class_name}")
-    element = driver.find_element_by_class_name(class_name)
-    element.clear()
+    _run_steps(driver, _clear_field_by_class_name_steps(driver, class_name))
 
+@_instrumented
 def clear_field_by_id(driver, element_id):
     """
     clear_field_by_xpath
@@ -49,10 +493,9 @@ def clear_field_by_id(driver, element_id):
     :param driver: Webdriver controller for the web page
     :param element_id: ID of the field to find and clear
     """
-    Log.info(f"Clearing field with element ID {element_id}")
-    element = driver.find_element_by_id(element_id)
-    element.clear()
+    _run_steps(driver, _clear_field_by_id_steps(driver, element_id))
 
+@_instrumented
 def clear_field_by_xpath(driver, xpath):
     """
     clear_field_by_xpath
@@ -62,10 +505,9 @@ def clear_field_by_xpath(driver, xpath):
     :param driver: Webdriver controller for the web page
     :param xpath: Xpath of the field to find and clear
     """
-    Log.info(f"Clearing field with XPath name {xpath}")
-    element = driver.find_element_by_class_name(xpath)
-    element.clear()
+    _run_steps(driver, _clear_field_by_xpath_steps(driver, xpath))
 
+@_instrumented
 def click_by_class(driver, class_name):
     """
     click_by_class
@@ -75,10 +517,9 @@ def click_by_class(driver, class_name):
     :param driver: Webdriver controller for the web page
     :param class_name: Name of the class to click
     """
-    Log.info(f"Clicking element with class {class_name}")
-    element = driver.find_element_by_class_name(class_name)
-    element.click()
+    _run_steps(driver, _click_by_class_steps(driver, class_name))
 
+@_instrumented
 def click_element_by_id(driver, element_id):
     """
     click_element_by_xpath
@@ -88,10 +529,9 @@ def click_element_by_id(driver, element_id):
     :param driver: Webdriver controller for the web page
     :param element_id: ID of the element to click
     """
-    Log.info(f"Clicking element with ID {element_id}")
-    element = driver.find_element_by_id(element_id)
-    element.click()
+    _run_steps(driver, _click_element_by_id_steps(driver, element_id))
 
+@_instrumented
 def click_element_by_xpath(driver, xpath):
     """
     click_element_by_xpath
@@ -101,11 +541,10 @@ def click_element_by_xpath(driver, xpath):
     :param driver: Webdriver controller for the web page
     :param xpath: Xpath of the element to click
     """
-    Log.info(f"Clicking element with Xpath {xpath}")
-    element = driver.find_element_by_xpath(xpath)
-    element.click()
+    _run_steps(driver, _click_element_by_xpath_steps(driver, xpath))
 
 
+@_instrumented
 def click_then_wait_for_element_not_to_be_present(driver, element_xpath_or_id, element_type='xpath', wait_interval=5,
                                                   max_wait_time=60):
     """
@@ -122,40 +561,26 @@ def click_then_wait_for_element_not_to_be_present(driver, element_xpath_or_id, e
     :param max_wait_time: Timeout for the element to not be clickable
     :return:
     """
-    if element_type == 'xpath':
-        click_element_by_xpath(driver, element_xpath_or_id)
-    else:
-        click_element_by_id(driver, element_xpath_or_id)
-    wait_for_element_not_to_be_clickable(driver, element_xpath_or_id, element_type, wait_interval, max_wait_time)
+    return _run_steps(driver, _click_then_wait_for_element_not_to_be_present_steps(
+        driver, element_xpath_or_id, element_type, wait_interval, max_wait_time))
 
+@_instrumented
 def find_and_click_checkbox_from_display_name(driver, name_to_search_for, names_list_xpath, checkbox_list_xpath):
     """
     find_and_click_checkbox_from_display_name
 
-    Utility to find the row of a checkbox and click it based on it's resource name adjacent
+    Utility to find the row of a checkbox and click it based on it's resource name adjacent. The names are read in
+    one batched call so the cost does not grow with the number of rows.
 
     :param driver: Webdriver for the browser
     :param name_to_search_for: Text of the adjacent item to the checkbox
     :param names_list_xpath: Xpath to the list of resource name elements
     :param checkbox_list_xpath:  Xpath to the list of resource checkbox elements
     """
-    name_checkboxes = driver.find_elements_by_xpath(checkbox_list_xpath)
-    display_names = driver.find_elements_by_xpath(names_list_xpath)
-    index = 0
-    list_checked = []
-    for display_name in display_names:
-        display_name = display_name.text
-        list_checked.append(display_name)
-        Log.info(f"Checking whether {display_name} matches the desired string {name_to_search_for}")
-        if name_to_search_for == display_name:
-            element = name_checkboxes[index]
-            Log.info(f"Found the desired string. Clicking the adjacent checkbox at index {index}.")
-            element.click()
-            driver.save_screenshot("this.png")
-            return
-        index += 1
-    raise FileNotFoundError(f"Did not find element to click. Elements available were {list_checked[0:-1]}")
+    _run_steps(driver, _find_and_click_checkbox_from_display_name_steps(driver, name_to_search_for, names_list_xpath,
+                                                                        checkbox_list_xpath))
 
+@_instrumented
 def find_by_id(driver, element_id):
     """
     find_by_id
@@ -168,9 +593,10 @@ def find_by_id(driver, element_id):
     :return: Element
     :rtype: Element Object
     """
-    Log.info(f"Finding element with ID {element_id}")
-    return driver.find_element_by_id(element_id)
+    _helper_log.info("Finding element with ID %s", element_id)
+    return _find_element(driver, By.ID, element_id, verify_cached=True)
 
+@_instrumented
 def find_by_xpath(driver, xpath):
     """
     find_by_xpath
@@ -183,10 +609,304 @@ def find_by_xpath(driver, xpath):
     :return: Element
     :rtype: Element Object
     """
-    Log.info(f"Finding element with Xpath {xpath}")
-    return driver.find_element_by_xpath(xpath)
+    _helper_log.info("Finding element with Xpath %s", xpath)
+    return _find_element(driver, By.XPATH, xpath, verify_cached=True)
+
+@_instrumented
+def find_list_row(driver, name=None, ocid=None, max_pages=None):
+    """
+    find_list_row
+
+    Walks a paginated console list until it finds the row with the given name and/or OCID. Pages after the match are
+    never loaded.
+
+    :param driver: Webdriver for the browser
+    :param name: Display name of the row to find
+    :param ocid: OCID of the row to find
+    :param max_pages: Maximum number of pages to look through. No limit if not given
+
+    :return: The matching row, or None if no row matched
+    :rtype: ListRow
+    """
+    if name is None and ocid is None:
+        raise ValueError("Give a name, an OCID or both to look a list row up by")
+    _helper_log.info("Looking for list row with name %s and OCID %s", name, ocid)
+    for row in iter_list_rows(driver, max_pages=max_pages):
+        if (name is None or row.name == name) and (ocid is None or row.ocid == ocid):
+            return row
+    return None
+
+
+def browser_rss_bytes(driver):
+    """
+    browser_rss_bytes
+
+    Measures the memory of a local browser: the resident set size of the driver service process and every process
+    below it, read from /proc
+
+    :param driver: Webdriver for the browser
+    :return: Resident bytes of the browser's process tree, None if it cannot be measured, e.g off Linux or for a
+        remote browser
+    :rtype: Integer
+    """
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if process is None or not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat_in:
+                stat = stat_in.read()
+        except OSError:
+            continue
+        parent = int(stat[stat.rindex(')') + 2:].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pending = [process.pid]
+    seen = set()
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        try:
+            with open(f"/proc/{pid}/statm") as statm_in:
+                total += int(statm_in.read().split()[1]) * page_size
+        except OSError:
+            continue
+        pending.extend(children.get(pid, ()))
+    return total
+
+def cached_compartment_rest_utils(*args, **kwargs):
+    """
+    cached_compartment_rest_utils
+
+    Gets a CompartmentRestUtils whose compartment and tenancy lookups are memoized in the REST lookup cache shared
+    by the whole run, see CachedRestLookups. One instance is kept per set of constructor arguments, unless they are
+    unhashable, in which case a new instance is made for the call.
+
+    :return: Caching proxy over CompartmentRestUtils(*args, **kwargs)
+    :rtype: CachedRestLookups
+    """
+    from lib.pca.pca_3x.utils.CE.IAM.compartment_utils.compartment_rest import CompartmentRestUtils
+
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return CachedRestLookups(CompartmentRestUtils(*args, **kwargs))
+    with _rest_utils_lock:
+        rest_utils = _compartment_rest_utils.get(key)
+        if rest_utils is None:
+            rest_utils = CachedRestLookups(CompartmentRestUtils(*args, **kwargs))
+            _compartment_rest_utils[key] = rest_utils
+        return rest_utils
+
+def configure_async_command_pool(max_workers=32):
+    """
+    configure_async_command_pool
+
+    Sets the size of the thread pool that AsyncUiSession runs WebDriver commands on. The pool is shared by every
+    session, so it bounds the number of commands in flight across all browsers rather than per browser.
+
+    :param max_workers: Maximum number of WebDriver commands in flight at once
+    """
+    global _async_command_pool
+    with _async_command_pool_lock:
+        previous = _async_command_pool
+        _async_command_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='webdriver-command')
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+def configure_screenshots(directory='.', max_total_bytes=500 * 1024 * 1024, ring_size=0):
+    """
+    configure_screenshots
+
+    Replaces the ScreenshotWriter used by take_screenshot and the failure paths of the helpers. Screenshots already
+    queued on the previous writer are written out first.
+
+    :param directory: Directory to write screenshots to
+    :param max_total_bytes: Cap on the disk used by the screenshots. The oldest are deleted to stay under it
+    :param ring_size: Number of recent frames to keep in memory and write out only when a helper fails. 0 disables it
+    :return: The new writer
+    :rtype: ScreenshotWriter
+    """
+    global _screenshot_writer
+    writer = ScreenshotWriter(directory, max_total_bytes, ring_size)
+    with _screenshot_writer_lock:
+        previous, _screenshot_writer = _screenshot_writer, writer
+    if previous is not None:
+        previous.close()
+    return writer
+
+def configure_helper_logging(level=None, repeat_every=None, background=None):
+    """
+    configure_helper_logging
+
+    Replaces the HelperLog the helpers log through. Records already queued on the previous one are written out first.
+
+    :param level: Lowest level written, as a name e.g 'DEBUG' or a number. Defaults to HELPER_LOG_LEVEL
+    :param repeat_every: Write one in this many of a repeated record. Defaults to HELPER_LOG_REPEAT_EVERY
+    :param background: Write records on a background thread. Defaults to HELPER_LOG_IN_BACKGROUND
+    :return: The new log
+    :rtype: HelperLog
+    """
+    global _helper_log
+    helper_log = HelperLog(level, repeat_every, background)
+    with _helper_log_lock:
+        previous, _helper_log = _helper_log, helper_log
+    previous.close()
+    return helper_log
+
+def benchmark_driver_profiles(url, profiles=('default', 'fast'), runs=3, browser='chrome'):
+    """
+    benchmark_driver_profiles
+
+    Loads a page several times under each driver profile and reports how long the loads took, to show what a
+    profile saves. Each profile gets a fresh browser, and the first load is discarded so the disk cache is warm.
+
+    :param url: Page to load
+    :param profiles: Names of the profiles to compare
+    :param runs: Number of timed loads per profile
+    :param browser: Browser to use e.g chrome, firefox, ie.
+
+    :return: Per profile mean, min and max seconds for driver.get to return, and the mean DOMContentLoaded and load
+        event times reported by the page
+    :rtype: Dictionary
+    """
+    report = {}
+    for profile in profiles:
+        driver = setup_driver(browser, profile=profile)
+        try:
+            driver.get(url)
+            get_seconds = []
+            timings = []
+            for _ in range(runs):
+                driver.get("about:blank")
+                start = monotonic()
+                driver.get(url)
+                get_seconds.append(monotonic() - start)
+                timings.append(driver.execute_script(
+                    "var t = performance.timing; return [t.domContentLoadedEventEnd - t.navigationStart, "
+                    "t.loadEventEnd ? t.loadEventEnd - t.navigationStart : null];"))
+        finally:
+            _quit_quietly(driver)
+        loaded = [load for _, load in timings if load is not None]
+        report[profile] = {
+            'mean_get_seconds': sum(get_seconds) / runs,
+            'min_get_seconds': min(get_seconds),
+            'max_get_seconds': max(get_seconds),
+            'mean_dom_content_loaded_seconds': sum(dom for dom, _ in timings) / runs / 1000,
+            'mean_load_event_seconds': sum(loaded) / len(loaded) / 1000 if loaded else None,
+        }
+        _helper_log.info("Profile %s loaded %s in %.2f seconds on average",
+                         profile, url, report[profile]['mean_get_seconds'])
+    return report
+
+def disable_helper_instrumentation():
+    """
+    disable_helper_instrumentation
+
+    Stops recording helper metrics. Metrics recorded so far are kept
+    """
+    global _instrumentation_enabled
+    _instrumentation_enabled = False
+
+def disable_element_cache(driver):
+    """
+    disable_element_cache
+
+    Stops caching element lookups for a driver and drops anything cached
+
+    :param driver: Webdriver for the browser
+    """
+    with _element_caches_lock:
+        _element_caches.pop(driver, None)
+
+def enable_element_cache(driver, max_size=128):
+    """
+    enable_element_cache
+
+    Opts a driver in to caching element lookups made by the find_*, click_*, fill_in_* and clear_field_* helpers.
+    Repeated interactions with the same element on a page then skip the lookup round trip. The cache is cleared when
+    the helpers navigate and entries are dropped when their element goes stale. The find_* and get_element_* helpers
+    check a cached element is still attached before returning it, as a click can navigate without the cache knowing.
+
+    :param driver: Webdriver for the browser
+    :param max_size: Maximum number of elements kept, least recently used are evicted first
+    :return: The cache for the driver, exposing hit and miss counters
+    :rtype: ElementCache
+    """
+    with _element_caches_lock:
+        cache = _element_caches.get(driver)
+        if cache is None:
+            cache = ElementCache(max_size)
+            _element_caches[driver] = cache
+        return cache
+
+def enable_helper_instrumentation(export_path=None):
+    """
+    enable_helper_instrumentation
+
+    Starts recording, for every helper call, the wall time, the time spent waiting versus acting, the number of
+    WebDriver commands issued, the number of retries of failed interactions and the number of polls of waits. Calls
+    are aggregated per helper with a latency histogram.
+
+    :param export_path: If given, the metrics are written to this JSON file when the interpreter exits. Calling again
+        with another path replaces it
+    """
+    global _instrumentation_enabled, _helper_metrics_export_path
+    _instrumentation_enabled = True
+    if export_path is not None:
+        if _helper_metrics_export_path is None:
+            atexit.register(_export_helper_metrics_at_exit)
+        _helper_metrics_export_path = export_path
 
+def ensure_logged_in(driver, login, is_logged_in=None, snapshot_path=None):
+    """
+    ensure_logged_in
+
+    Logs a fresh driver in from the session snapshot, and only logs in through the UI when there is no usable
+    snapshot, saving a new one afterwards. Lets every test after the first start already authenticated. Without the
+    cryptography package or a snapshot key, see SESSION_SNAPSHOT_KEY_FILE, it always logs in through the UI.
+
+    :param driver: Webdriver for the browser
+    :param login: Callable taking the driver that logs in through the UI and leaves it on a console page
+    :param is_logged_in: Callable taking the driver, truthy if the restored page is authenticated
+    :param snapshot_path: Snapshot file. Defaults to SESSION_SNAPSHOT_FILE
+    :return: True if the session came from the snapshot, False if it logged in through the UI
+    :rtype: Boolean
+    """
+    try:
+        _session_snapshot_cipher()
+    except (ImportError, ValueError) as e:
+        _helper_log.warning("Not using session snapshots. %s", e)
+        _helper_log.info("Logging in through the UI")
+        login(driver)
+        return False
+    if restore_session_snapshot(driver, snapshot_path, is_logged_in):
+        return True
+    _helper_log.info("Logging in through the UI")
+    login(driver)
+    save_session_snapshot(driver, snapshot_path)
+    return False
 
+def export_helper_metrics(path):
+    """
+    export_helper_metrics
+
+    Writes the helper metrics recorded so far to a JSON file
+
+    :param path: Path of the JSON file
+    """
+    _helper_log.info("Writing helper metrics to %s", path)
+    with open(path, 'w') as metrics_out:
+        json.dump(get_helper_metrics(), metrics_out, indent=2, sort_keys=True)
+
+@_instrumented
 def fill_in_text_element_by_class(driver, element_class_name, text):
     """
     fill_in_text_element
@@ -197,11 +917,10 @@ def fill_in_text_element_by_class(driver, element_class_name, text):
     :param element_class_name: Class name of the element
     :param text: Text to fill in.
     """
-    Log.info(f"Filling in text {text} on element of Class {element_class_name}")
-    element = driver.find_element_by_class_name(element_class_name)
-    element.send_keys(text)
+    _run_steps(driver, _fill_in_text_element_by_class_steps(driver, element_class_name, text))
 
 
+@_instrumented
 def fill_in_text_element_by_id(driver, element_id, text):
     """
     fill_in_text_element
@@ -212,11 +931,10 @@ def fill_in_text_element_by_id(driver, element_id, text):
     :param element_id: ID of the element
     :param text: Text to fill in.
     """
-    Log.info(f"Filling in text {text} on element of ID {element_id}")
-    element = driver.find_element_by_id(element_id)
-    element.send_keys(text)
+    _run_steps(driver, _fill_in_text_element_by_id_steps(driver, element_id, text))
 
 
+@_instrumented
 def fill_in_text_element_by_xpath(driver, element_xpath, text):
     """
     fill_in_text_element_by_xpath
@@ -227,10 +945,55 @@ def fill_in_text_element_by_xpath(driver, element_xpath, text):
     :param element_xpath: XPath of the element
     :param text: Text to fill in.
     """
-    Log.info(f"Filling in text {text} on element of XPath {element_xpath}")
-    element = driver.find_element_by_xpath(element_xpath)
-    element.send_keys(text)
+    _run_steps(driver, _fill_in_text_element_by_xpath_steps(driver, element_xpath, text))
+
+@_instrumented
+def fill_form(driver, fields, keystroke_fields=(), wait_for_seconds=30):
+    """
+    fill_form
+
+    Fills in many form fields with one execute_script call instead of a wait, a find and a send_keys round trip per
+    field. Values are set through the native value setter and input and change events are fired, so the console's
+    framework sees the edit as if it were typed. The values are read back in the same call to check they stuck.
+    Fields that need real keystrokes (file inputs, content editable elements and anything in keystroke_fields) are
+    filled afterwards with send_keys.
+
+    :param driver: Webdriver controller for the web page
+    :param fields: Dictionary of locator to value. A locator is an xpath string or a (strategy, locator) tuple such as
+        (By.ID, "name"). Checkbox values are booleans
+    :param keystroke_fields: Locators from fields to fill with send_keys rather than by setting the value
+    :param wait_for_seconds: Timeout value for every field to be present on the page
+
+    :return: Dictionary of locator to the value read back from the field, whether it passed the browser's
+        constraint validation, and the validation message
+    :rtype: Dictionary
+    """
+    _helper_log.info("Filling in form fields %s", list(fields))
+    keystroke_fields = set(keystroke_fields)
+    specs = []
+    for locator, value in fields.items():
+        by, selector = _normalize_locator(locator)
+        value = value if isinstance(value, bool) else str(value)
+        specs.append({'by': by, 'locator': selector, 'value': value, 'keys': locator in keystroke_fields})
+    with _helper_log.repeated('form fields not present') as polls:
+        results = wait_until(driver, lambda d: _fill_form_fields(d, specs, polls), wait_for_seconds,
+                             "every form field to be present")
+    report = {}
+    mismatched = []
+    for locator, spec, result in zip(fields, specs, results):
+        if result['status'] == 'keys':
+            _act_on_element(driver, spec['by'], spec['locator'], lambda element: element.send_keys(spec['value']))
+            result['value'] = spec['value']
+        elif result['value'] != spec['value']:
+            mismatched.append(f"{locator}: wanted {spec['value']!r}, got {result['value']!r}")
+        if not result['valid']:
+            _helper_log.warning("Form field %s is not valid: %s", locator, result['message'])
+        report[locator] = {'value': result['value'], 'valid': result['valid'], 'message': result['message']}
+    if mismatched:
+        raise ValueError(f"Form fields did not take their values. {'; '.join(mismatched)}")
+    return report
 
+@_instrumented
 def get_element_by_xpath(driver, xpath):
     """
     get_element_by_xpath
@@ -241,9 +1004,10 @@ def get_element_by_xpath(driver, xpath):
     :param xpath: Xpath of the element
     :return: WebElement object
     """
-    Log.info(f"Getting element at xpath {xpath}")
-    return driver.find_element_by_xpath(xpath)
+    _helper_log.info("Getting element at xpath %s", xpath)
+    return _find_element(driver, By.XPATH, xpath, verify_cached=True)
 
+@_instrumented
 def get_elements_by_xpath(driver, xpath):
     """
     get_elements_by_xpath
@@ -254,9 +1018,90 @@ def get_elements_by_xpath(driver, xpath):
     :param xpath: Xpath of the list of elements
     :return: List of WebElements
     """
-    Log.info(f"Getting list of elements at xpath {xpath}")
-    return driver.find_elements_by_xpath(xpath)
+    _helper_log.info("Getting list of elements at xpath %s", xpath)
+    return driver.find_elements(*_normalize_locator(xpath))
+
+def get_locator_registry():
+    """
+    get_locator_registry
+
+    Gets the registry the locator constants are validated into as this module loads them
+
+    :return: The locator registry
+    :rtype: LocatorRegistry
+    """
+    global _locator_registry
+    with _locator_registry_lock:
+        if _locator_registry is None:
+            _locator_registry = LocatorRegistry()
+        return _locator_registry
+
+def get_rest_lookup_cache():
+    """
+    get_rest_lookup_cache
+
+    Gets the TTL cache shared by every CachedRestLookups in the run, e.g to look at its hit and miss counters or
+    clear it
+
+    :return: The shared cache
+    :rtype: TtlCache
+    """
+    global _rest_lookup_cache
+    with _rest_lookup_cache_lock:
+        if _rest_lookup_cache is None:
+            _rest_lookup_cache = TtlCache(REST_LOOKUP_TTL_SECONDS)
+        return _rest_lookup_cache
+
+def get_route_cache():
+    """
+    get_route_cache
 
+    Gets the cache of page routes launch_menu has learnt, kept in ROUTE_CACHE_FILE if that is set, e.g to clear it
+    after the console's URLs change
+
+    :return: The route cache
+    :rtype: RouteCache
+    """
+    global _route_cache
+    with _route_cache_lock:
+        if _route_cache is None:
+            _route_cache = RouteCache(ROUTE_CACHE_FILE)
+        return _route_cache
+
+def get_screenshot_writer():
+    """
+    get_screenshot_writer
+
+    Gets the ScreenshotWriter used by the helpers, creating one with the configure_screenshots defaults if needed
+
+    :return: The current writer
+    :rtype: ScreenshotWriter
+    """
+    global _screenshot_writer
+    with _screenshot_writer_lock:
+        if _screenshot_writer is None:
+            _screenshot_writer = ScreenshotWriter()
+        return _screenshot_writer
+
+@_instrumented
+def get_texts_by_xpath(driver, xpath, snapshot=None):
+    """
+    get_texts_by_xpath
+
+    Gets the text of every element matching an xpath in a single round trip, or with none from a page snapshot
+
+    :param driver: Webdriver for the browser
+    :param xpath: Xpath of the list of elements
+    :param snapshot: PageSnapshot of the page to read the texts from instead, see PageSnapshot.texts
+    :return: List of the element texts, in document order
+    :rtype: List of strings
+    """
+    _helper_log.info("Reading texts of elements at xpath %s", xpath)
+    if snapshot is not None:
+        return snapshot.texts(xpath)
+    return [state.text for state in read_elements_by_xpath(driver, xpath)]
+
+@_instrumented
 def get_first_element_of_list_by_xpath(driver, xpath):
     """
     get_first_element_of_list_by_xpath
@@ -267,7 +1112,7 @@ def get_first_element_of_list_by_xpath(driver, xpath):
     :param xpath: Xpath for the list of elements
     :return: WebElement object
     """
-    Log.info(f"Getting first elements of list in {xpath}")
+    _helper_log.info("Getting first elements of list in %s", xpath)
     element_list = get_elements_by_xpath(driver, xpath)
     return element_list[0]
 
@@ -282,272 +1127,4021 @@ def generate_contains_string(string_to_search_for):
     :return The contains string to use in selector
     :rtype: String
     """
-    return f'{CONTAINS_TEXT_HEADER}{string_to_search_for}]'
+    constants = _load_locator_constants('lib.pca.pca_3x.constants.ui_constants.ui_constants')
+
+    return f'{constants.CONTAINS_TEXT_HEADER}{string_to_search_for}]'
 
 def get_element_xpath_by_text_only(text):
     """
     get_element_xpath_by_text_only
 
-    Finds an element just on it's text value
-    :param text:
-    :return: WebElement object
+    Builds an xpath matching elements by their exact text value
+
+    :param text: Text of the element
+    :return: Xpath of the elements whose text is text
+    :rtype: String
     """
-    return f'//*/text()="{text}"'
+    return f'//*[text()={_xpath_literal(text)}]'
 
-def launch_menu(driver, desired_page, menu_items):
+def get_browser_recycle_metrics():
     """
-    launch_menu
+    get_browser_recycle_metrics
 
-    Launches a menu item
+    Gets the browser recycles done by DriverRecycler so far. Recycles also show up in get_helper_metrics as the
+    browser_recycle helper.
 
-    :param driver: Webdriver to control page
-    :param desired_page: Desired page to be on. If we are already on it, we stay there.
-    :param menu_items: List of the menu items to click in order.
+    :return: Number of recycles, seconds spent recycling, recycles per reason, and the browser's resident bytes and
+        command count at each recycle
+    :rtype: Dictionary
+    """
+    with _helper_metrics_lock:
+        return {'recycles': _browser_recycle_metrics['recycles'], 'seconds': _browser_recycle_metrics['seconds'],
+                'reasons': dict(_browser_recycle_metrics['reasons']),
+                'rss_bytes': list(_browser_recycle_metrics['rss_bytes']),
+                'commands': list(_browser_recycle_metrics['commands'])}
 
-    :return: Flag to show that the page has changed to the desired page
-    :rtype: Boolean
+def get_helper_metrics():
     """
-    Log.info(f"Lunching menu to get us to desired page {desired_page}")
-    if driver.title == desired_page:
-        return True
-    for menu_item in menu_items:
-        wait_for_by_id_then_click(driver, menu_item)
-        Log.info(f"PAGE TITLE {driver.title}")
-    return driver.title == desired_page
+    get_helper_metrics
 
+    Gets the helper metrics recorded so far
 
-def open_url(driver, url):
+    :return: Per helper call and failure counts, total wall, wait and act seconds, WebDriver command, retry and wait
+        poll counts, retries per kind of failure, and a latency histogram keyed by bucket upper bound in seconds
+    :rtype: Dictionary
     """
-    open_url
-
-    Opens a URL
+    with _helper_metrics_lock:
+        return {name: dict(metrics, retry_kinds=dict(metrics['retry_kinds']),
+                           histogram=dict(zip(_HISTOGRAM_LABELS, metrics['histogram'])))
+                for name, metrics in _helper_metrics.items()}
 
-    :param driver: Webdriver to control page
-    :param url: Desired URL
+def get_helper_log():
     """
-    Log.info(f"Going to URL {url}")
-    driver.get(url)
+    get_helper_log
 
-def setup_driver(browser='chrome'):
+    Gets the HelperLog the helpers log through, e.g to flush it before reading a log file
+
+    :return: The current log
+    :rtype: HelperLog
     """
-    setup_driver
+    return _helper_log
 
-    Sets the driver up for the browser
+def get_retry_metrics():
+    """
+    get_retry_metrics
 
-    :param browser: Browser to use e.g chrome, firefox, ie.
+    Gets how much of this process's retry budget the interaction helpers have used. Each retried interaction spends
+    one from the budget, whatever its number of retries. The retries of each helper are in get_helper_metrics while
+    helper instrumentation is enabled.
 
-    :return: Browser object for the chosen browser
-    :rtype: Webdriver object
+    :return: Budget limit, interactions charged to it, interactions refused a retry because it ran out, and
+        interactions charged per kind of their first failure
+    :rtype: Dictionary
     """
-    options = Options()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--incognito")
-    options.add_argument('ignore-certificate-errors')
-    return _setup_driver_options(browser, options)
+    with _helper_metrics_lock:
+        return dict(_retry_budget, kinds=dict(_retry_budget['kinds']))
 
-def take_screenshot(driver, screenshot_name='screenshot.png'):
+def get_retry_policy():
     """
-    take_screenshot
+    get_retry_policy
 
-    Utility to take a screenshot. Stores it on the current working directory
+    Gets the retry policy the interaction helpers use
 
-    :param driver: Webdriver Object for the browser
-    :param screenshot_name: Name of the screenshot file
-    :return:
+    :return: The retry policy
+    :rtype: RetryPolicy
     """
-    Log.info(f"Creating screenshot {screenshot_name}")
-    driver.save_screenshot(screenshot_name)
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy()
+    return _retry_policy
 
-def wait_for_page_changes(driver, page_title_to_change_to, wait_for_seconds=60):
+def get_element_cache(driver):
     """
-    wait_for_page_changes
+    get_element_cache
 
-    Waits for an page to change, subject to timeout specified in wait_for_seconds
+    Gets the element cache of a driver
 
-    :param driver: Webdriver controller for the web page
-    :param page_title_to_change_to: Title of the page we want to go to.
-    :param wait_for_seconds: Timeout value for the page to change to the desired page title
+    :param driver: Webdriver for the browser
+    :return: The cache, or None if caching is not enabled for the driver
+    :rtype: ElementCache
     """
-    Log.info(f"Current page title is {driver.title}")
-    Log.info(f"Waiting {wait_for_seconds} seconds for page to change to {page_title_to_change_to}")
-    try:
-        WebDriverWait(driver, wait_for_seconds).until(expected_conditions.title_contains(page_title_to_change_to))
-    except TimeoutException as e:
-        Log.error(f"Timed out with page title at {driver.title}")
-        take_screenshot(driver)
-        driver.quit()
-        raise TimeoutException(f"Timed out with page title at {driver.title}. {e}")
-    Log.info(f"Page has changed to {page_title_to_change_to}")
+    return _element_caches.get(driver)
 
-
-def wait_for_by_id_then_click(driver, element_id, wait_for_seconds=30):
+def invalidate_element_cache(driver):
     """
-    wait_for_by_id_then_click
+    invalidate_element_cache
 
-    Waits for an element by id to be clickable and clicks it
+    Drops every cached element for a driver. Call after navigating without using the helpers in this module.
 
-    :param driver: Webdriver controller for the web page
-    :param element_id: ID of the element to interact with.
-    :param wait_for_seconds: Timeout value for the element to be clickable
+    :param driver: Webdriver for the browser
     """
-    Log.info(f"Waiting {wait_for_seconds} seconds to be clickable, then clicking element with ID {element_id}")
-    WebDriverWait(driver, wait_for_seconds).until(
-        expected_conditions.element_to_be_clickable((By.ID, element_id)))
-    retries = int(wait_for_seconds / 10)
-    wait_seconds = 10
-    attempt_number = 1
-    while attempt_number <= retries:
-        Log.info(f"Trying to click element: Attempt number {attempt_number} of {retries}")
-        try:
-            click_element_by_id(driver, element_id)
-            return
-        except Exception as e:
-            Log.warning(f"Failed the click. Waiting {wait_seconds} seconds to retry. {e}")
-            sleep(wait_seconds)
-        attempt_number += 1
-    driver.save_screenshot("screenshot.png")
-    driver.quit()
-    raise FileNotFoundError("Out of retries. Could not click the element")
+    cache = _element_caches.get(driver)
+    if cache is not None:
+        cache.invalidate()
 
-
-def wait_for_by_xpath_then_click(driver, element_xpath, wait_for_seconds=40):
+def is_driver_healthy(driver):
     """
-    wait_for_by_xpath_then_click
+    is_driver_healthy
 
-    Waits for an element by xpath to be clickable
+    Checks that the browser session behind a driver still responds to commands
 
-    :param driver: Webdriver controller for the web page
-    :param element_xpath: Xpath of the element to interact with.
-    :param wait_for_seconds: Timeout value for the element to be clickable
+    :param driver: Webdriver for the browser
+    :return: True if the session answered, False otherwise
+    :rtype: Boolean
     """
-    Log.info(f"Waiting {wait_for_seconds} seconds for element with xpath {element_xpath} to appear!")
-    WebDriverWait(driver, wait_for_seconds).until(
-        expected_conditions.element_to_be_clickable((By.XPATH, element_xpath)))
-    click_element_by_xpath(driver, element_xpath)
+    try:
+        return bool(driver.window_handles)
+    except Exception as e:
+        _helper_log.warning("Browser session failed its health check. %s", e)
+        return False
 
-def wait_for_by_id_then_fill_in(driver, element_id, text, wait_for_seconds=30):
+def iter_list_rows(driver, names_xpath=None, ocids_xpath=None, states_xpath=None, next_page_xpath=None,
+                   max_pages=None, page_wait_seconds=30):
     """
-    wait_for_by_id_then_fill_in
+    iter_list_rows
 
-    Waits for an element by xpath to be clickable and fills it in with specified text
+    Generator over the rows of a paginated console list, page by page. Each page is read with a single batched call
+    and the next page is only loaded once the caller has consumed the current one, so stopping early skips the rest
+    of the list. The OCID and state of a row are the cells in the same table row as its name, None where the row has
+    none. If the names are not inside table rows, the cells are paired by position, which needs the columns to have
+    as many cells as there are names.
 
-    :param driver: Webdriver controller for the web page
-    :param element_id: ID of the element to interact with.
-    :param text: Text to fill into the element
-    :param wait_for_seconds: Timeout value for the element to be clickable
-    """
-    Log.info(f"Trying to fill in text {text} on element with ID {element_id} within {wait_for_seconds} seconds")
-    element = WebDriverWait(driver, wait_for_seconds).until(
-        expected_conditions.element_to_be_clickable((By.ID, element_id)))
-    element.send_keys(text)
+    :param driver: Webdriver for the browser
+    :param names_xpath: Xpath of the name cells. Defaults to NAMES_LIST_XPATH
+    :param ocids_xpath: Xpath of the OCID cells. Defaults to OCID_OF_LIST_ITEM_XPATH
+    :param states_xpath: Xpath of the state cells. Defaults to STATE_XPATH
+    :param next_page_xpath: Xpath of the next page button. Defaults to NEXT_PAGE_BUTTONS_XPATH
+    :param max_pages: Maximum number of pages to read. No limit if not given
+    :param page_wait_seconds: Timeout value for the next page to load
 
+    :return: Rows of the list, in order
+    :rtype: Generator of ListRow
+    :raises ValueError: If the cells cannot be paired into rows
+    """
+    xpaths = (names_xpath, ocids_xpath, states_xpath, next_page_xpath)
+    if not all(xpaths):
+        constants = _load_locator_constants('lib.pca.pca_3x.constants.ui_constants.IAM.Users.user_home_constants')
+        xpaths = (names_xpath or constants.NAMES_LIST_XPATH, ocids_xpath or constants.OCID_OF_LIST_ITEM_XPATH,
+                  states_xpath or constants.STATE_XPATH, next_page_xpath or constants.NEXT_PAGE_BUTTONS_XPATH)
+    # In the order _READ_LIST_PAGE_SCRIPT takes them: names, OCIDs, states and the next page button
+    xpaths = tuple(_xpath_of(xpath) for xpath in xpaths)
+    page = driver.execute_script(_READ_LIST_PAGE_SCRIPT, *xpaths)
+    page_number = 1
+    while True:
+        _helper_log.info("Read %s rows from page %s of the list", len(page['names']), page_number)
+        _check_list_page_columns(page, page_number)
+        columns = zip(page['names'], page['ocids'], page['states'], page['name_elements'])
+        for index, (name, ocid, state, element) in enumerate(columns):
+            yield ListRow(name, ocid, state, page_number, index, element)
+        if not page['next_enabled'] or (max_pages is not None and page_number >= max_pages):
+            return
+        previous_rows = (page['names'], page['ocids'])
+        # The button the page was read with saves a lookup, retries find it again in case it was re-rendered
+        _act_on_element(driver, By.XPATH, xpaths[3], lambda button: button.click(), page['next'])
+        page = wait_until(driver, lambda d: _read_changed_list_page(d, xpaths, previous_rows), page_wait_seconds,
+                          f"page {page_number + 1} of the list to load")
+        page_number += 1
 
-def wait_for_by_xpath(driver, element_xpath, wait_for_seconds=40, return_element=False):
+@_instrumented
+def launch_menu(driver, desired_page, menu_items, use_route_cache=False, route_wait_seconds=10, route_scope=None):
     """
-    wait_for_by_xpath
+    launch_menu
 
-    Waits for an element by xpath to be clickable
+    Launches a menu item. With use_route_cache, the path a menu lands on is remembered in the route cache, see
+    get_route_cache, and later launches of the same page in the same scope go straight to it. If that does not land
+    on the desired page the route is forgotten and the menu clicked through instead.
 
-    :param driver: Webdriver controller for the web page
+    :param driver: Webdriver to control page
+    :param desired_page: Desired page to be on. If we are already on it, we stay there.
+    :param menu_items: List of the menu items to click in order.
+    :param use_route_cache: Go straight to a remembered path for the page, and remember the path the menu lands on
+    :param route_wait_seconds: Timeout value for a remembered path to show the desired page
+    :param route_scope: What the route depends on besides the console origin, e.g the tenancy and region. Defaults to
+        the ROUTE_SCOPE_PARAMS query parameters of the current page
+
+    :return: Flag to show that the page has changed to the desired page
+    :rtype: Boolean
+    """
+    return _run_steps(driver, _launch_menu_steps(driver, desired_page, menu_items, use_route_cache, route_wait_seconds,
+                                                 route_scope))
+
+
+@_instrumented
+def open_url(driver, url):
+    """
+    open_url
+
+    Opens a URL
+
+    :param driver: Webdriver to control page
+    :param url: Desired URL
+    """
+    _helper_log.info("Going to URL %s", url)
+    invalidate_element_cache(driver)
+    driver.get(url)
+
+@_instrumented
+def read_elements_by_xpath(driver, xpath, attributes=()):
+    """
+    read_elements_by_xpath
+
+    Reads the text, requested attributes and state of every element matching an xpath with one execute_script call,
+    instead of one WebDriver round trip per element and property.
+
+    :param driver: Webdriver for the browser
+    :param xpath: Xpath of the list of elements
+    :param attributes: Names of the attributes to read from each element
+    :return: One ElementState per matching element, in document order
+    :rtype: List of ElementState
+    """
+    rows = driver.execute_script(_READ_ELEMENTS_SCRIPT, _xpath_of(xpath), list(attributes)) or []
+    return [ElementState(row['element'], row['text'], row['attributes'], row['displayed'], row['enabled'],
+                         row['selected']) for row in rows]
+
+@contextmanager
+def record_commands(driver, trace_path, keep_screenshots=False):
+    """
+    record_commands
+
+    Context manager recording every WebDriver command the driver sends while it is open, with the responses it gets
+    back and their timings, into a trace file replay_driver can play back. Traces ending in .gz are compressed.
+
+    :param driver: Webdriver for the browser
+    :param trace_path: File to write the trace to
+    :param keep_screenshots: Keep screenshot images in the trace. They are dropped by default to keep traces small
+    :return: The CommandRecorder, for inspecting the commands recorded so far
+    """
+    recorder = CommandRecorder(driver, keep_screenshots)
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+        recorder.save(trace_path)
+
+def reset_helper_metrics():
+    """
+    reset_helper_metrics
+
+    Throws away the helper metrics and browser recycle metrics recorded so far
+    """
+    with _helper_metrics_lock:
+        _helper_metrics.clear()
+        _browser_recycle_metrics.update(recycles=0, seconds=0.0, reasons={}, rss_bytes=[], commands=[])
+
+def reset_driver_state(driver):
+    """
+    reset_driver_state
+
+    Returns a browser session to a clean state so it can be handed to another test. Closes any extra windows, clears
+    the cookies and the local/session storage of the current page, then parks the session on a blank page.
+
+    :param driver: Webdriver for the browser
+    """
+    handles = driver.window_handles
+    main_handle = handles[0]
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(main_handle)
+    driver.delete_all_cookies()
+    driver.execute_script(
+        "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+    driver.get("about:blank")
+
+def replay_driver(trace_path, realtime=False, check_params=False):
+    """
+    replay_driver
+
+    Creates a driver that answers every command from a trace written by record_commands instead of a browser, so a
+    recorded flow can be rerun in milliseconds to check changes to flow code or to profile it. Waits run on the
+    trace's clock, so they take no real time unless realtime is set.
+
+    :param trace_path: Trace file written by record_commands
+    :param realtime: Take as long as the recorded commands did, and wait in real time
+    :param check_params: Also fail if a command is sent with different parameters than the recorded one
+    :return: Webdriver replaying the trace. Sending a different command than the recorded one raises ValueError
+    """
+    from selenium import webdriver
+
+    with _open_trace(trace_path, 'rt') as trace_in:
+        trace = json.load(trace_in)
+    executor = ReplayCommandExecutor(trace, realtime, check_params)
+    driver = webdriver.Remote(command_executor=executor, desired_capabilities={})
+    driver._base_ui_replay = executor
+    _helper_log.info("Replaying %s commands from %s", len(executor.commands), trace_path)
+    return driver
+
+def restore_session_snapshot(driver, snapshot_path=None, is_logged_in=None, landing_path='/favicon.ico'):
+    """
+    restore_session_snapshot
+
+    Restores the cookies and local/session storage saved by save_session_snapshot into a driver, then opens the page
+    the snapshot was taken on. A missing, expired or undecryptable snapshot is not restored. If is_logged_in rejects
+    the restored page the snapshot is deleted, so the caller logs in again and saves a fresh one.
+
+    :param driver: Webdriver for the browser
+    :param snapshot_path: Snapshot file. Defaults to SESSION_SNAPSHOT_FILE
+    :param is_logged_in: Callable taking the driver, truthy if the restored page is authenticated
+    :param landing_path: Light page on the console's origin to open while the cookies and storage are set, as
+        browsers only accept cookies for the page they are on
+    :return: True if the snapshot was restored and accepted
+    :rtype: Boolean
+    """
+    snapshot_path = snapshot_path or SESSION_SNAPSHOT_FILE
+    snapshot = _read_session_snapshot(snapshot_path)
+    if snapshot is None:
+        return False
+    _helper_log.info("Restoring the session snapshot taken on %s", snapshot['url'])
+    _apply_session_state(driver, snapshot, landing_path)
+    if is_logged_in is not None and not is_logged_in(driver):
+        _helper_log.warning("Session snapshot %s was rejected, deleting it", snapshot_path)
+        try:
+            os.remove(snapshot_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+def run_flows_in_parallel(flows, max_workers=None, browser='chrome', headless=True, output_dir='ui_flow_results',
+                          history_file=None, profile=None, flow_timeout_seconds=None):
+    """
+    run_flows_in_parallel
+
+    Shards independent UI flows across a pool of worker processes. Each worker keeps its own browser for the flows it
+    runs. Flows are handed out longest first, going by how long they took on previous runs, so the slow ones do not
+    end up queued behind everything else. Helper state such as the retry policy and budget is per worker; each worker
+    starts from the UI_* settings. A flow that runs past flow_timeout_seconds is failed and its worker killed, which
+    also stops the flows the other workers were running; those are run again on a fresh pool.
+
+    :param flows: Module level callables taking a driver, one per flow
+    :param max_workers: Number of worker processes. Defaults to the number of CPUs
+    :param browser: Browser to use e.g chrome, firefox, ie.
+    :param headless: Run the worker browsers without a window
+    :param output_dir: Directory for the per flow logs and failure screenshots
+    :param history_file: JSON file of past flow durations. Defaults to flow_durations.json in output_dir
+    :param profile: Driver profile for the worker browsers, see setup_driver
+    :param flow_timeout_seconds: How long one flow may run. Defaults to FLOW_TIMEOUT_SECONDS, 0 waits forever
+
+    :return: One FlowResult per flow, in the order the flows were given
+    :rtype: List of FlowResult
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    history_file = history_file or os.path.join(output_dir, 'flow_durations.json')
+    history = _load_flow_durations(history_file)
+    names = [_flow_name(flow) for flow in flows]
+    order = sorted(range(len(flows)), key=lambda i: history.get(names[i], float('inf')), reverse=True)
+    if flow_timeout_seconds is None:
+        flow_timeout_seconds = FLOW_TIMEOUT_SECONDS
+    _helper_log.info("Running %s flows across %s workers", len(flows), max_workers or os.cpu_count())
+    results = {}
+    while order:
+        order = _run_flow_round(flows, names, order, results, history, max_workers, (browser, headless, profile),
+                                output_dir, flow_timeout_seconds)
+    _save_flow_durations(history_file, history)
+    return [results[i] for i in range(len(flows))]
+
+def save_session_snapshot(driver, snapshot_path=None, ttl_seconds=None):
+    """
+    save_session_snapshot
+
+    Saves the cookies and local/session storage of a logged in driver, encrypted, so restore_session_snapshot can
+    authenticate fresh drivers without going through the login page. Needs the cryptography package and a key from
+    UI_SESSION_SNAPSHOT_KEY or SESSION_SNAPSHOT_KEY_FILE.
+
+    :param driver: Webdriver for the browser, logged in and on a console page
+    :param snapshot_path: Snapshot file. Defaults to SESSION_SNAPSHOT_FILE
+    :param ttl_seconds: How long the snapshot can be restored for. Defaults to SESSION_SNAPSHOT_TTL_SECONDS
+    """
+    snapshot_path = snapshot_path or SESSION_SNAPSHOT_FILE
+    snapshot = _capture_session_state(driver)
+    snapshot['expires_at'] = time() + (SESSION_SNAPSHOT_TTL_SECONDS if ttl_seconds is None else ttl_seconds)
+    token = _session_snapshot_cipher().encrypt(json.dumps(snapshot).encode())
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'wb') as snapshot_out:
+        snapshot_out.write(token)
+    os.replace(temp_path, snapshot_path)
+    _helper_log.info("Saved a session snapshot of %s cookies to %s", len(snapshot['cookies']), snapshot_path)
+
+@_instrumented
+def select_compartment(driver, path, index=None, wait_for_seconds=30):
+    """
+    select_compartment
+
+    Selects a compartment in the DRG/VCN compartment dropdown in a constant number of interactions, however many
+    compartments the tenancy has. Nothing is done if the compartment is already selected. Otherwise the dropdown is
+    opened and the target item is found and clicked inside the page. With a CompartmentIndex, the item is located by
+    its path in the order the page lists the tree, so duplicate compartment names in different branches resolve to
+    the right item; without one the first item with the name is picked. If the item is not in the list, the list is
+    reloaded once before giving up.
+
+    :param driver: Webdriver for the browser
+    :param path: Path of the compartment, as "parent/child" or a list of names
+    :param index: CompartmentIndex of the tenancy, e.g built from CompartmentRestUtils
+    :param wait_for_seconds: Timeout value for the dropdown and its list to be ready
+
+    :return: True if the selection was changed, False if the compartment was already selected
+    :rtype: Boolean
+    :raises ValueError: If the dropdown lists compartments the index does not know, i.e the index is out of date
+    """
+    constants = _load_locator_constants('lib.pca.pca_3x.constants.ui_constants.Networking.drg_home_constants')
+    list_xpath = constants.DRG_DETAILS_COMPARTMENT_SELECTION_LIST_XPATH
+
+    full_path = index.resolve(path)[2] if index is not None else tuple(_split_compartment_path(path))
+    selected = driver.find_elements(*_normalize_locator(constants.DRG_ALREADY_SELECTED_COMPARTMENT_XPATH))
+    if selected and _is_selected_compartment(selected[0].text, full_path, index):
+        _helper_log.info("Compartment %s is already selected", '/'.join(full_path))
+        return False
+    _helper_log.info("Selecting compartment %s", '/'.join(full_path))
+    wait_for_by_xpath_then_click(driver, constants.DRG_DETAILS_COMPARTMENT_DROPDOWN, wait_for_seconds)
+    wait_until(driver, lambda d: d.find_elements(*_normalize_locator(list_xpath)), wait_for_seconds,
+               "the compartment list to load")
+    if _click_compartment_item(driver, list_xpath, full_path, index):
+        return True
+    _helper_log.warning("Compartment %s is not in the list, reloading it", '/'.join(full_path))
+    click_element_by_xpath(driver, constants.COMPARTMENT_RELOAD_BUTTON)
+    wait_until(driver, lambda d: _click_compartment_item(d, list_xpath, full_path, index), wait_for_seconds,
+               f"compartment {'/'.join(full_path)} to be in the list")
+    return True
+
+def select_driver_profile(profile):
+    """
+    select_driver_profile
+
+    Sets the driver profile setup_driver uses when none is passed, for the rest of the run. The UI_DRIVER_PROFILE
+    environment variable does the same without code changes.
+
+    :param profile: Name of a profile in DRIVER_PROFILES
+    """
+    global _default_driver_profile
+    if profile not in DRIVER_PROFILES:
+        raise ValueError(f"Unknown driver profile {profile}. Known profiles are {sorted(DRIVER_PROFILES)}")
+    _helper_log.info("Using driver profile %s for this run", profile)
+    _default_driver_profile = profile
+
+def set_retry_policy(policy=None, budget=None):
+    """
+    set_retry_policy
+
+    Sets the retry policy every interaction helper uses and refills the retry budget. Both are per process: under
+    run_flows_in_parallel, call it from the flows to set them in the workers.
+
+    :param policy: RetryPolicy to use. Defaults to a RetryPolicy built from the UI_RETRY_* settings
+    :param budget: Interactions that may be retried across the run before the helpers stop retrying. Defaults to
+        RETRY_BUDGET
+    """
+    global _retry_policy
+    _retry_policy = policy if policy is not None else RetryPolicy()
+    with _helper_metrics_lock:
+        _retry_budget.update(limit=RETRY_BUDGET if budget is None else budget, spent=0, refused=0, kinds={})
+    _helper_log.info("Retrying %s failures with a budget of %s retries",
+                     sorted(_retry_policy.retry_on), _retry_budget['limit'])
+
+def set_script_timeout(driver, seconds):
+    """
+    set_script_timeout
+
+    Sets how long the driver lets asynchronous scripts run. Selenium 3 cannot read the timeout back, so set it through
+    here rather than on the driver for wait_for_xpath_with_observer to restore it after raising it for a wait.
+
+    :param driver: Webdriver for the browser
+    :param seconds: Script timeout in seconds
+    """
+    driver.set_script_timeout(seconds)
+    _script_timeouts[driver] = seconds
+
+def setup_driver(browser='chrome', headless=False, profile=None):
+    """
+    setup_driver
+
+    Sets the driver up for the browser
+
+    :param browser: Browser to use e.g chrome, firefox, ie.
+    :param headless: Run the browser without a window, whatever the profile says
+    :param profile: Name of a profile in DRIVER_PROFILES. Defaults to the one chosen for the run, see
+        select_driver_profile
+
+    :return: Browser object for the chosen browser
+    :rtype: Webdriver object
+    """
+    from selenium.webdriver.chrome.options import Options
+
+    profile = profile or _default_driver_profile
+    if profile not in DRIVER_PROFILES:
+        raise ValueError(f"Unknown driver profile {profile}. Known profiles are {sorted(DRIVER_PROFILES)}")
+    settings = DRIVER_PROFILES[profile]
+    _helper_log.info("Setting up driver with profile %s", profile)
+    options = Options()
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-extensions")
+    if settings.get('incognito', True):
+        options.add_argument("--incognito")
+    options.add_argument('ignore-certificate-errors')
+    if headless or settings.get('headless'):
+        options.add_argument("--headless")
+        options.add_argument(f"--window-size={settings.get('window_size', '1920,1080')}")
+    elif settings.get('window_size'):
+        options.add_argument(f"--window-size={settings['window_size']}")
+    cache_dir = tempfile.mkdtemp(prefix='base_ui_utils_chrome_cache-') if settings.get('disk_cache') else None
+    if cache_dir:
+        options.add_argument(f"--disk-cache-dir={cache_dir}")
+    if settings.get('page_load_strategy'):
+        options.set_capability('pageLoadStrategy', settings['page_load_strategy'])
+    try:
+        driver = _setup_driver_options(browser, options)
+    except Exception:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        raise
+    if cache_dir:
+        _remove_on_quit(driver, cache_dir)
+    if settings.get('blocked_urls'):
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(settings['blocked_urls'])})
+    return driver
+
+@_instrumented
+def take_page_snapshot(driver):
+    """
+    take_page_snapshot
+
+    Fetches the page's DOM in one round trip and parses it, so any number of read only XPath queries and text reads
+    can run locally instead of costing a WebDriver round trip each. Needs the lxml package.
+
+    :param driver: Webdriver for the browser
+    :return: Snapshot of the page
+    :rtype: PageSnapshot
+    """
+    return PageSnapshot(driver)
+
+@_instrumented
+def take_screenshot(driver, screenshot_name='screenshot.png'):
+    """
+    take_screenshot
+
+    Utility to take a screenshot. The capture is written in the background by the ScreenshotWriter set up with
+    configure_screenshots, which by default stores it on the current working directory. The file name is made unique
+    so screenshots do not overwrite each other.
+
+    :param driver: Webdriver Object for the browser
+    :param screenshot_name: Name of the screenshot file, used as the stem of the unique file name
+    :return: Path the screenshot is written to, or the path of an identical earlier screenshot
+    """
+    _helper_log.info("Creating screenshot %s", screenshot_name)
+    return get_screenshot_writer().capture(driver, screenshot_name)
+
+@_instrumented
+def wait_for_page_changes(driver, page_title_to_change_to, wait_for_seconds=60):
+    """
+    wait_for_page_changes
+
+    Waits for an page to change, subject to timeout specified in wait_for_seconds
+
+    :param driver: Webdriver controller for the web page
+    :param page_title_to_change_to: Title of the page we want to go to.
+    :param wait_for_seconds: Timeout value for the page to change to the desired page title
+    """
+    _run_steps(driver, _wait_for_page_changes_steps(driver, page_title_to_change_to, wait_for_seconds))
+
+
+@_instrumented
+def wait_for_by_id_then_click(driver, element_id, wait_for_seconds=30):
+    """
+    wait_for_by_id_then_click
+
+    Waits for an element by id to be clickable and clicks it. Failed clicks are retried under the retry policy for
+    whatever is left of wait_for_seconds after the element became clickable. The browser is left open when they run
+    out, so the session can be reused.
+
+    :param driver: Webdriver controller for the web page
+    :param element_id: ID of the element to interact with.
+    :param wait_for_seconds: Timeout value for the element to be clickable and clicked
+    """
+    _run_steps(driver, _wait_for_by_id_then_click_steps(driver, element_id, wait_for_seconds))
+
+
+@_instrumented
+def wait_for_by_xpath_then_click(driver, element_xpath, wait_for_seconds=40):
+    """
+    wait_for_by_xpath_then_click
+
+    Waits for an element by xpath to be clickable
+
+    :param driver: Webdriver controller for the web page
+    :param element_xpath: Xpath of the element to interact with.
+    :param wait_for_seconds: Timeout value for the element to be clickable
+    """
+    _run_steps(driver, _wait_for_by_xpath_then_click_steps(driver, element_xpath, wait_for_seconds))
+
+@_instrumented
+def wait_for_by_id_then_fill_in(driver, element_id, text, wait_for_seconds=30):
+    """
+    wait_for_by_id_then_fill_in
+
+    Waits for an element by xpath to be clickable and fills it in with specified text
+
+    :param driver: Webdriver controller for the web page
+    :param element_id: ID of the element to interact with.
+    :param text: Text to fill into the element
+    :param wait_for_seconds: Timeout value for the element to be clickable
+    """
+    _run_steps(driver, _wait_for_by_id_then_fill_in_steps(driver, element_id, text, wait_for_seconds))
+
+
+@_instrumented
+def wait_for_by_xpath(driver, element_xpath, wait_for_seconds=40, return_element=False):
+    """
+    wait_for_by_xpath
+
+    Waits for an element by xpath to be present on the page. Returns as soon as it appears, using a MutationObserver
+    in the page and falling back to polling if the page does not support it.
+
+    :param driver: Webdriver controller for the web page
+    :param element_xpath: Xpath of the element to interact with.
+    :param wait_for_seconds: Timeout value for the element to be present
+    :param return_element: Return the list of matching elements
+    :return: List of WebElements if return_element is set
+    """
+    return _run_steps(driver, _wait_for_by_xpath_steps(driver, element_xpath, wait_for_seconds, return_element))
+
+
+@_instrumented
+def wait_for_by_xpath_then_fill_in(driver, element_xpath, text, wait_for_seconds=200):
+    """
+    wait_for_by_xpath_then_fill_in
+
+    Waits for an element by xpath to be clickable and fills it in with specified text
+
+    :param driver: Webdriver controller for the web page
     :param element_xpath: Xpath of the element to interact with.
+    :param text: Text to fill into the element
+    :param wait_for_seconds: Timeout value for the element to be clickable
+    """
+    _run_steps(driver, _wait_for_by_xpath_then_fill_in_steps(driver, element_xpath, text, wait_for_seconds))
+
+
+@_instrumented
+def wait_for_by_xpath_then_get_text(driver, element_xpath, wait_for_seconds=30, snapshot=None):
+    """
+    wait_for_by_xpath_then_get_text
+
+    Waits for an element by xpath to be clickable and reads it's text
+
+    :param driver: Webdriver controller for the web page
+    :param element_xpath: Xpath of the element to interact with.
+    :param wait_for_seconds: Timeout value for the element to be clickable
+    :param snapshot: PageSnapshot to read the text from without a round trip when the element is in it, see
+        PageSnapshot.text. Otherwise the live page is waited on
+    """
+    return _run_steps(driver, _wait_for_by_xpath_then_get_text_steps(driver, element_xpath, wait_for_seconds,
+                                                                     snapshot))
+
+
+@_instrumented
+def wait_for_element_not_to_be_clickable(driver, element_xpath_or_id, element_type='xpath', wait_interval=5, max_wait_time=60):
+    """
+
+    wait_for_element_not_to_be_clickable
+
+    Polls until the element is no longer on the page. Polling starts fine grained and backs off up to wait_interval
+
+    :param driver: Webdriver for the browser
+    :param element_xpath_or_id: Xpath or ID of the element we want to not be clickable. Defined by element_type
+    :param element_type: 'xpath' or 'id' to select the appropriate Webdriver call for find element
+    :param wait_interval: Longest sleep interval between checks
+    :param max_wait_time: Timeout for the element to not be clickable
+    :return:
+    """
+    _run_steps(driver, _wait_for_element_not_to_be_clickable_steps(driver, element_xpath_or_id, element_type,
+                                                                   wait_interval, max_wait_time))
+
+@_instrumented
+def wait_for_element_to_be_clickable(driver, xpath_or_id, element_type='xpath', wait_for_seconds=30):
+    """
+    wait_for_element_to_be_clickable
+
+    Waits for an element to be clickable
+
+    :param driver: Webdriver controller for the web page
+    :param xpath_or_id: Xpath or ID of the element. Defined by element_type
+    :param element_type: 'xpath' or 'id'
     :param wait_for_seconds: Timeout value for the element to be clickable
     """
-    Log.info(f"Waiting {wait_for_seconds} seconds for element with xpath {element_xpath} to appear!")
-    sleep(wait_for_seconds)
-    element = driver.find_elements_by_xpath(element_xpath)
-    # WebDriverWait(driver, wait_for_seconds).until(
-    #     expected_conditions.elem((By.XPATH, element_xpath)))
-    Log.info("Element found")
-    if return_element:
-        return element
+    _run_steps(driver, _wait_for_element_to_be_clickable_steps(driver, xpath_or_id, element_type, wait_for_seconds))
+
+@_instrumented
+def wait_for_xpath_with_observer(driver, element_xpath, wait_for_seconds=40):
+    """
+    wait_for_xpath_with_observer
+
+    Waits inside the page for an xpath to match, using a MutationObserver so the wait ends on the DOM change that adds
+    the element rather than on the next poll. Costs a single WebDriver round trip, plus two to raise the driver's
+    script timeout above the wait and put it back afterwards.
+
+    :param driver: Webdriver controller for the web page
+    :param element_xpath: Xpath of the element to wait for
+    :param wait_for_seconds: Timeout value for the element to appear
+    :return: True if the element appeared, False on timeout, None if the page could not run the observer
+    """
+    start = monotonic()
+    script_timeout = _script_timeout(driver)
+    try:
+        driver.set_script_timeout(wait_for_seconds + 5)
+        try:
+            found = driver.execute_async_script(_OBSERVE_XPATH_SCRIPT, _xpath_of(element_xpath),
+                                                int(wait_for_seconds * 1000))
+        finally:
+            driver.set_script_timeout(script_timeout)
+    except _exceptions.WebDriverException as e:
+        _helper_log.warning("Could not observe the page for xpath %s, falling back to polling. %s", element_xpath, e)
+        return None
+    finally:
+        _note_helper_wait(monotonic() - start)
+    _helper_log.info("Observed xpath %s %s after %.2f seconds",
+                     element_xpath, 'appearing' if found else 'not appearing', monotonic() - start)
+    return bool(found)
+
+def wait_until(driver, condition, wait_for_seconds, description='condition', max_poll_interval=None,
+               ignored_exceptions=None):
+    """
+    wait_until
+
+    Wait engine used by the wait_for_* helpers. Checks the condition straight away and then polls it, starting at a
+    fine interval and backing off up to max_poll_interval, so a wait ends as soon as the condition holds.
+    The time the wait actually took is logged.
+
+    :param driver: Webdriver controller for the web page
+    :param condition: Callable taking the driver, e.g an expected_conditions object. The wait ends on a truthy return
+    :param wait_for_seconds: Timeout value for the condition to hold
+    :param description: What is being waited for, used in log and error messages
+    :param max_poll_interval: Longest sleep between checks. Defaults to WAIT_MAX_POLL_INTERVAL
+    :param ignored_exceptions: Exceptions raised by the condition that count as "not yet".
+        Defaults to NoSuchElementException and StaleElementReferenceException
+    :return: The truthy value returned by the condition
+    :raises TimeoutException: If the condition does not hold within wait_for_seconds
+    """
+    return _run_steps(driver, _wait_until_steps(driver, condition, wait_for_seconds, description, max_poll_interval,
+                                                ignored_exceptions))
+
+def xpath_to_css(xpath):
+    """
+    xpath_to_css
+
+    Rewrites an XPath into the equivalent CSS selector, which browsers match faster. Only paths made of element
+    steps with attribute, class and leading position predicates can be rewritten, e.g
+    //table[@id='items']//td[contains(@class,'name')] becomes table#items td[class*="name"]. Paths using text, axes,
+    unions or functions cannot, and give None.
+
+    :param xpath: Xpath string
+    :return: CSS selector matching the same elements, or None if there is none
+    :rtype: String
+    """
+    return _xpath_to_css(xpath)
+
+
+class AsyncUiSession:
+    """
+    AsyncUiSession
+
+    asyncio flavour of the helpers in this module, bound to one driver. Each WebDriver command runs on a thread pool
+    shared by every session, and waits sleep on the event loop between polls instead of holding a thread, so a single
+    event loop can drive many browser sessions at once.
+
+    The helpers that only issue commands (find_*, get_*, open_url, ...) are available under the same names without
+    the driver argument, as are the helpers that retry or wait (click_*, fill_in_*, clear_field_*, wait_for_*,
+    launch_menu, ...). Those run the very steps of the blocking helper, see run_steps: the steps on the pool and the
+    pauses between them, including retry backoffs, on the event loop.
+
+    Usage:
+        session = AsyncUiSession(driver)
+        await session.open_url(url)
+        await session.click_element_by_xpath(xpath)
+        await session.wait_for_page_changes("Instances")
+    """
+
+    def __init__(self, driver):
+        """
+        :param driver: Webdriver for the browser
+        """
+        self.driver = driver
+
+    def __getattr__(self, name):
+        if name in _ASYNC_STEPPED_HELPERS:
+            steps = globals()[f"_{name}_steps"]
+
+            @wraps(globals()[name])
+            async def call(*args, **kwargs):
+                return await self.run_steps(steps(self.driver, *args, **kwargs))
+            return call
+        if name not in _ASYNC_PASSTHROUGH_HELPERS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        helper = globals()[name]
+
+        @wraps(helper)
+        async def call(*args, **kwargs):
+            return await self.run(helper, *args, **kwargs)
+        return call
+
+    async def run(self, func, *args, **kwargs):
+        """
+        run
+
+        Runs a blocking callable taking the driver as its first argument on the shared command pool
+
+        :param func: Callable to run, e.g one of the helpers in this module
+        :return: Whatever the callable returns
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_async_command_pool(), partial(func, self.driver, *args, **kwargs))
+
+    async def retry(self, attempt, description, wait_for_seconds=None, extra_kinds=()):
+        """
+        retry
+
+        Non-blocking counterpart of _retry. The attempts run on the command pool and the backoff sleeps on the event
+        loop.
+
+        :param attempt: Callable taking the driver, making one attempt
+        :param description: What is being attempted, used in log messages
+        :param wait_for_seconds: Keep retrying for this long rather than for the policy's number of attempts
+        :param extra_kinds: Further kinds of failure to retry, see RetryPolicy.should_retry
+        :return: Whatever the attempt returns
+        """
+        return await self.run_steps(_retry_steps(self.driver, partial(attempt, self.driver), description,
+                                                 wait_for_seconds, extra_kinds))
+
+    async def run_steps(self, steps):
+        """
+        run_steps
+
+        Runs the steps of a waiting helper, see _run_steps. Each step runs on the command pool and the pauses between
+        them sleep on the event loop.
+
+        :param steps: Generator of the steps, e.g from _wait_until_steps
+        :return: Whatever the steps return
+        """
+        import asyncio
+
+        pause = _driver_clock(self.driver)[1]
+        while True:
+            done, value = await self.run(lambda driver: _next_step(steps))
+            if done:
+                return value
+            if pause is sleep:
+                await asyncio.sleep(value)
+            else:
+                pause(value)
+
+    async def wait_until(self, condition, wait_for_seconds, description='condition', max_poll_interval=None,
+                         ignored_exceptions=None):
+        """
+        wait_until
+
+        Non-blocking counterpart of wait_until. The condition runs on the command pool and the polls sleep on the
+        event loop.
+
+        :param condition: Callable taking the driver, e.g an expected_conditions object. The wait ends on a truthy return
+        :param wait_for_seconds: Timeout value for the condition to hold
+        :param description: What is being waited for, used in log and error messages
+        :param max_poll_interval: Longest sleep between checks. Defaults to WAIT_MAX_POLL_INTERVAL
+        :param ignored_exceptions: Exceptions raised by the condition that count as "not yet".
+            Defaults to NoSuchElementException and StaleElementReferenceException
+        :return: The truthy value returned by the condition
+        :raises TimeoutException: If the condition does not hold within wait_for_seconds
+        """
+        return await self.run_steps(_wait_until_steps(self.driver, condition, wait_for_seconds, description,
+                                                      max_poll_interval, ignored_exceptions))
+
+    async def wait_for_by_xpath(self, element_xpath, wait_for_seconds=40, return_element=False):
+        """
+        wait_for_by_xpath
+
+        See wait_for_by_xpath. Polls rather than observing the page, so no pool thread is held for the wait
+        """
+        return await self.run_steps(_wait_for_by_xpath_steps(self.driver, element_xpath, wait_for_seconds,
+                                                             return_element, observe=False))
+
+class CachedRestLookups:
+    """
+    CachedRestLookups
+
+    Proxy over a REST utils object that memoizes its read only calls in the TTL cache shared across the run, so
+    tests looking up the same compartment or tenancy (e.g PCA3_TENANT_NAME) do not each pay for the REST call.
+    Methods whose names start with one of READ_PREFIXES are cached, keyed by class, method and arguments. Any other
+    method call passes straight through and, as it may change what the lookups return, clears the cached results
+    of that class.
+    """
+
+    READ_PREFIXES = ('get', 'list', 'find', 'describe', 'lookup', 'search')
+
+    def __init__(self, rest_utils, cache=None):
+        """
+        :param rest_utils: REST utils object to wrap, e.g a CompartmentRestUtils
+        :param cache: TtlCache to use. Defaults to the one shared across the run
+        """
+        self._rest_utils = rest_utils
+        self._cache = cache or get_rest_lookup_cache()
+        self._class_name = type(rest_utils).__qualname__
+
+    def __getattr__(self, name):
+        attribute = getattr(self._rest_utils, name)
+        if not callable(attribute):
+            return attribute
+        if not name.lower().startswith(self.READ_PREFIXES):
+            @wraps(attribute)
+            def write(*args, **kwargs):
+                try:
+                    return attribute(*args, **kwargs)
+                finally:
+                    self._cache.invalidate(lambda key: key[0] == self._class_name)
+            return write
+
+        @wraps(attribute)
+        def read(*args, **kwargs):
+            key = (self._class_name, name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return attribute(*args, **kwargs)
+            return self._cache.get_or_load(key, lambda: attribute(*args, **kwargs))
+        return read
+
+
+class CommandRecorder:
+    """
+    CommandRecorder
+
+    Records the commands a driver sends to the browser and the raw responses it gets back, below the WebDriver
+    client so element references and errors are captured exactly as the browser sent them
+    """
+
+    SCREENSHOT_COMMANDS = ('screenshot', 'elementScreenshot')
+
+    def __init__(self, driver, keep_screenshots=False):
+        """
+        :param driver: Webdriver for the browser
+        :param keep_screenshots: Keep screenshot images in the recorded responses
+        """
+        self.driver = driver
+        self.keep_screenshots = keep_screenshots
+        self.commands = []
+        self._lock = threading.Lock()
+        self._execute = None
+        self._start = None
+
+    def start(self):
+        """
+        start
+
+        Starts recording the driver's commands
+        """
+        executor = self.driver.command_executor
+        self._execute = executor.execute
+        self._start = monotonic()
+
+        def recorded_execute(command, params):
+            sent = monotonic()
+            response = self._execute(command, params)
+            duration = monotonic() - sent
+            recorded = json.loads(json.dumps(response))
+            if command in self.SCREENSHOT_COMMANDS and not self.keep_screenshots and isinstance(recorded, dict):
+                recorded['value'] = ''
+            params = {key: value for key, value in (params or {}).items() if key != 'sessionId'}
+            with self._lock:
+                self.commands.append([command, params, recorded, round(sent - self._start, 4), round(duration, 4)])
+            return response
+
+        executor.execute = recorded_execute
+
+    def stop(self):
+        """
+        stop
+
+        Stops recording. The commands recorded so far are kept
+        """
+        if self._execute is not None:
+            self.driver.command_executor.execute = self._execute
+            self._execute = None
+
+    def save(self, trace_path):
+        """
+        save
+
+        Writes the recorded commands to a trace file
+
+        :param trace_path: File to write the trace to. Compressed if it ends in .gz
+        """
+        with self._lock:
+            trace = {'version': 1, 'w3c': self.driver.w3c, 'capabilities': self.driver.capabilities,
+                     'commands': list(self.commands)}
+        with _open_trace(trace_path, 'wt') as trace_out:
+            json.dump(trace, trace_out, separators=(',', ':'))
+        _helper_log.info("Recorded %s WebDriver commands to %s", len(trace['commands']), trace_path)
+
+
+class CompartmentIndex:
+    """
+    CompartmentIndex
+
+    Index of a tenancy's compartment tree, resolving a compartment path to its OCID and to its position in the
+    compartment dropdown. The dropdown lists the tree depth first, so a compartment's position is found by walking the
+    names the page lists in DOM order, stepping over whole subtrees by their size. Nothing is assumed about the order
+    siblings are listed in, and a listing that does not fit the tree is reported rather than guessed at.
+
+    Usage:
+        index = CompartmentIndex(rest_utils.list_compartments(...))
+        select_compartment(driver, "Networking/Prod", index)
+    """
+
+    def __init__(self, compartments):
+        """
+        :param compartments: Compartments of the tenancy, as objects or dicts with id, name and compartment_id (the
+            parent's id) as the REST API returns them. Compartments whose parent is not listed are roots
+        """
+        fields = [(_field(c, 'id'), _field(c, 'name'), _field(c, 'compartment_id')) for c in compartments]
+        ids = {ocid for ocid, _, _ in fields}
+        self._children = {}
+        for ocid, name, parent in fields:
+            self._children.setdefault(parent if parent in ids else None, {})[name] = ocid
+        self._by_path = {}
+        self._by_ocid = {}
+        self._subtree_sizes = {}
+        self._name_counts = {}
+        stack = [((), name, ocid, False) for name, ocid in self._children.get(None, {}).items()]
+        while stack:
+            parents, name, ocid, expanded = stack.pop()
+            path = parents + (name,)
+            children = self._children.get(ocid, {})
+            if expanded:
+                self._subtree_sizes[ocid] = 1 + sum(self._subtree_sizes[child] for child in children.values())
+                continue
+            self._by_path[path] = self._by_ocid[ocid] = (name, ocid, path)
+            self._name_counts[name] = self._name_counts.get(name, 0) + 1
+            stack.append((parents, name, ocid, True))
+            stack.extend((path, child_name, child, False) for child_name, child in children.items())
+        self.roots = list(self._children.get(None, {}))
+
+    def __len__(self):
+        return len(self._by_path)
+
+    def count(self, name):
+        """
+        count
+
+        :param name: Compartment name
+        :return: Number of compartments in the tenancy with that name
+        :rtype: Integer
+        """
+        return self._name_counts.get(name, 0)
+
+    def resolve(self, path):
+        """
+        resolve
+
+        :param path: Path of the compartment, as "parent/child" or a list of names, with or without the root
+            compartment (the tenancy). An OCID is also accepted
+        :return: Name, OCID and full path of the compartment
+        :rtype: Tuple
+        :raises KeyError: If no compartment has that path
+        """
+        if isinstance(path, str) and path in self._by_ocid:
+            return self._by_ocid[path]
+        names = tuple(_split_compartment_path(path))
+        if names in self._by_path:
+            return self._by_path[names]
+        for root in self.roots:
+            if (root,) + names in self._by_path:
+                return self._by_path[(root,) + names]
+        raise KeyError(f"No compartment at path {'/'.join(names)}")
+
+    def position(self, path, listed_names):
+        """
+        position
+
+        :param path: Full path of the compartment, as resolve returns it
+        :param listed_names: Names of the dropdown items in DOM order
+        :return: Position of the compartment among the dropdown items, None if the list does not reach it
+        :rtype: Integer
+        :raises ValueError: If the list holds a compartment the index does not know where the path leads, i.e the
+            index is out of date
+        """
+        position, end, siblings = 0, len(listed_names), self._children.get(None, {})
+        for depth, name in enumerate(path):
+            while position < end and listed_names[position] != name:
+                listed = listed_names[position]
+                if listed not in siblings:
+                    raise ValueError(f"Compartment dropdown lists {listed} at position {position}, which the index "
+                                     f"does not have under {'/'.join(path[:depth]) or 'the root'}")
+                position += self._subtree_sizes[siblings[listed]]
+            if position >= end:
+                return None
+            ocid = siblings[name]
+            end = min(end, position + self._subtree_sizes[ocid])
+            siblings = self._children.get(ocid, {})
+            if depth < len(path) - 1:
+                position += 1
+        return position
+
+
+class DriverSessionPool:
+    """
+    DriverSessionPool
+
+    Keeps a number of warm browser sessions ready so tests do not pay the browser start up cost each time. Sessions
+    are leased out, reset on return and health checked before being handed out again. Safe to use from many threads.
+
+    Usage:
+        with DriverSessionPool(size=4) as pool:
+            with pool.lease() as driver:
+                open_url(driver, url)
+    """
+
+    def __init__(self, size=2, browser='chrome', driver_factory=None, profile=None):
+        """
+        :param size: Maximum number of browser sessions the pool keeps alive
+        :param browser: Browser to use e.g chrome, firefox, ie. Ignored if driver_factory is given
+        :param driver_factory: Callable with no arguments returning a new driver. Defaults to setup_driver
+        :param profile: Driver profile for setup_driver. Ignored if driver_factory is given
+        """
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.size = size
+        self._driver_factory = driver_factory or (lambda: setup_driver(browser, profile=profile))
+        self._idle = deque()
+        self._leased = set()
+        self._starting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        self.warm_up()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def warm_up(self, count=None):
+        """
+        warm_up
+
+        Starts browser sessions up front so the first leases do not wait for them
+
+        :param count: Number of sessions to have idle in the pool. Defaults to the pool size
+        """
+        count = self.size if count is None else min(count, self.size)
+        _helper_log.info("Warming up %s browser sessions", count)
+        while True:
+            with self._condition:
+                if self._closed or len(self._idle) + self._starting >= count or self._total() >= self.size:
+                    return
+                self._starting += 1
+            self._start_driver(self._idle.append)
+
+    def acquire(self, timeout=None):
+        """
+        acquire
+
+        Leases a healthy browser session from the pool, starting a new one if there is room
+
+        :param timeout: Seconds to wait for a free session. None waits forever
+        :return: Driver for the leased browser session
+        :rtype: Webdriver object
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            with self._condition:
+                while not self._idle and self._total() >= self.size:
+                    if self._closed:
+                        raise RuntimeError("Driver session pool is closed")
+                    remaining = None if deadline is None else deadline - monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No browser session became free within {timeout} seconds")
+                    self._condition.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Driver session pool is closed")
+                if self._idle:
+                    driver = self._idle.popleft()
+                    self._leased.add(driver)
+                else:
+                    driver = None
+                    self._starting += 1
+            if driver is None:
+                return self._start_driver(self._leased.add)
+            if is_driver_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def release(self, driver):
+        """
+        release
+
+        Returns a leased session to the pool. The session is reset first; sessions that cannot be reset are dropped
+
+        :param driver: Driver previously returned by acquire
+        """
+        with self._condition:
+            if driver not in self._leased:
+                raise ValueError("Driver was not leased from this pool")
+            closed = self._closed
+        if not closed:
+            try:
+                reset_driver_state(driver)
+            except Exception as e:
+                _helper_log.warning("Could not reset browser session, dropping it. %s", e)
+                closed = True
+        if not closed:
+            with self._condition:
+                # close may have run while the session was being reset, and would never quit it from the idle list
+                closed = self._closed
+                if not closed:
+                    self._leased.discard(driver)
+                    self._idle.append(driver)
+                    self._condition.notify()
+        if closed:
+            self._discard(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        lease
+
+        Context manager wrapping acquire and release
+
+        :param timeout: Seconds to wait for a free session. None waits forever
+        """
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """
+        close
+
+        Quits every idle session. Sessions still leased out are quit when they are released
+        """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
+        for driver in idle:
+            _quit_quietly(driver)
+
+    def _total(self):
+        return len(self._idle) + len(self._leased) + self._starting
+
+    def _start_driver(self, store):
+        driver = None
+        try:
+            driver = self._driver_factory()
+            return driver
+        finally:
+            with self._condition:
+                self._starting -= 1
+                if driver is not None:
+                    store(driver)
+                self._condition.notify()
+
+    def _discard(self, driver):
+        with self._condition:
+            self._leased.discard(driver)
+            self._condition.notify()
+        _quit_quietly(driver)
+
+
+class DriverRecycler:
+    """
+    DriverRecycler
+
+    Keeps one browser going across many flows, and between flows swaps it for a fresh one once its process tree holds
+    more than max_rss_bytes of memory or it has been sent max_commands commands, before it slows down or crashes.
+    The cookies and local/session storage of the old browser are carried over, so the new one stays logged in.
+    Each recycle is recorded, see get_browser_recycle_metrics. Meant to be used from one thread.
+
+    Usage:
+        recycler = DriverRecycler(partial(setup_driver, 'chrome', profile='fast'))
+        for flow in flows:
+            flow(recycler.get_driver())
+            recycler.between_flows()
+        recycler.close()
+    """
+
+    def __init__(self, factory=None, max_rss_bytes=None, max_commands=None, carry_session=True):
+        """
+        :param factory: Callable returning a new driver. Defaults to setup_driver
+        :param max_rss_bytes: Resident bytes of the browser's process tree to recycle at. Defaults to
+            BROWSER_RECYCLE_MAX_RSS_BYTES. 0 turns the check off
+        :param max_commands: Commands sent to the browser to recycle at. Defaults to BROWSER_RECYCLE_MAX_COMMANDS.
+            0 turns the check off
+        :param carry_session: Carry cookies and storage over to the new browser
+        """
+        self.factory = factory or setup_driver
+        self.max_rss_bytes = BROWSER_RECYCLE_MAX_RSS_BYTES if max_rss_bytes is None else max_rss_bytes
+        self.max_commands = BROWSER_RECYCLE_MAX_COMMANDS if max_commands is None else max_commands
+        self.carry_session = carry_session
+        self.commands = 0
+        self.recycles = 0
+        self._driver = None
+
+    def get_driver(self):
+        """
+        get_driver
+
+        :return: The current browser, starting one if there is none or the last one has died
+        """
+        if self._driver is not None and not is_driver_healthy(self._driver):
+            self.discard()
+        if self._driver is None:
+            self._start()
+        return self._driver
+
+    def check(self):
+        """
+        check
+
+        :return: Why the browser is due for recycling, 'commands' or 'memory', None if it is not
+        """
+        if self._driver is None:
+            return None
+        if self.max_commands and self.commands >= self.max_commands:
+            return 'commands'
+        if self.max_rss_bytes:
+            rss = browser_rss_bytes(self._driver)
+            if rss is not None and rss >= self.max_rss_bytes:
+                return 'memory'
+        return None
+
+    def between_flows(self):
+        """
+        between_flows
+
+        Recycles the browser if it is due. Call between flows, never during one
+
+        :return: Why the browser was recycled, None if it was kept
+        """
+        reason = self.check()
+        if reason is not None:
+            self.recycle(reason)
+        return reason
+
+    def recycle(self, reason='requested'):
+        """
+        recycle
+
+        Quits the browser and starts a fresh one, carrying the session over
+
+        :param reason: Why the browser is recycled, for the metrics
+        :return: The new driver
+        """
+        start = monotonic()
+        old_driver = self._driver
+        rss = browser_rss_bytes(old_driver) if old_driver is not None else None
+        commands = self.commands
+        state = None
+        if old_driver is not None and self.carry_session:
+            try:
+                state = _capture_session_state(old_driver)
+            except Exception as e:
+                _helper_log.warning("Could not capture the session to carry over to the new browser. %s", e)
+        self.discard()
+        self._start()
+        if state is not None:
+            try:
+                _apply_session_state(self._driver, state)
+            except Exception as e:
+                _helper_log.warning("Could not carry the session over to the new browser. %s", e)
+        self.recycles += 1
+        _record_browser_recycle(reason, monotonic() - start, rss, commands)
+        return self._driver
+
+    def discard(self):
+        """
+        discard
+
+        Quits the current browser, if there is one. The next get_driver starts a new one
+        """
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            _quit_quietly(driver)
+
+    def close(self):
+        """
+        close
+
+        Quits the current browser
+        """
+        self.discard()
+
+    def _start(self):
+        driver = self.factory()
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.commands += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted_execute
+        self.commands = 0
+        self._driver = driver
+
+
+class ElementCache:
+    """
+    ElementCache
+
+    Bounded LRU of WebElements keyed by (strategy, locator), with hit and miss counters. One per driver, see
+    enable_element_cache.
+    """
+
+    def __init__(self, max_size=128):
+        """
+        :param max_size: Maximum number of elements kept, least recently used are evicted first
+        """
+        if max_size < 1:
+            raise ValueError(f"Cache size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._elements = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._elements
+
+    def get(self, key):
+        """
+        get
+
+        :param key: (strategy, locator) tuple
+        :return: The cached element or None, counting a hit or a miss
+        """
+        with self._lock:
+            element = self._elements.get(key)
+            if element is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._elements.move_to_end(key)
+            return element
+
+    def put(self, key, element):
+        """
+        put
+
+        :param key: (strategy, locator) tuple
+        :param element: WebElement found with that locator
+        """
+        with self._lock:
+            self._elements[key] = element
+            self._elements.move_to_end(key)
+            while len(self._elements) > self.max_size:
+                self._elements.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """
+        invalidate
+
+        :param key: (strategy, locator) tuple to drop. Drops everything if not given
+        """
+        with self._lock:
+            if key is None:
+                self._elements.clear()
+            else:
+                self._elements.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self):
+        """
+        stats
+
+        :return: Counters for the cache
+        :rtype: Dictionary
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                    'size': len(self._elements), 'max_size': self.max_size}
+
+class HelperLog:
+    """
+    HelperLog
+
+    Level gated logging for the helpers, on top of the logging module. A record below the level is dropped before
+    anything is formatted. Otherwise a LogRecord is made at call time, so it carries the time, thread and source line
+    of the helper, and handed through a QueueHandler to a QueueListener thread. The message is only built from its
+    %-style template and arguments when a handler of the logging tree formats it on that thread, so helpers do not
+    wait on formatting or log I/O. Records at or above sync_level, i.e warnings and errors, are handled straight away
+    after everything queued before them, and flush does the same for code that is about to log directly or read a
+    log file. Records repeated within one call, e.g one per row or per poll, are logged through a series from
+    repeated, which collapses them: the first and then every repeat_every-th are written, and ending the series notes
+    how many were left out. Each call has its own series, so concurrent helpers do not share counts.
+
+    Usage:
+        with _helper_log.repeated('rows') as rows:
+            for row in rows_read:
+                rows.info("Checking row %s", row)
+    """
+
+    def __init__(self, level=None, repeat_every=None, background=None, sync_level=logging.WARNING):
+        """
+        :param level: Lowest level written, as a name e.g 'DEBUG' or a number. Defaults to HELPER_LOG_LEVEL
+        :param repeat_every: Write one in this many of a repeated record. Defaults to HELPER_LOG_REPEAT_EVERY
+        :param background: Handle records on a background thread. Defaults to HELPER_LOG_IN_BACKGROUND
+        :param sync_level: Lowest level handled straight away rather than on the background thread
+        """
+        level = HELPER_LOG_LEVEL if level is None else level
+        self.level = level if isinstance(level, int) else logging.getLevelName(str(level).upper())
+        if not isinstance(self.level, int):
+            raise ValueError(f"Unknown log level {level}")
+        self.repeat_every = max(1, HELPER_LOG_REPEAT_EVERY if repeat_every is None else repeat_every)
+        self.background = HELPER_LOG_IN_BACKGROUND if background is None else background
+        self.sync_level = sync_level
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        self._queue_handler = _DeferredQueueHandler(self._queue)
+        self._listener = None
+
+    def is_enabled_for(self, level):
+        """
+        is_enabled_for
+
+        :param level: Log level e.g logging.INFO
+        :return: Whether records at the level are written. Check it before computing costly arguments
+        :rtype: Boolean
+        """
+        return level >= self.level
+
+    def debug(self, message, *args):
+        self._log(logging.DEBUG, message, args)
+
+    def info(self, message, *args):
+        self._log(logging.INFO, message, args)
+
+    def warning(self, message, *args):
+        self._log(logging.WARNING, message, args)
+
+    def error(self, message, *args):
+        self._log(logging.ERROR, message, args)
+
+    def log(self, level, message, *args):
+        """
+        log
+
+        :param level: Log level e.g logging.INFO
+        :param message: %-style template of the message
+        :param args: Arguments of the template, only formatted if the record is written
+        """
+        self._log(level, message, args)
+
+    def repeated(self, name):
+        """
+        repeated
+
+        Starts a series of records a call repeats, e.g one per row or per poll. End it, or use it as a context manager,
+        so the number of records left out is written.
+
+        :param name: What the records are about, used in the note ending the series
+        :return: The series, with the logging methods of HelperLog
+        :rtype: RepeatedRecords
+        """
+        return RepeatedRecords(self, name)
+
+    def flush(self):
+        """
+        flush
+
+        Blocks until every queued record has been handled
+        """
+        if self._listener is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        close
+
+        Handles everything queued and stops the background thread
+        """
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def _reset_after_fork(self):
+        # A forked child has none of the parent's threads. Records the parent queued are the parent's to write
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        self._queue_handler = _DeferredQueueHandler(self._queue)
+        self._listener = None
+
+    def _log(self, level, message, args, depth=2):
+        if level < self.level:
+            return
+        caller = sys._getframe(depth)
+        record = self.logger.makeRecord(self.logger.name, level, caller.f_code.co_filename, caller.f_lineno, message,
+                                        args, None, caller.f_code.co_name)
+        if not self.background or level >= self.sync_level:
+            self.flush()
+            self.logger.handle(record)
+            return
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = logging.handlers.QueueListener(self._queue, _LoggerHandler(self.logger))
+                    self._listener.start()
+                    atexit.register(self.close)
+        self._queue_handler.handle(record)
+
+
+class LocatorRegistry:
+    """
+    LocatorRegistry
+
+    Validated, deduplicated locator constants. A constant's strategy comes from the end of its name, see
+    LOCATOR_NAME_SUFFIXES, and a constant without a known suffix is taken as an XPath when it looks like a whole one.
+    A constant whose value does not suit its strategy is rejected. Constants with the same strategy and value share
+    one Locator, so duplicates across the ui_constants modules can be listed and cleaned up.
+    """
+
+    def __init__(self):
+        self._locators = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, value, by=None):
+        """
+        register
+
+        :param name: Name of the constant, e.g VCN_CREATE_DNS_HOSTNAMES_CHECKBOX_XPATH
+        :param value: Locator string
+        :param by: Strategy of the locator. Taken from the name or the value if not given
+        :return: The Locator, None if the constant is not a locator
+        :raises ValueError: If the value does not suit the strategy
+        """
+        if by is None:
+            by = next((strategy for suffix, strategy in LOCATOR_NAME_SUFFIXES if name.endswith(suffix)), None)
+        if by is None:
+            if _locator_problem('xpath', value) is not None:
+                return None
+            by = 'xpath'
+        problem = _locator_problem(by, value)
+        if problem:
+            raise ValueError(f"Locator constant {name} = {value!r} is not a valid {by} locator: {problem}")
+        with self._lock:
+            locator = self._locators.setdefault((by, value), Locator(by, value))
+            self._names.setdefault(locator, [])
+            if name not in self._names[locator]:
+                self._names[locator].append(name)
+            return locator
+
+    def register_module(self, module):
+        """
+        register_module
+
+        Validates every locator constant of a ui_constants module
+
+        :param module: Module or module name
+        :return: Locators of the module by constant name
+        :rtype: Dictionary
+        :raises ValueError: Listing every constant of the module that is not a valid locator
+        """
+        if isinstance(module, str):
+            module = import_module(module)
+        locators = {}
+        problems = []
+        for name, value in vars(module).items():
+            if not name.isupper() or not isinstance(value, str):
+                continue
+            try:
+                locator = self.register(name, value)
+            except ValueError as e:
+                problems.append(str(e))
+                continue
+            if locator is not None:
+                locators[name] = locator
+        if problems:
+            raise ValueError(f"Invalid locators in {module.__name__}: " + "; ".join(problems))
+        return locators
+
+    def get(self, name):
+        """
+        get
+
+        :param name: Name of a registered constant
+        :return: Its Locator, None if no constant of that name is registered
+        """
+        with self._lock:
+            return next((locator for locator, names in self._names.items() if name in names), None)
+
+    def duplicates(self):
+        """
+        duplicates
+
+        :return: Names of the constants sharing a locator, by locator
+        :rtype: Dictionary
+        """
+        with self._lock:
+            return {locator: list(names) for locator, names in self._names.items() if len(names) > 1}
+
+
+class PageSnapshot:
+    """
+    PageSnapshot
+
+    Parsed copy of a page's DOM for read only checks, e.g verifying the fields of a details page. Queries run
+    locally against the copy. The page counts DOM mutations from the moment the snapshot is taken, so is_stale can
+    tell in one cheap round trip whether the copy still matches the page. live_elements hands back the matching live
+    elements when an interaction is needed.
+
+    Text is the element's text content, which unlike WebElement.text includes text the page hides.
+
+    get_texts_by_xpath and wait_for_by_xpath_then_get_text read from a snapshot when given one. The snapshot is not
+    checked for staleness on each read, call refresh_if_stale once before a batch of reads. Helpers handing back
+    WebElements, e.g get_elements_by_xpath, and the list lookups, iter_list_rows and find_list_row, which read a
+    whole page in one batched call and keep the live name elements for clicking, stay on the live page.
+
+    Usage:
+        snapshot = take_page_snapshot(driver)
+        assert snapshot.text(STATE_XPATH) == "Available"
+        ocids = snapshot.texts(OCID_OF_LIST_ITEM_XPATH)
+        name = wait_for_by_xpath_then_get_text(driver, NAME_XPATH, snapshot=snapshot)
+    """
+
+    def __init__(self, driver):
+        """
+        :param driver: Webdriver for the browser
+        """
+        self.driver = driver
+        self.refresh()
+
+    def refresh(self):
+        """
+        refresh
+
+        Fetches and parses the page again
+        """
+        try:
+            from lxml import html as lxml_html
+        except ImportError as e:
+            raise ImportError("Page snapshots are parsed with the lxml package, pip install lxml") from e
+
+        start = monotonic()
+        page = self.driver.execute_script(_PAGE_SNAPSHOT_SCRIPT)
+        self.url = page['url']
+        self.version = page['version']
+        self.tree = lxml_html.document_fromstring(page['html'])
+        _helper_log.info("Snapshot of %s taken in %.2f seconds", self.url, monotonic() - start)
+
+    def is_stale(self):
+        """
+        is_stale
+
+        :return: Whether the page has changed or navigated away since the snapshot was taken
+        :rtype: Boolean
+        """
+        return self.driver.execute_script(_PAGE_VERSION_SCRIPT) != self.version
+
+    def refresh_if_stale(self):
+        """
+        refresh_if_stale
+
+        :return: Whether the snapshot was stale and had to be refreshed
+        :rtype: Boolean
+        """
+        if not self.is_stale():
+            return False
+        _helper_log.info("Snapshot of %s is stale, taking it again", self.url)
+        self.refresh()
+        return True
+
+    def xpath(self, xpath):
+        """
+        xpath
+
+        :param xpath: Xpath string, which may select text and attribute nodes, or Locator, see _xpath_of
+        :return: Matching nodes of the snapshot. Elements, strings for text and attribute nodes
+        :rtype: List
+        """
+        return self.tree.xpath(xpath if isinstance(xpath, str) else _xpath_of(xpath))
+
+    def texts(self, xpath):
+        """
+        texts
+
+        :param xpath: Xpath string or Locator
+        :return: Stripped text of every match, in document order
+        :rtype: List of strings
+        """
+        return [(node if isinstance(node, str) else node.text_content()).strip() for node in self.xpath(xpath)]
+
+    def text(self, xpath):
+        """
+        text
+
+        :param xpath: Xpath string or Locator
+        :return: Stripped text of the first match, None if nothing matches
+        :rtype: String
+        """
+        texts = self.texts(xpath)
+        return texts[0] if texts else None
+
+    def attributes(self, xpath, name):
+        """
+        attributes
+
+        :param xpath: Xpath string or Locator of elements
+        :param name: Attribute name
+        :return: Value of the attribute on every match, None where it is missing
+        :rtype: List
+        """
+        return [node.get(name) for node in self.xpath(xpath) if not isinstance(node, str)]
+
+    def count(self, xpath):
+        """
+        count
+
+        :param xpath: Xpath string or Locator
+        :return: Number of matches
+        :rtype: Integer
+        """
+        return len(self.xpath(xpath))
+
+    def exists(self, xpath):
+        """
+        exists
+
+        :param xpath: Xpath string or Locator
+        :return: Whether anything matches
+        :rtype: Boolean
+        """
+        return bool(self.xpath(xpath))
+
+    def live_elements(self, xpath):
+        """
+        live_elements
+
+        Finds the matches on the live page, for when they need to be clicked or typed into. The XPath is used as it is
+        rather than rewritten to CSS, so the live matches are the ones the snapshot queries found.
+
+        :param xpath: Xpath string or Locator of elements
+        :return: WebElement objects
+        :rtype: List
+        """
+        return self.driver.find_elements(By.XPATH, _xpath_of(xpath))
+
+    def live_element(self, xpath):
+        """
+        live_element
+
+        :param xpath: Xpath string or Locator of an element
+        :return: First match on the live page, see live_elements
+        :rtype: WebElement
+        """
+        return self.driver.find_element(By.XPATH, _xpath_of(xpath))
+
+
+class ReplayCommandExecutor:
+    """
+    ReplayCommandExecutor
+
+    Command executor for a replay driver. Answers each command with the next response of the trace, checking the
+    flow sends the same commands in the same order as when it was recorded. Keeps a clock that follows the recorded
+    timings, which waits on the replay driver run on.
+    """
+
+    def __init__(self, trace, realtime=False, check_params=False):
+        """
+        :param trace: Trace written by record_commands
+        :param realtime: Take as long as the recorded commands did
+        :param check_params: Also check each command's parameters against the recorded ones
+        """
+        self.w3c = trace['w3c']
+        self.capabilities = trace['capabilities']
+        self.commands = trace['commands']
+        self.realtime = realtime
+        self.check_params = check_params
+        self.position = 0
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def execute(self, command, params):
+        """
+        execute
+
+        :param command: Name of the WebDriver command
+        :param params: Parameters of the command
+        :return: The recorded response
+        :raises ValueError: If the command is not the one recorded next
+        """
+        if command == 'newSession':
+            response = {'sessionId': 'replay', 'value': dict(self.capabilities or {})}
+            if not self.w3c:
+                response['status'] = 0
+            return response
+        with self._lock:
+            if self.position >= len(self.commands):
+                if command == 'quit':
+                    return {'value': None}
+                raise ValueError(f"Replay ran past the end of the trace with command {command}")
+            recorded, recorded_params, response, sent, duration = self.commands[self.position]
+            if command != recorded:
+                raise ValueError(f"Replay diverged from the trace at command {self.position}: "
+                                 f"sent {command}, recorded {recorded}")
+            params = {key: value for key, value in (params or {}).items() if key != 'sessionId'}
+            if self.check_params and json.loads(json.dumps(params)) != recorded_params:
+                raise ValueError(f"Replay diverged from the trace at command {self.position}: {command} sent with "
+                                 f"{params}, recorded with {recorded_params}")
+            self.position += 1
+            self.now = max(self.now, sent + duration)
+        if self.realtime:
+            sleep(duration)
+        return json.loads(json.dumps(response))
+
+    def monotonic(self):
+        """
+        monotonic
+
+        :return: Seconds on the replay clock
+        """
+        return self.now
+
+    def sleep(self, seconds):
+        """
+        sleep
+
+        Moves the replay clock on without waiting
+
+        :param seconds: Seconds to move the clock by
+        """
+        with self._lock:
+            self.now += seconds
+
+
+class RestFixtures:
+    """
+    RestFixtures
+
+    Provisions the prerequisites of a UI test over REST and tears them down again, so only the UI under test is
+    driven through the browser. Resources are torn down in the reverse order they were created when the context
+    exits. A failed teardown is logged and the remaining teardowns still run.
+
+    Usage:
+        with RestFixtures() as fixtures:
+            compartment = fixtures.provision(rest.create_compartment, name, parent_id, delete=rest.delete_compartment)
+            ... drive the UI under test ...
+    """
+
+    def __init__(self):
+        self._teardowns = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.teardown()
+
+    def provision(self, create, *args, delete=None, teardown_args=None, **kwargs):
+        """
+        provision
+
+        Creates a resource and registers its teardown
+
+        :param create: Callable creating the resource, called with args and kwargs
+        :param delete: Callable deleting it. Called with teardown_args if given, otherwise with the created resource
+        :param teardown_args: Arguments for delete, as a tuple
+        :return: Whatever create returned
+        """
+        _helper_log.info("Provisioning prerequisite with %s over REST", getattr(create, '__name__', create))
+        resource = create(*args, **kwargs)
+        get_rest_lookup_cache().invalidate()
+        if delete is not None:
+            self._teardowns.append((delete, teardown_args if teardown_args is not None else (resource,)))
+        return resource
+
+    def teardown(self):
+        """
+        teardown
+
+        Deletes everything provisioned so far, newest first
+        """
+        while self._teardowns:
+            delete, teardown_args = self._teardowns.pop()
+            _helper_log.info("Tearing down prerequisite with %s over REST", getattr(delete, '__name__', delete))
+            try:
+                delete(*teardown_args)
+            except Exception as e:
+                _helper_log.error("Failed to tear down prerequisite with %s. %s",
+                                  getattr(delete, '__name__', delete), e)
+        get_rest_lookup_cache().invalidate()
+
+
+class RetryPolicy:
+    """
+    RetryPolicy
+
+    Decides which failed interactions the helpers retry and how long they back off in between. Failures are
+    classified as stale, intercepted, not_interactable, timeout or missing, and only the kinds in retry_on are
+    retried. The backoff grows exponentially from base_delay up to max_delay and each delay is drawn at random from
+    its upper part, so sessions retrying against the same page do not fall into step.
+
+    Usage:
+        set_retry_policy(RetryPolicy(retry_on=('stale', 'intercepted'), max_attempts=3))
+    """
+    KINDS = ('stale', 'intercepted', 'not_interactable', 'timeout', 'missing')
+
+    def __init__(self, retry_on=('stale', 'intercepted', 'not_interactable'), max_attempts=None, base_delay=None,
+                 max_delay=None, jitter=0.5):
+        """
+        :param retry_on: Kinds of failure to retry. A timeout has already used up its wait, and a missing element
+            is retried only by helpers that wait for it
+        :param max_attempts: Attempts per interaction, including the first. Defaults to RETRY_MAX_ATTEMPTS
+        :param base_delay: Backoff before the first retry, in seconds. Defaults to RETRY_BASE_DELAY
+        :param max_delay: Longest backoff, in seconds. Defaults to RETRY_MAX_DELAY
+        :param jitter: Fraction of each backoff that is randomised, between 0 and 1
+        """
+        unknown = set(retry_on) - set(self.KINDS)
+        if unknown:
+            raise ValueError(f"Unknown kinds of failure {sorted(unknown)}. Known kinds are {list(self.KINDS)}")
+        self.retry_on = frozenset(retry_on)
+        self.max_attempts = RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.jitter = jitter
+
+    def backoff(self, attempt):
+        """
+        backoff
+
+        :param attempt: Number of attempts made so far
+        :return: Seconds to wait before the next attempt
+        :rtype: Float
+        """
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter * random.random())
+
+    @staticmethod
+    def classify(error):
+        """
+        classify
+
+        :param error: Exception raised by an interaction
+        :return: Kind of failure, None if the error is not one the policy knows how to handle
+        :rtype: String
+        """
+        if isinstance(error, _exceptions.StaleElementReferenceException):
+            return 'stale'
+        if isinstance(error, _exceptions.ElementClickInterceptedException):
+            return 'intercepted'
+        if isinstance(error, _exceptions.InvalidElementStateException):
+            return 'not_interactable'
+        if isinstance(error, _exceptions.TimeoutException):
+            return 'timeout'
+        if isinstance(error, _exceptions.NoSuchElementException):
+            return 'missing'
+        if isinstance(error, _exceptions.WebDriverException) and 'would receive the click' in (error.msg or ''):
+            return 'intercepted'
+        return None
+
+    def should_retry(self, kind, attempt, extra_kinds=()):
+        """
+        should_retry
+
+        :param kind: Kind of failure, see classify
+        :param attempt: Number of attempts made so far
+        :param extra_kinds: Further kinds the calling helper retries, e.g missing for a helper that waits
+        :return: Whether the interaction should be attempted again
+        :rtype: Boolean
+        """
+        return (kind in self.retry_on or kind in extra_kinds) and attempt < self.max_attempts
+
+
+class RouteCache:
+    """
+    RouteCache
+
+    Page title to path routes learnt by launch_menu, kept per scope, i.e console origin plus tenancy and region. With
+    a path they are kept in a small JSON file so they carry over between runs. Every change is merged into what is
+    on disk at the time, so runs sharing the file keep each other's routes. A missing or unreadable file is treated
+    as empty.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: JSON file the routes are kept in. Without one they are only kept in memory
+        """
+        self.path = path
+        self._routes = None
+        self._lock = threading.Lock()
+
+    def get(self, scope, title):
+        """
+        get
+
+        :param scope: Scope of the route, see _route_scope
+        :param title: Page title
+        :return: Path remembered for the page, None if there is none
+        """
+        with self._lock:
+            if self._routes is None:
+                self._routes = self._read()
+            return self._routes.get(scope, {}).get(title)
+
+    def remember(self, scope, title, route):
+        """
+        remember
+
+        :param scope: Scope of the route
+        :param title: Page title
+        :param route: Path, without the query string, that showed the page
+        """
+        if self.get(scope, title) != route:
+            _helper_log.info("Remembering %s as the route to %s", route, title)
+            self._update(lambda routes: routes.setdefault(scope, {}).update({title: route}))
+
+    def forget(self, scope, title):
+        """
+        forget
+
+        :param scope: Scope of the route
+        :param title: Page title
+        """
+        self._update(lambda routes: routes.get(scope, {}).pop(title, None))
+
+    def clear(self):
+        """
+        clear
+
+        Forgets every route
+        """
+        self._update(lambda routes: routes.clear())
+
+    def _read(self):
+        if self.path is None:
+            return self._routes or {}
+        try:
+            with open(self.path, encoding='utf-8') as routes_in:
+                routes = json.load(routes_in)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            _helper_log.warning("Could not read the route cache %s, starting it afresh. %s", self.path, e)
+            return {}
+        return routes if isinstance(routes, dict) else {}
+
+    def _update(self, change):
+        with self._lock:
+            routes = self._read()
+            change(routes)
+            self._routes = routes
+            if self.path is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                                     suffix='.tmp')
+                with os.fdopen(handle, 'w', encoding='utf-8') as routes_out:
+                    json.dump(routes, routes_out, indent=1, sort_keys=True)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                _helper_log.warning("Could not save the route cache %s. %s", self.path, e)
+
+
+class ScreenshotWriter:
+    """
+    ScreenshotWriter
+
+    Captures screenshots as PNG bytes and writes them to disk on a background thread, so helpers only pay for the
+    capture round trip. Files get unique names, frames identical to one already written are skipped, and the oldest
+    files are deleted once max_total_bytes is exceeded. Optionally keeps the last ring_size frames in memory so they
+    can be written out when something fails.
+    """
+
+    def __init__(self, directory='.', max_total_bytes=500 * 1024 * 1024, ring_size=0):
+        """
+        :param directory: Directory to write screenshots to
+        :param max_total_bytes: Cap on the disk used by the screenshots. The oldest are deleted to stay under it
+        :param ring_size: Number of recent frames to keep in memory for dump_ring. 0 disables the ring buffer
+        """
+        self.directory = directory
+        self.max_total_bytes = max_total_bytes
+        self.ring = deque(maxlen=ring_size) if ring_size else None
+        self.total_bytes = 0
+        self._written = deque()
+        self._paths_by_digest = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        self._thread = None
+
+    def capture(self, driver, name='screenshot'):
+        """
+        capture
+
+        Takes a screenshot and queues it to be written
+
+        :param driver: Webdriver for the browser
+        :param name: Name of the screenshot, used as the stem of the unique file name
+        :return: Path the screenshot will be written to, or the path of an identical earlier screenshot
+        """
+        png = driver.get_screenshot_as_png()
+        self.record(name, png)
+        return self.submit(name, png)
+
+    def record(self, name, png):
+        """
+        record
+
+        Keeps a frame in the in-memory ring buffer, if there is one, without writing it
+
+        :param name: Name of the frame
+        :param png: PNG bytes of the frame
+        """
+        if self.ring is not None:
+            with self._lock:
+                self.ring.append((name, png))
+
+    def submit(self, name, png):
+        """
+        submit
+
+        Queues PNG bytes to be written under a unique file name
+
+        :param name: Name of the screenshot, used as the stem of the unique file name
+        :param png: PNG bytes of the screenshot
+        :return: Path the screenshot will be written to, or the path of an identical earlier screenshot
+        """
+        digest = hashlib.sha1(png).hexdigest()
+        stem = re.sub(r'[^\w.-]', '_', os.path.splitext(os.path.basename(name))[0]) or 'screenshot'
+        with self._lock:
+            existing = self._paths_by_digest.get(digest)
+            if existing is not None:
+                _helper_log.info("Screenshot %s is identical to %s, not writing it again", name, existing)
+                return existing
+            self._sequence += 1
+            path = os.path.join(self.directory, f"{stem}-{os.getpid()}-{int(time() * 1000)}-{self._sequence:04d}.png")
+            self._paths_by_digest[digest] = path
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_queued, name='screenshot-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._queue.put((path, digest, png))
+        return path
+
+    def dump_ring(self, reason='failure'):
+        """
+        dump_ring
+
+        Writes out, and empties, the frames held in the ring buffer
+
+        :param reason: Prefix for the file names of the frames
+        :return: Paths the frames will be written to
+        :rtype: List of strings
+        """
+        if self.ring is None:
+            return []
+        with self._lock:
+            frames = list(self.ring)
+            self.ring.clear()
+        return [self.submit(f"{reason}-{name}", png) for name, png in frames]
+
+    def flush(self):
+        """
+        flush
+
+        Blocks until every queued screenshot has been written
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        close
+
+        Writes out everything queued and stops the background thread
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _reset_after_fork(self):
+        # A forked child has none of the parent's threads. Screenshots the parent queued are the parent's to write
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        self._thread = None
+
+    def _write_queued(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, digest, png):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'wb') as screenshot:
+                screenshot.write(png)
+        except OSError as e:
+            _helper_log.error("Could not write screenshot %s. %s", path, e)
+            with self._lock:
+                self._paths_by_digest.pop(digest, None)
+            return
+        with self._lock:
+            self._written.append((path, digest, len(png)))
+            self.total_bytes += len(png)
+            evicted = []
+            while self.total_bytes > self.max_total_bytes and len(self._written) > 1:
+                old_path, old_digest, size = self._written.popleft()
+                self.total_bytes -= size
+                self._paths_by_digest.pop(old_digest, None)
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError as e:
+                _helper_log.warning("Could not remove old screenshot %s. %s", old_path, e)
+
+
+class TtlCache:
+    """
+    TtlCache
+
+    Thread safe memo of loaded values that expire after ttl_seconds, with hit and miss counters. Concurrent loads
+    of the same key are not deduplicated; the last one to finish wins. Expired values are dropped as new ones are
+    stored, and the oldest values make way once max_size are held.
+    """
+
+    def __init__(self, ttl_seconds=300, max_size=1024):
+        """
+        :param ttl_seconds: How long a loaded value is served before it is loaded again
+        :param max_size: Most values held at once
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """
+        get_or_load
+
+        :param key: Hashable key of the value
+        :param loader: Callable with no arguments loading the value when it is missing or expired
+        :return: The cached or freshly loaded value
+        """
+        now = monotonic()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader()
+        now = monotonic()
+        with self._lock:
+            # Values all live for ttl_seconds, so storing them last keeps the dict in the order they expire in
+            self._values.pop(key, None)
+            self._values[key] = (now + self.ttl_seconds, value)
+            self._prune(now)
+        return value
+
+    def invalidate(self, predicate=None):
+        """
+        invalidate
+
+        :param predicate: Callable taking a key, returning True for keys to drop. Drops everything if not given
+        """
+        with self._lock:
+            if predicate is None:
+                self._values.clear()
+            else:
+                for key in [key for key in self._values if predicate(key)]:
+                    del self._values[key]
+
+    def stats(self):
+        """
+        stats
+
+        :return: Counters for the cache
+        :rtype: Dictionary
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._values), 'ttl_seconds': self.ttl_seconds}
+
+    def _prune(self, now):
+        values = self._values
+        while values:
+            oldest = next(iter(values))
+            if values[oldest][0] > now and len(values) <= self.max_size:
+                return
+            del values[oldest]
+
+
+class _HelperCall:
+    """
+    _HelperCall
+
+    Counters for one instrumented helper call in progress
+    """
+    __slots__ = ('wait_seconds', 'commands', 'retries', 'retry_kinds', 'polls')
+
+    def __init__(self):
+        self.wait_seconds = 0.0
+        self.commands = 0
+        self.retries = 0
+        self.retry_kinds = {}
+        self.polls = 0
+
+
+class RepeatedRecords:
+    """
+    RepeatedRecords
+
+    Series of records repeated within one call, see HelperLog.repeated. Of the records logged through it, the first and
+    then every repeat_every-th of the log are written, the latter noting how many times the record was seen.
+    """
+
+    def __init__(self, helper_log, name):
+        """
+        :param helper_log: HelperLog to write the records to
+        :param name: What the records are about, used in the note ending the series
+        """
+        self.helper_log = helper_log
+        self.name = name
+        self.seen = 0
+        self.left_out = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._end(logging.INFO)
+
+    def debug(self, message, *args):
+        self._log(logging.DEBUG, message, args)
+
+    def info(self, message, *args):
+        self._log(logging.INFO, message, args)
+
+    def warning(self, message, *args):
+        self._log(logging.WARNING, message, args)
+
+    def end(self, level=logging.INFO):
+        """
+        end
+
+        Ends the series, writing how many of its records were left out if any were
+
+        :param level: Log level of the note
+        """
+        self._end(level)
+
+    def _end(self, level):
+        if self.left_out:
+            self.helper_log._log(level, "Left out %d of %d records for %s", (self.left_out, self.seen, self.name),
+                                 depth=3)
+        self.seen = self.left_out = 0
+
+    def _log(self, level, message, args):
+        if not self.helper_log.is_enabled_for(level):
+            return
+        self.seen += 1
+        if self.seen > 1 and self.seen % self.helper_log.repeat_every:
+            self.left_out += 1
+            return
+        if self.seen > 1:
+            message, args = f"{message} (seen %d times)", args + (self.seen,)
+        self.helper_log._log(level, message, args, depth=3)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    _DeferredQueueHandler
+
+    QueueHandler that queues records as they are, leaving the formatting to the handlers behind the QueueListener
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _LoggerHandler(logging.Handler):
+    """
+    _LoggerHandler
+
+    Hands the records a QueueListener takes off the queue to a logger's handlers and those of its ancestors
+    """
+
+    def __init__(self, logger):
+        """
+        :param logger: Logger to hand the records to
+        """
+        super().__init__()
+        self.logger = logger
+
+    def handle(self, record):
+        self.logger.handle(record)
+        return True
+
+
+def _act_on_element(driver, by, locator, action, element=None):
+    """
+    _act_on_element
+
+    Runs an action on an element found through the element cache, under the retry policy. The element is looked up
+    again for every retry, and a stale element is dropped from the cache first. A cached element that has gone stale,
+    e.g after a navigation the cache did not see, is looked up again straight away without counting as a retry.
+
+    :param driver: Webdriver controller for the web page
+    :param by: Strategy of a locator given as a string
+    :param locator: Locator of the element, see _normalize_locator
+    :param action: Callable taking the element
+    :param element: Element to make the first attempt on, e.g one a wait returned, saving the lookup
+    :return: Whatever the action returns
+    """
+    return _run_steps(driver, _act_on_element_steps(driver, by, locator, action, element))
+
+def _apply_session_state(driver, state, landing_path='/favicon.ico'):
+    """
+    _apply_session_state
+
+    Loads cookies and local/session storage captured by _capture_session_state into a driver, then opens the page
+    they were captured on
+
+    :param driver: Webdriver for the browser
+    :param state: Captured session state
+    :param landing_path: Light page on the console's origin to open while the cookies and storage are set
+    """
+    invalidate_element_cache(driver)
+    driver.get(state['origin'] + landing_path)
+    driver.delete_all_cookies()
+    now = time()
+    for cookie in state['cookies']:
+        if cookie.get('expiry') is not None and cookie['expiry'] <= now:
+            continue
+        driver.add_cookie({key: value for key, value in cookie.items()
+                           if key in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')})
+    driver.execute_script(_WRITE_STORAGE_SCRIPT, state['local_storage'], state['session_storage'])
+    driver.get(state['url'])
+
+def _active_helper_calls():
+    """
+    _active_helper_calls
+
+    :return: Stack of the instrumented helper calls in progress on this thread, outermost first
+    :rtype: List of _HelperCall
+    """
+    calls = getattr(_helper_calls, 'stack', None)
+    if calls is None:
+        calls = _helper_calls.stack = []
+    return calls
+
+def _capture_failure(driver, name):
+    """
+    _capture_failure
+
+    Writes out the ring buffer and a screenshot of the current page when a helper fails. Never raises, so the
+    original failure is what gets reported.
+
+    :param driver: Webdriver for the browser
+    :param name: Name of the failure, used as the stem of the screenshot file names
+    """
+    writer = get_screenshot_writer()
+    try:
+        writer.dump_ring(name)
+        path = writer.capture(driver, name)
+        _helper_log.error("Failure screenshot saved to %s", path)
+    except Exception as e:
+        _helper_log.warning("Could not take failure screenshot %s. %s", name, e)
+
+def _capture_session_state(driver):
+    """
+    _capture_session_state
+
+    :param driver: Webdriver for the browser, on a console page
+    :return: Page URL and origin, cookies and local/session storage of the driver
+    :rtype: Dictionary
+    :raises ValueError: If the driver is not on a page served over HTTP
+    """
+    url = driver.current_url
+    origin = _url_origin(url)
+    if origin is None:
+        raise ValueError(f"Open a console page before capturing the session, the driver is on {url}")
+    storage = driver.execute_script(_READ_STORAGE_SCRIPT)
+    return {'url': url, 'origin': origin, 'cookies': driver.get_cookies(), 'local_storage': storage['local'],
+            'session_storage': storage['session']}
+
+@lru_cache(maxsize=2048)
+def _checked_locator(by, value, rewrite_xpath):
+    """
+    _checked_locator
+
+    Memoized validation and rewriting behind _normalize_locator
+
+    :param by: Locator strategy
+    :param value: Locator string
+    :param rewrite_xpath: Rewrite XPath into CSS where possible
+    :return: Locator
+    :raises ValueError: If the locator does not suit its strategy
+    """
+    problem = _locator_problem(by, value)
+    if problem:
+        raise ValueError(f"Invalid {by} locator {value!r}: {problem}")
+    if by == 'xpath' and rewrite_xpath:
+        css = xpath_to_css(value)
+        if css is not None:
+            return Locator('css selector', css)
+    return Locator(by, value)
+
+def _click_once(driver, by, locator):
+    """
+    _click_once
+
+    Single click attempt, retried by the click helpers under the retry policy
+
+    :param driver: Webdriver controller for the web page
+    :param by: Strategy of a locator given as a string
+    :param locator: Locator of the element to click, see _normalize_locator
+    :return: True once the click went through
+    """
+    driver.find_element(*_normalize_locator(locator, by)).click()
+    return True
+
+def _click_compartment_item(driver, list_xpath, path, index):
+    """
+    _click_compartment_item
+
+    Clicks a compartment in the opened compartment dropdown
+
+    :param driver: Webdriver for the browser
+    :param list_xpath: Xpath of the dropdown items
+    :param path: Full path of the compartment
+    :param index: CompartmentIndex locating the item by path. Without one the first item named like the compartment
+        is clicked
+    :return: True once clicked, False if the list does not have the compartment
+    :rtype: Boolean
+    """
+    position = None
+    if index is not None:
+        position = index.position(path, driver.execute_script(_LIST_ITEM_NAMES_SCRIPT, list_xpath))
+        if position is None:
+            return False
+    return driver.execute_script(_CLICK_LIST_ITEM_SCRIPT, list_xpath, path[-1], position)
+
+def _condition_to_css(condition, tag, position_allowed):
+    """
+    _condition_to_css
+
+    :param condition: Match of _XPATH_CONDITION for one condition of an XPath predicate
+    :param tag: Tag name of the step the predicate belongs to
+    :param position_allowed: Whether a position condition keeps its meaning in CSS, i.e it is the whole first predicate
+    :return: CSS for the condition, None if it has none
+    """
+    def quoted(literal):
+        value = literal[1:-1].replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{value}"'
+
+    if condition.group('position'):
+        if not position_allowed:
+            return None
+        kind = 'child' if tag == '*' else 'of-type'
+        if condition.group('position').startswith('last'):
+            return f":last-{kind}"
+        return f":nth-{kind}({condition.group('position')})"
+    class_token = condition.group('class_token') or condition.group('class_token2')
+    if class_token:
+        return f".{class_token}" if re.fullmatch(r'-?[A-Za-z_][\w-]*', class_token) else f'[class~="{class_token}"]'
+    if condition.group('function'):
+        if len(condition.group('function_value')) == 2:
+            # Every string contains and starts with '', while CSS matches no element on an empty substring
+            return None
+        operator = '*=' if condition.group('function') == 'contains' else '^='
+        return f"[{condition.group('function_attribute')}{operator}{quoted(condition.group('function_value'))}]"
+    if condition.group('equals_attribute'):
+        attribute, value = condition.group('equals_attribute'), condition.group('equals_value')
+        if attribute == 'id' and re.fullmatch(r'[A-Za-z_][\w-]*', value[1:-1]):
+            return f"#{value[1:-1]}"
+        return f"[{attribute}={quoted(value)}]"
+    return f"[{condition.group('attribute')}]"
+
+def _count_driver_commands(driver):
+    """
+    _count_driver_commands
+
+    Wraps the driver's execute method, which every WebDriver and WebElement command goes through, so commands are
+    counted against the instrumented helper calls in progress. Only done once per driver.
+
+    :param driver: Webdriver for the browser
+    """
+    if getattr(driver, '_base_ui_commands_counted', False) or not hasattr(driver, 'execute'):
+        return
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        for call in _active_helper_calls():
+            call.commands += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    driver._base_ui_commands_counted = True
+
+def _driver_clock(driver):
+    """
+    _driver_clock
+
+    :param driver: Webdriver controller for the web page
+    :return: Clock and sleep functions for waits on the driver. Replay drivers wait on the trace's clock
+    :rtype: Tuple
+    """
+    replay = getattr(driver, '_base_ui_replay', None)
+    if replay is None or replay.realtime:
+        return monotonic, sleep
+    return replay.monotonic, replay.sleep
+
+def _export_helper_metrics_at_exit():
+    """
+    _export_helper_metrics_at_exit
+
+    Writes the helper metrics to the export path last given to enable_helper_instrumentation
+    """
+    if _helper_metrics_export_path is not None:
+        export_helper_metrics(_helper_metrics_export_path)
+
+def _fill_form_fields(driver, specs, polls):
+    """
+    _fill_form_fields
+
+    wait_until condition for fill_form. Fills nothing until every field is present, then fills them all
+
+    :param driver: Webdriver controller for the web page
+    :param specs: Strategy, locator, value and keystroke flag of each field
+    :param polls: RepeatedRecords the polls log missing fields to
+    :return: Per field result from the page, or None while fields are missing
+    """
+    response = driver.execute_script(_FILL_FORM_SCRIPT, specs)
+    if response['missing']:
+        polls.info("Form fields not present yet: %s", response['missing'])
+        return None
+    return response['results']
+
+def _field(record, name):
+    """
+    _field
+
+    :param record: Object or dictionary returned by a REST call
+    :param name: Field to read
+    :return: The field's value, None if it is missing
+    """
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name, None)
+
+def _find_element(driver, by, locator, verify_cached=False):
+    """
+    _find_element
+
+    Finds an element, going through the driver's element cache if it has one
+
+    :param driver: Webdriver controller for the web page
+    :param by: Strategy of a locator given as a string
+    :param locator: Locator of the element, see _normalize_locator
+    :param verify_cached: Check a cached element is still attached to the page before returning it. Needed when the
+        element is handed to the caller, as a click that navigated leaves the cache holding stale elements. Helpers
+        acting on the element themselves skip the check and look the element up again if the action finds it stale
+    :return: WebElement object
+    """
+    by, locator = _normalize_locator(locator, by)
+    cache = _element_caches.get(driver)
+    if cache is None:
+        return driver.find_element(by, locator)
+    key = (by, locator)
+    element = cache.get(key)
+    if element is not None and verify_cached:
+        try:
+            element.is_enabled()
+        except _exceptions.StaleElementReferenceException:
+            cache.invalidate(key)
+            element = None
+    if element is None:
+        element = driver.find_element(by, locator)
+        cache.put(key, element)
+    return element
+
+def _flow_name(flow):
+    """
+    _flow_name
+
+    :param flow: Flow callable
+    :return: Name identifying the flow in results and duration history
+    """
+    return f"{flow.__module__}.{getattr(flow, '__qualname__', repr(flow))}"
+
+def _get_async_command_pool():
+    """
+    _get_async_command_pool
+
+    :return: The thread pool AsyncUiSession runs WebDriver commands on, created with the
+        configure_async_command_pool defaults if needed
+    :rtype: ThreadPoolExecutor
+    """
+    global _async_command_pool
+    with _async_command_pool_lock:
+        if _async_command_pool is None:
+            _async_command_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='webdriver-command')
+        return _async_command_pool
+
+def _get_current_url(driver):
+    """
+    _get_current_url
+
+    :param driver: Webdriver for the browser
+    :return: URL of the current page
+    """
+    return driver.current_url
+
+def _get_title(driver):
+    """
+    _get_title
+
+    :param driver: Webdriver for the browser
+    :return: Title of the current page
+    """
+    return driver.title
+
+def _close_flow_worker_writers():
+    """
+    _close_flow_worker_writers
+
+    Writes out the records and screenshots a run_flows_in_parallel worker still has queued, as the worker exits
+    """
+    _helper_log.close()
+    if _screenshot_writer is not None:
+        _screenshot_writer.close()
+
+def _init_flow_worker(browser, headless, profile, started=None):
+    """
+    _init_flow_worker
+
+    Initializer for run_flows_in_parallel workers. The browser is started on the first flow, recycled between flows
+    when it grows past the DriverRecycler thresholds, and quit when the worker process exits.
+
+    :param browser: Browser to use e.g chrome, firefox, ie.
+    :param headless: Run the browser without a window
+    :param profile: Driver profile, see setup_driver
+    :param started: Queue the worker puts the index of each flow and its pid on as it starts the flow
+    """
+    from multiprocessing.util import Finalize
+
+    recycler = DriverRecycler(partial(setup_driver, browser, headless=headless, profile=profile), carry_session=False)
+    _flow_worker_state.update(browser=browser, headless=headless, profile=profile, recycler=recycler,
+                              started=started)
+    Finalize(None, _quit_flow_worker_driver, exitpriority=10)
+    # Workers leave through os._exit, which skips atexit, so the log and screenshot threads are stopped here
+    Finalize(None, _close_flow_worker_writers, exitpriority=5)
+
+def _load_flow_durations(history_file):
+    """
+    _load_flow_durations
+
+    :param history_file: JSON file of past flow durations
+    :return: Flow name to duration in seconds. Empty if there is no usable history
+    :rtype: Dictionary
+    """
+    try:
+        with open(history_file) as history:
+            return json.load(history)
+    except (OSError, ValueError):
+        return {}
+
+def _note_helper_poll():
+    """
+    _note_helper_poll
+
+    Counts a repeated check of a wait against the instrumented helper calls in progress. Polls are not retries, a wait
+    polling is not a failure
+    """
+    if _instrumentation_enabled:
+        for call in _active_helper_calls():
+            call.polls += 1
+
+def _note_helper_retry(kind):
+    """
+    _note_helper_retry
+
+    Counts a retry against the instrumented helper calls in progress
+
+    :param kind: Kind of failure retried, see RetryPolicy.classify
+    """
+    if _instrumentation_enabled:
+        for call in _active_helper_calls():
+            call.retries += 1
+            call.retry_kinds[kind] = call.retry_kinds.get(kind, 0) + 1
+
+def _note_helper_wait(seconds):
+    """
+    _note_helper_wait
+
+    Counts time spent waiting against the instrumented helper calls in progress
+
+    :param seconds: Time spent waiting
+    """
+    if _instrumentation_enabled:
+        for call in _active_helper_calls():
+            call.wait_seconds += seconds
+
+def _is_selected_compartment(text, path, index):
+    """
+    _is_selected_compartment
+
+    :param text: Text the dropdown shows for its selection, a compartment name or path
+    :param path: Full path of the wanted compartment
+    :param index: CompartmentIndex of the tenancy, or None
+    :return: Whether the selection is certainly the wanted compartment. A bare name only counts when no other
+        compartment could have it
+    :rtype: Boolean
+    """
+    shown = tuple(name.strip() for name in text.split('/') if name.strip())
+    if len(shown) > 1:
+        return shown in (path, path[1:])
+    if shown != path[-1:]:
+        return False
+    return index.count(path[-1]) == 1 if index is not None else len(path) == 1
+
+@lru_cache(maxsize=None)
+def _load_locator_constants(module_name):
+    """
+    _load_locator_constants
+
+    Imports a ui_constants module and validates all of its locator constants into the locator registry, so a bad
+    constant fails when its module is first loaded rather than when a helper first uses it
+
+    :param module_name: Name of the ui_constants module
+    :return: The module
+    :raises ValueError: Listing every constant of the module that is not a valid locator
+    """
+    module = import_module(module_name)
+    get_locator_registry().register_module(module)
+    return module
+
+def _locator_problem(by, value):
+    """
+    _locator_problem
+
+    :param by: Locator strategy
+    :param value: Locator string
+    :return: What is wrong with the locator for its strategy, None if nothing is
+    :rtype: String
+    """
+    if not isinstance(value, str) or not value.strip():
+        return "locators must be non empty strings"
+    looks_like_xpath = value.lstrip().startswith(('/', '(', './'))
+    if by in ('id', 'name', 'class name', 'tag name', 'css selector') and looks_like_xpath:
+        return f"it looks like an XPath, which the {by} strategy cannot use"
+    if by == 'class name' and len(value.split()) > 1:
+        return "compound class names are not supported by class name lookups, use a CSS selector"
+    if by != 'xpath':
+        return None
+    if not looks_like_xpath:
+        return "an XPath locator starts with /, ( or ./"
+    top_level, depth, quote = [], 0, None
+    for char in value:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '\'"':
+            quote = char
+        elif char in '[(':
+            depth += 1
+        elif char in '])':
+            depth -= 1
+            if depth < 0:
+                return "it has an unmatched closing bracket"
+        elif depth == 0:
+            top_level.append(char)
+    if quote or depth:
+        return "it has an unclosed quote or bracket"
+    top_level = ''.join(top_level)
+    # and/or are only operators when they stand alone, not inside names like ancestor-or-self or oj-select-or-combo
+    if re.search(r'[=<>]|(?<![\w.:/@-])(?:and|or)(?![\w.:-])', top_level):
+        return "it is a comparison, not a path to elements"
+    last_step = re.split(r'/|::', top_level)[-1].strip()
+    if last_step.startswith('@') or last_step in ('text', 'comment', 'node', 'processing-instruction'):
+        return "it selects text or attribute nodes, not elements"
+    return None
+
+def _normalize_locator(locator, by='xpath'):
+    """
+    _normalize_locator
+
+    Turns whatever a helper was given as a locator into a validated Locator. XPath is rewritten into the equivalent
+    CSS selector where there is one, unless REWRITE_XPATH_TO_CSS is off.
+
+    :param locator: Locator, (strategy, locator) tuple, or locator string for the strategy in by
+    :param by: Strategy of a locator given as a string
+    :return: Locator
+    :raises ValueError: If the locator does not suit its strategy
+    """
+    if isinstance(locator, tuple):
+        by, locator = locator
+    return _checked_locator(by, locator, REWRITE_XPATH_TO_CSS)
+
+def _open_trace(trace_path, mode):
+    """
+    _open_trace
+
+    :param trace_path: Trace file. Compressed if it ends in .gz
+    :param mode: Text mode to open it in, 'rt' or 'wt'
+    :return: Open file
+    """
+    if trace_path.endswith('.gz'):
+        return gzip.open(trace_path, mode, encoding='utf-8')
+    return open(trace_path, mode[0], encoding='utf-8')
+
+def _quit_quietly(driver):
+    """
+    _quit_quietly
+
+    Quits a browser session, logging rather than raising if the session is already gone
+
+    :param driver: Webdriver for the browser
+    """
+    try:
+        driver.quit()
+    except Exception as e:
+        _helper_log.warning("Failed to quit browser session cleanly. %s", e)
+
+def _quit_flow_worker_driver():
+    """
+    _quit_flow_worker_driver
+
+    Quits the browser of a run_flows_in_parallel worker, if it started one
+    """
+    recycler = _flow_worker_state.get('recycler')
+    if recycler is not None:
+        recycler.discard()
+
+def _read_changed_list_page(driver, xpaths, previous_rows):
+    """
+    _read_changed_list_page
+
+    wait_until condition for iter_list_rows, reading the list page and only returning it once its rows differ from
+    the previous page's
+
+    :param driver: Webdriver for the browser
+    :param xpaths: Name, OCID, state and next page button xpaths
+    :param previous_rows: Names and OCIDs of the previous page
+    :return: The page read, or None if it has not changed yet
+    """
+    page = driver.execute_script(_READ_LIST_PAGE_SCRIPT, *xpaths)
+    if (page['names'], page['ocids']) == previous_rows:
+        return None
+    return page
+
+def _read_session_snapshot(snapshot_path):
+    """
+    _read_session_snapshot
+
+    :param snapshot_path: Snapshot file
+    :return: The decrypted snapshot, None if it is missing, expired or cannot be decrypted
+    :rtype: Dictionary
+    """
+    try:
+        with open(snapshot_path, 'rb') as snapshot_in:
+            token = snapshot_in.read()
+    except FileNotFoundError:
+        _helper_log.info("No session snapshot at %s", snapshot_path)
+        return None
+    from cryptography.fernet import InvalidToken
 
+    cipher = _session_snapshot_cipher()
+    try:
+        snapshot = json.loads(cipher.decrypt(token))
+    except (InvalidToken, ValueError) as e:
+        _helper_log.warning("Could not decrypt the session snapshot %s, ignoring it. %r", snapshot_path, e)
+        return None
+    if snapshot['expires_at'] <= time():
+        _helper_log.info("Session snapshot %s has expired", snapshot_path)
+        return None
+    return snapshot
 
-def wait_for_by_xpath_then_fill_in(driver, element_xpath, text, wait_for_seconds=200):
+def _record_frame(driver, name):
     """
-    wait_for_by_xpath_then_fill_in
+    _record_frame
 
-    Waits for an element by xpath to be clickable and fills it in with specified text
+    Captures a frame into the screenshot ring buffer, if one is configured. Nothing is written to disk unless a
+    later failure dumps the ring.
 
-    :param driver: Webdriver controller for the web page
-    :param element_xpath: Xpath of the element to interact with.
-    :param text: Text to fill into the element
-    :param wait_for_seconds: Timeout value for the element to be clickable
+    :param driver: Webdriver for the browser
+    :param name: Name of the frame
+    """
+    writer = get_screenshot_writer()
+    if writer.ring is not None:
+        writer.record(name, driver.get_screenshot_as_png())
+
+def _record_browser_recycle(reason, seconds, rss, commands):
     """
-    Log.info(f"Filling in text {text} on element with Xpath {element_xpath}")
-    element = WebDriverWait(driver, wait_for_seconds).until(
-        expected_conditions.element_to_be_clickable((By.XPATH, element_xpath)))
-    element.send_keys(text)
+    _record_browser_recycle
 
+    Adds a browser recycle to the recycle metrics, and to the helper metrics as the browser_recycle helper
 
-def wait_for_by_xpath_then_get_text(driver, element_xpath, wait_for_seconds=30):
+    :param reason: Why the browser was recycled
+    :param seconds: Time the recycle took
+    :param rss: Resident bytes of the old browser, None if unknown
+    :param commands: Commands the old browser had been sent
     """
-    wait_for_by_xpath_then_get_text
+    _helper_log.info("Recycled the browser after %s commands at %s resident bytes (%s) in %.1f seconds",
+                     commands, rss, reason, seconds)
+    with _helper_metrics_lock:
+        _browser_recycle_metrics['recycles'] += 1
+        _browser_recycle_metrics['seconds'] += seconds
+        _browser_recycle_metrics['reasons'][reason] = _browser_recycle_metrics['reasons'].get(reason, 0) + 1
+        _browser_recycle_metrics['rss_bytes'].append(rss)
+        _browser_recycle_metrics['commands'].append(commands)
+    _record_helper_call('browser_recycle', seconds, _HelperCall(), False)
 
-    Waits for an element by xpath to be clickable and reads it's text
+def _record_flow_result(index, result, results, history, record_duration=True):
+    """
+    _record_flow_result
 
-    :param driver: Webdriver controller for the web page
-    :param element_xpath: Xpath of the element to interact with.
-    :param wait_for_seconds: Timeout value for the element to be clickable
+    :param index: Index of the flow
+    :param result: FlowResult of the flow
+    :param results: Flow index to FlowResult
+    :param history: Flow name to past duration in seconds
+    :param record_duration: Average the duration into history
     """
-    Log.info(f"Waiting {wait_for_seconds} seconds, to find element of xpath {element_xpath}")
-    label = WebDriverWait(driver, wait_for_seconds).until(
-        expected_conditions.element_to_be_clickable((By.XPATH, element_xpath, wait_for_seconds)))
-    text = label.text
-    Log.info(f"Text returned is {text}")
-    return text
+    results[index] = result
+    _helper_log.info("Flow %s %s in %.1f seconds",
+                     result.name, 'passed' if result.passed else 'failed', result.duration)
+    if record_duration and result.duration:
+        previous = history.get(result.name)
+        history[result.name] = result.duration if previous is None else (previous + result.duration) / 2
 
+def _record_helper_call(name, wall_seconds, call, failed):
+    """
+    _record_helper_call
 
-def wait_for_element_not_to_be_clickable(driver, element_xpath_or_id, element_type='xpath', wait_interval=5, max_wait_time=60):
+    Adds a finished helper call to the per helper metrics
+
+    :param name: Name of the helper
+    :param wall_seconds: Wall time of the call
+    :param call: Counters collected during the call
+    :param failed: Whether the call raised
     """
+    wait_seconds = min(call.wait_seconds, wall_seconds)
+    with _helper_metrics_lock:
+        metrics = _helper_metrics.get(name)
+        if metrics is None:
+            metrics = _helper_metrics[name] = {
+                'calls': 0, 'failures': 0, 'wall_seconds': 0.0, 'max_wall_seconds': 0.0, 'wait_seconds': 0.0,
+                'act_seconds': 0.0, 'commands': 0, 'retries': 0, 'retry_kinds': {}, 'polls': 0,
+                'histogram': [0] * len(_HISTOGRAM_LABELS)}
+        metrics['calls'] += 1
+        metrics['failures'] += failed
+        metrics['wall_seconds'] += wall_seconds
+        metrics['max_wall_seconds'] = max(metrics['max_wall_seconds'], wall_seconds)
+        metrics['wait_seconds'] += wait_seconds
+        metrics['act_seconds'] += wall_seconds - wait_seconds
+        metrics['commands'] += call.commands
+        metrics['retries'] += call.retries
+        metrics['polls'] += call.polls
+        for kind, count in call.retry_kinds.items():
+            metrics['retry_kinds'][kind] = metrics['retry_kinds'].get(kind, 0) + count
+        metrics['histogram'][bisect_left(HELPER_LATENCY_BUCKETS, wall_seconds)] += 1
 
-    wait_for_element_not_to_be_clickable
+def _retry(driver, attempt, description, wait_for_seconds=None, extra_kinds=()):
+    """
+    _retry
 
-    Recursively checks for the element to not be clickable
+    Runs an interaction under the retry policy, backing off between attempts. Failures the policy does not retry are
+    raised straight away, as is the last failure once the attempts, the wait or the run's retry budget run out.
 
     :param driver: Webdriver for the browser
-    :param element_xpath_or_id: Xpath or ID of the element we want to not be clickable. Defined by element_type
-    :param element_type: 'xpath' or 'id' to select the appropriate Webdriver call for find element
-    :param wait_interval: Sleep interval between checks
-    :param max_wait_time: Timeout for the element to not be clickable
-    :return:
+    :param attempt: Callable with no arguments making one attempt
+    :param description: What is being attempted, used in log messages
+    :param wait_for_seconds: Keep retrying for this long rather than for the policy's number of attempts
+    :param extra_kinds: Further kinds of failure to retry, see RetryPolicy.should_retry
+    :return: Whatever the attempt returns
     """
-    time_waited = 0
-    while time_waited < max_wait_time:
-        Log.info(f"Waiting {wait_interval} seconds for element with {element_type} {element_xpath_or_id}"
-                 f" to NOT be clickable")
-        try:
-            if element_type == 'xpath':
-                find_by_xpath(driver, element_xpath_or_id)
+    return _run_steps(driver, _retry_steps(driver, attempt, description, wait_for_seconds, extra_kinds))
+
+def _retry_delay(error, attempts, description, retries, remaining=None, extra_kinds=()):
+    """
+    _retry_delay
+
+    Decides whether a failed interaction is retried. The first retry of an interaction spends one from the retry
+    budget, later ones only need the interaction's attempts or wait to allow them.
+
+    :param error: Exception the last attempt raised
+    :param attempts: Number of attempts made so far
+    :param description: What is being attempted, used in log messages
+    :param retries: RepeatedRecords of the interaction the retries are logged to
+    :param remaining: Seconds left to retry in, None to be bounded by the policy's number of attempts instead
+    :param extra_kinds: Further kinds of failure to retry, see RetryPolicy.should_retry
+    :return: Seconds to back off before the next attempt, None if the error should be raised
+    """
+    policy = get_retry_policy()
+    kind = policy.classify(error)
+    if remaining is None:
+        retry = policy.should_retry(kind, attempts, extra_kinds)
+    else:
+        retry = remaining > 0 and (kind in policy.retry_on or kind in extra_kinds)
+    if not retry:
+        return None
+    exhausted = False
+    if attempts == 1:
+        with _helper_metrics_lock:
+            if _retry_budget['spent'] >= _retry_budget['limit']:
+                _retry_budget['refused'] += 1
+                exhausted = True
             else:
-                find_by_id(driver, element_xpath_or_id)
-            Log.warning(
-                f"Element is still clickable. Waiting another {wait_interval} seconds. Waited {time_waited} sofar")
-            sleep(wait_interval)
-            time_waited += wait_interval
-        except Exception as e:
-            Log.info(f"Element is now not clickable. Returning. {e}")
-            return
-    take_screenshot(driver)
-    raise FileNotFoundError(f"Element still clickable after {max_wait_time}")
+                _retry_budget['spent'] += 1
+                _retry_budget['kinds'][kind] = _retry_budget['kinds'].get(kind, 0) + 1
+    if exhausted:
+        _helper_log.warning("Retry budget of %s used up, not retrying %s after %s failure",
+                            _retry_budget['limit'], description, kind)
+        return None
+    delay = policy.backoff(attempts)
+    if remaining is not None:
+        delay = min(delay, remaining)
+    retries.info("Retrying %s in %.2f seconds after %s failure %s", description, delay, kind, attempts)
+    _note_helper_retry(kind)
+    return delay
 
-def wait_for_element_to_be_clickable(driver, xpath_or_id, element_type='xpath', wait_for_seconds=30):
+def _check_list_page_columns(page, page_number):
     """
+    _check_list_page_columns
 
-    :param driver:
-    :param xpath_or_id:
-    :param element_type:
-    :param wait_for_seconds:
-    :return:
+    :param page: List page read by _READ_LIST_PAGE_SCRIPT
+    :param page_number: Number of the page, used in the error message
+    :raises ValueError: If the page's cells were paired by position and its columns differ in length
+    """
+    if page.get('paired'):
+        return
+    lengths = (len(page['names']), len(page['ocids']), len(page['states']))
+    if len(set(lengths)) > 1:
+        raise ValueError(f"Cannot pair the cells of page {page_number} of the list into rows. The names are not in "
+                         f"table rows, and there are {lengths[0]} names, {lengths[1]} OCIDs and {lengths[2]} states")
+
+def _act_on_element_steps(driver, by, locator, action, element=None):
+    """
+    _act_on_element_steps
+
+    Steps of _act_on_element, see _run_steps
+    """
+    by, locator = _normalize_locator(locator, by)
+
+    def attempt():
+        nonlocal element
+        target, element = element, None
+        cache = _element_caches.get(driver)
+        cached = target is None and cache is not None and (by, locator) in cache
+        if target is None:
+            target = _find_element(driver, by, locator)
+        try:
+            return action(target)
+        except _exceptions.StaleElementReferenceException:
+            if cache is not None:
+                cache.invalidate((by, locator))
+            if not cached:
+                raise
+        return action(_find_element(driver, by, locator))
+    return (yield from _retry_steps(driver, attempt, f"action on element {by} {locator}"))
+
+def _clear_field_by_class_name_steps(driver, class_name):
+    """
+    _clear_field_by_class_name_steps
+
+    Steps of clear_field_by_class_name, see _run_steps
+    """
+    _helper_log.info("Clearing field with class name %s", class_name)
+    yield from _act_on_element_steps(driver, By.CLASS_NAME, class_name, lambda element: element.clear())
+
+def _clear_field_by_id_steps(driver, element_id):
+    """
+    _clear_field_by_id_steps
+
+    Steps of clear_field_by_id, see _run_steps
+    """
+    _helper_log.info("Clearing field with element ID %s", element_id)
+    yield from _act_on_element_steps(driver, By.ID, element_id, lambda element: element.clear())
+
+def _clear_field_by_xpath_steps(driver, xpath):
+    """
+    _clear_field_by_xpath_steps
+
+    Steps of clear_field_by_xpath, see _run_steps
+    """
+    _helper_log.info("Clearing field with XPath name %s", xpath)
+    yield from _act_on_element_steps(driver, By.XPATH, xpath, lambda element: element.clear())
+
+def _click_by_class_steps(driver, class_name):
+    """
+    _click_by_class_steps
+
+    Steps of click_by_class, see _run_steps
+    """
+    _helper_log.info("Clicking element with class %s", class_name)
+    yield from _act_on_element_steps(driver, By.CLASS_NAME, class_name, lambda element: element.click())
+
+def _click_element_by_id_steps(driver, element_id):
+    """
+    _click_element_by_id_steps
+
+    Steps of click_element_by_id, see _run_steps
+    """
+    _helper_log.info("Clicking element with ID %s", element_id)
+    yield from _act_on_element_steps(driver, By.ID, element_id, lambda element: element.click())
+
+def _click_element_by_xpath_steps(driver, xpath):
+    """
+    _click_element_by_xpath_steps
+
+    Steps of click_element_by_xpath, see _run_steps
+    """
+    _helper_log.info("Clicking element with Xpath %s", xpath)
+    yield from _act_on_element_steps(driver, By.XPATH, xpath, lambda element: element.click())
+
+def _click_then_wait_for_element_not_to_be_present_steps(driver, element_xpath_or_id, element_type='xpath',
+                                                          wait_interval=5, max_wait_time=60):
+    """
+    _click_then_wait_for_element_not_to_be_present_steps
+
+    Steps of click_then_wait_for_element_not_to_be_present, see _run_steps
     """
-    Log.info(
-        f"Waiting {wait_for_seconds} seconds to be clickable, then clicking element with {element_type} {xpath_or_id}")
     if element_type == 'xpath':
-        WebDriverWait(driver, wait_for_seconds).until(
-            expected_conditions.element_to_be_clickable((By.ID, xpath_or_id)))
+        yield from _click_element_by_xpath_steps(driver, element_xpath_or_id)
+    else:
+        yield from _click_element_by_id_steps(driver, element_xpath_or_id)
+    yield from _wait_for_element_not_to_be_clickable_steps(driver, element_xpath_or_id, element_type, wait_interval,
+                                                           max_wait_time)
+
+def _fill_in_text_element_by_class_steps(driver, element_class_name, text):
+    """
+    _fill_in_text_element_by_class_steps
+
+    Steps of fill_in_text_element_by_class, see _run_steps
+    """
+    _helper_log.info("Filling in text %s on element of Class %s", text, element_class_name)
+    yield from _act_on_element_steps(driver, By.CLASS_NAME, element_class_name, lambda element: element.send_keys(text))
+
+def _fill_in_text_element_by_id_steps(driver, element_id, text):
+    """
+    _fill_in_text_element_by_id_steps
+
+    Steps of fill_in_text_element_by_id, see _run_steps
+    """
+    _helper_log.info("Filling in text %s on element of ID %s", text, element_id)
+    yield from _act_on_element_steps(driver, By.ID, element_id, lambda element: element.send_keys(text))
+
+def _fill_in_text_element_by_xpath_steps(driver, element_xpath, text):
+    """
+    _fill_in_text_element_by_xpath_steps
+
+    Steps of fill_in_text_element_by_xpath, see _run_steps
+    """
+    _helper_log.info("Filling in text %s on element of XPath %s", text, element_xpath)
+    yield from _act_on_element_steps(driver, By.XPATH, element_xpath, lambda element: element.send_keys(text))
+
+def _find_and_click_checkbox_from_display_name_steps(driver, name_to_search_for, names_list_xpath,
+                                                     checkbox_list_xpath):
+    """
+    _find_and_click_checkbox_from_display_name_steps
+
+    Steps of find_and_click_checkbox_from_display_name, see _run_steps
+    """
+    list_checked = get_texts_by_xpath(driver, names_list_xpath)
+    with _helper_log.repeated(f"rows of {names_list_xpath}") as rows:
+        for index, display_name in enumerate(list_checked):
+            rows.info("Checking whether %s matches the desired string %s", display_name, name_to_search_for)
+            if name_to_search_for == display_name:
+                _helper_log.info("Found the desired string. Clicking the adjacent checkbox at index %s.", index)
+                yield from _retry_steps(
+                    driver, lambda: driver.find_elements(*_normalize_locator(checkbox_list_xpath))[index].click(),
+                    f"click on checkbox {index} of {checkbox_list_xpath}")
+                _record_frame(driver, "checkbox_clicked")
+                return
+    raise FileNotFoundError(f"Did not find element to click. Elements available were {list_checked}")
+
+def _launch_menu_steps(driver, desired_page, menu_items, use_route_cache=False, route_wait_seconds=10,
+                       route_scope=None):
+    """
+    _launch_menu_steps
+
+    Steps of launch_menu, see _run_steps
+    """
+    _helper_log.info("Launching menu to get us to desired page %s", desired_page)
+    if driver.title == desired_page:
+        return True
+    routes = get_route_cache() if use_route_cache else None
+    current_url = driver.current_url if routes is not None else None
+    scope = _route_scope(current_url, route_scope) if routes is not None else None
+    route = routes.get(scope, desired_page) if scope else None
+    if route:
+        url = _route_url(current_url, route)
+        _helper_log.info("Going straight to %s at %s", desired_page, url)
+        invalidate_element_cache(driver)
+        driver.get(url)
+        try:
+            yield from _wait_until_steps(driver, lambda d: d.title == desired_page, route_wait_seconds,
+                                         f"page title to be {desired_page}")
+            return True
+        except _exceptions.TimeoutException:
+            _helper_log.warning("%s did not show %s, forgetting it and clicking through the menu", url, desired_page)
+            routes.forget(scope, desired_page)
+    for menu_item in menu_items:
+        yield from _wait_for_by_id_then_click_steps(driver, menu_item)
+        invalidate_element_cache(driver)
+        if _helper_log.is_enabled_for(logging.INFO):
+            _helper_log.info("PAGE TITLE %s", driver.title)
+    arrived = driver.title == desired_page
+    if arrived and scope:
+        routes.remember(scope, desired_page, _route_path(driver.current_url))
+    return arrived
+
+def _next_step(steps):
+    """
+    _next_step
+
+    Runs the steps of a waiting helper up to their next pause
+
+    :param steps: Generator of the steps, see _run_steps
+    :return: Whether the steps are done, and then what they return, else the seconds to pause for
+    :rtype: Tuple
+    """
+    try:
+        return False, next(steps)
+    except StopIteration as stop:
+        return True, stop.value
+
+def _retry_steps(driver, attempt, description, wait_for_seconds=None, extra_kinds=()):
+    """
+    _retry_steps
+
+    Steps of _retry, see _run_steps
+    """
+    clock = _driver_clock(driver)[0]
+    deadline = None if wait_for_seconds is None else clock() + wait_for_seconds
+    attempts = 0
+    with _helper_log.repeated(description) as retries:
+        while True:
+            try:
+                return attempt()
+            except _exceptions.WebDriverException as e:
+                attempts += 1
+                remaining = None if deadline is None else deadline - clock()
+                delay = _retry_delay(e, attempts, description, retries, remaining, extra_kinds)
+                if delay is None:
+                    raise
+            yield delay
+            _note_helper_wait(delay)
+
+def _run_steps(driver, steps):
+    """
+    _run_steps
+
+    Runs the steps of a waiting helper in this thread. The waiting helpers are written as generators of steps, which
+    do the WebDriver work and yield the seconds to pause before the next step, so AsyncUiSession.run_steps can run
+    the very same steps with the pauses on the event loop.
+
+    :param driver: Webdriver for the browser
+    :param steps: Generator of the steps, e.g from _wait_until_steps
+    :return: Whatever the steps return
+    """
+    pause = _driver_clock(driver)[1]
+    while True:
+        done, value = _next_step(steps)
+        if done:
+            return value
+        pause(value)
+
+def _wait_for_by_id_then_click_steps(driver, element_id, wait_for_seconds=30):
+    """
+    _wait_for_by_id_then_click_steps
+
+    Steps of wait_for_by_id_then_click, see _run_steps
+    """
+    _helper_log.info("Waiting %s seconds to be clickable, then clicking element with ID %s",
+                     wait_for_seconds, element_id)
+    clock = _driver_clock(driver)[0]
+    deadline = clock() + wait_for_seconds
+    yield from _wait_until_steps(driver,
+                                 expected_conditions.element_to_be_clickable(_normalize_locator(element_id, By.ID)),
+                                 wait_for_seconds, f"element with ID {element_id} to be clickable")
+    try:
+        yield from _retry_steps(driver, lambda: _click_once(driver, By.ID, element_id),
+                                f"click on element with ID {element_id}", max(0.0, deadline - clock()),
+                                extra_kinds=('missing',))
+    except _exceptions.WebDriverException as e:
+        _capture_failure(driver, "click_retries_exhausted")
+        raise FileNotFoundError(f"Out of retries. Could not click the element. {e}")
+
+def _wait_for_by_id_then_fill_in_steps(driver, element_id, text, wait_for_seconds=30):
+    """
+    _wait_for_by_id_then_fill_in_steps
+
+    Steps of wait_for_by_id_then_fill_in, see _run_steps
+    """
+    _helper_log.info("Trying to fill in text %s on element with ID %s within %s seconds",
+                     text, element_id, wait_for_seconds)
+    clickable = expected_conditions.element_to_be_clickable(_normalize_locator(element_id, By.ID))
+    element = yield from _wait_until_steps(driver, clickable, wait_for_seconds,
+                                           f"element with ID {element_id} to be clickable")
+    yield from _act_on_element_steps(driver, By.ID, element_id, lambda target: target.send_keys(text), element)
+
+def _wait_for_by_xpath_steps(driver, element_xpath, wait_for_seconds=40, return_element=False, observe=True):
+    """
+    _wait_for_by_xpath_steps
+
+    Steps of wait_for_by_xpath, see _run_steps
+
+    :param observe: Wait with a MutationObserver in the page first. It holds the thread for the wait, so the async
+        helpers only poll
+    """
+    _helper_log.info("Waiting %s seconds for element with xpath %s to appear!", wait_for_seconds, element_xpath)
+    clock = _driver_clock(driver)[0]
+    start = clock()
+    found = wait_for_xpath_with_observer(driver, element_xpath, wait_for_seconds) if observe else None
+    if found is None:
+        remaining = max(wait_for_seconds - (clock() - start), 0)
+        try:
+            yield from _wait_until_steps(driver, lambda d: d.find_elements(*_normalize_locator(element_xpath)),
+                                         remaining, f"element with xpath {element_xpath} to appear")
+        except _exceptions.TimeoutException:
+            found = False
+    if found is False:
+        _helper_log.warning("Element with xpath %s did not appear within %s seconds", element_xpath, wait_for_seconds)
     else:
-        WebDriverWait(driver, wait_for_seconds).until(
-            expected_conditions.element_to_be_clickable((By.XPATH, xpath_or_id)))
+        _helper_log.info("Element found")
+    if return_element:
+        return driver.find_elements(*_normalize_locator(element_xpath))
+
+def _wait_for_by_xpath_then_click_steps(driver, element_xpath, wait_for_seconds=40):
+    """
+    _wait_for_by_xpath_then_click_steps
+
+    Steps of wait_for_by_xpath_then_click, see _run_steps
+    """
+    _helper_log.info("Waiting %s seconds for element with xpath %s to appear!", wait_for_seconds, element_xpath)
+    clickable = expected_conditions.element_to_be_clickable(_normalize_locator(element_xpath, By.XPATH))
+    yield from _wait_until_steps(driver, clickable, wait_for_seconds,
+                                 f"element with xpath {element_xpath} to be clickable")
+    yield from _click_element_by_xpath_steps(driver, element_xpath)
+
+def _wait_for_by_xpath_then_fill_in_steps(driver, element_xpath, text, wait_for_seconds=200):
+    """
+    _wait_for_by_xpath_then_fill_in_steps
+
+    Steps of wait_for_by_xpath_then_fill_in, see _run_steps
+    """
+    _helper_log.info("Filling in text %s on element with Xpath %s", text, element_xpath)
+    clickable = expected_conditions.element_to_be_clickable(_normalize_locator(element_xpath, By.XPATH))
+    element = yield from _wait_until_steps(driver, clickable, wait_for_seconds,
+                                           f"element with xpath {element_xpath} to be clickable")
+    yield from _act_on_element_steps(driver, By.XPATH, element_xpath, lambda target: target.send_keys(text), element)
+
+def _wait_for_by_xpath_then_get_text_steps(driver, element_xpath, wait_for_seconds=30, snapshot=None):
+    """
+    _wait_for_by_xpath_then_get_text_steps
+
+    Steps of wait_for_by_xpath_then_get_text, see _run_steps
+    """
+    if snapshot is not None and snapshot.exists(element_xpath):
+        text = snapshot.text(element_xpath)
+        _helper_log.info("Text of xpath %s in the snapshot is %s", element_xpath, text)
+        return text
+    _helper_log.info("Waiting %s seconds, to find element of xpath %s", wait_for_seconds, element_xpath)
+    clickable = expected_conditions.element_to_be_clickable(_normalize_locator(element_xpath, By.XPATH))
+    label = yield from _wait_until_steps(driver, clickable, wait_for_seconds,
+                                         f"element with xpath {element_xpath} to be clickable")
+    text = label.text
+    _helper_log.info("Text returned is %s", text)
+    return text
+
+def _wait_for_element_not_to_be_clickable_steps(driver, element_xpath_or_id, element_type='xpath', wait_interval=5,
+                                                max_wait_time=60):
+    """
+    _wait_for_element_not_to_be_clickable_steps
+
+    Steps of wait_for_element_not_to_be_clickable, see _run_steps
+    """
+    by = By.XPATH if element_type == 'xpath' else By.ID
+    _helper_log.info("Waiting up to %s seconds for element with %s %s to NOT be clickable",
+                     max_wait_time, element_type, element_xpath_or_id)
+    gone = lambda d: not d.find_elements(*_normalize_locator(element_xpath_or_id, by))
+    try:
+        yield from _wait_until_steps(driver, gone, max_wait_time,
+                                     f"element with {element_type} {element_xpath_or_id} to go away",
+                                     max_poll_interval=wait_interval)
+    except _exceptions.TimeoutException:
+        _capture_failure(driver, "element_still_clickable")
+        raise FileNotFoundError(f"Element still clickable after {max_wait_time}")
+    _helper_log.info("Element is now not clickable. Returning.")
+
+def _wait_for_element_to_be_clickable_steps(driver, xpath_or_id, element_type='xpath', wait_for_seconds=30):
+    """
+    _wait_for_element_to_be_clickable_steps
+
+    Steps of wait_for_element_to_be_clickable, see _run_steps
+    """
+    _helper_log.info("Waiting %s seconds to be clickable, then clicking element with %s %s",
+                     wait_for_seconds, element_type, xpath_or_id)
+    by = By.XPATH if element_type == 'xpath' else By.ID
+    yield from _wait_until_steps(driver,
+                                 expected_conditions.element_to_be_clickable(_normalize_locator(xpath_or_id, by)),
+                                 wait_for_seconds, f"element with {element_type} {xpath_or_id} to be clickable")
+
+def _wait_for_page_changes_steps(driver, page_title_to_change_to, wait_for_seconds=60):
+    """
+    _wait_for_page_changes_steps
+
+    Steps of wait_for_page_changes, see _run_steps
+    """
+    if _helper_log.is_enabled_for(logging.INFO):
+        _helper_log.info("Current page title is %s", driver.title)
+    _helper_log.info("Waiting %s seconds for page to change to %s", wait_for_seconds, page_title_to_change_to)
+    try:
+        yield from _wait_until_steps(driver, expected_conditions.title_contains(page_title_to_change_to),
+                                     wait_for_seconds, f"page title to contain {page_title_to_change_to}")
+    except _exceptions.TimeoutException as e:
+        _helper_log.error("Timed out with page title at %s", driver.title)
+        _capture_failure(driver, "page_change_timeout")
+        raise _exceptions.TimeoutException(f"Timed out with page title at {driver.title}. {e}")
+    invalidate_element_cache(driver)
+    _helper_log.info("Page has changed to %s", page_title_to_change_to)
+
+def _wait_until_steps(driver, condition, wait_for_seconds, description='condition', max_poll_interval=None,
+                      ignored_exceptions=None):
+    """
+    _wait_until_steps
+
+    Steps of wait_until, see _run_steps. Every poll is a step
+    """
+    if max_poll_interval is None:
+        max_poll_interval = WAIT_MAX_POLL_INTERVAL
+    if ignored_exceptions is None:
+        ignored_exceptions = (_exceptions.NoSuchElementException, _exceptions.StaleElementReferenceException)
+    clock = _driver_clock(driver)[0]
+    start = clock()
+    deadline = start + wait_for_seconds
+    interval = min(WAIT_MIN_POLL_INTERVAL, max_poll_interval)
+    last_error = None
+    try:
+        while True:
+            try:
+                value = condition(driver)
+                if value:
+                    _helper_log.info("Waited %.2f seconds for %s", clock() - start, description)
+                    return value
+            except ignored_exceptions as e:
+                last_error = e
+            remaining = deadline - clock()
+            if remaining <= 0:
+                break
+            yield min(interval, remaining)
+            interval = min(interval * 2, max_poll_interval)
+            _note_helper_poll()
+    finally:
+        _note_helper_wait(clock() - start)
+    message = f"Timed out after {wait_for_seconds} seconds waiting for {description}"
+    if last_error is not None:
+        message = f"{message}. {last_error}"
+    raise _exceptions.TimeoutException(message)
+
+def _run_flow_in_worker(flow, name, output_dir, index=None):
+    """
+    _run_flow_in_worker
+
+    Runs one flow inside a run_flows_in_parallel worker. Logging during the flow is written to <name>.log in
+    output_dir, and a screenshot is saved to <name>.png if the flow fails.
+
+    :param flow: Callable taking a driver
+    :param name: Name of the flow
+    :param output_dir: Directory for the log and screenshot
+    :param index: Index of the flow, reported on the worker's started queue
+    :return: Outcome of the flow
+    :rtype: FlowResult
+    """
+    if _flow_worker_state.get('started') is not None:
+        _flow_worker_state['started'].put((index, os.getpid()))
+    driver = _flow_worker_state['recycler'].get_driver()
+    file_stem = os.path.join(output_dir, re.sub(r'[^\w.-]', '_', name))
+    log_handler = logging.FileHandler(f"{file_stem}.log")
+    logging.getLogger().addHandler(log_handler)
+    error = None
+    screenshot = None
+    start = monotonic()
+    try:
+        flow(driver)
+    except Exception:
+        error = traceback.format_exc()
+        try:
+            driver.save_screenshot(f"{file_stem}.png")
+            screenshot = f"{file_stem}.png"
+        except Exception as e:
+            _helper_log.warning("Could not take failure screenshot for flow %s. %s", name, e)
+    finally:
+        duration = monotonic() - start
+        _helper_log.flush()
+        logging.getLogger().removeHandler(log_handler)
+        log_handler.close()
+    try:
+        reset_driver_state(driver)
+        _flow_worker_state['recycler'].between_flows()
+    except Exception as e:
+        _helper_log.warning("Dropping browser after flow %s. %s", name, e)
+        _quit_flow_worker_driver()
+    return FlowResult(name, error is None, duration, error, screenshot, f"{file_stem}.log", os.getpid())
+
+def _run_flow_round(flows, names, order, results, history, max_workers, worker_args, output_dir, timeout):
+    """
+    _run_flow_round
+
+    Runs flows on one worker pool for run_flows_in_parallel, until they are all done or one of them times out. The
+    workers report each flow as they start it, so the timeout only counts time the flow has actually been running.
+
+    :param flows: Callables taking a driver
+    :param names: Flow names, by flow index
+    :param order: Indexes of the flows to run, in the order to hand them out
+    :param results: Flow index to FlowResult, filled in as flows finish
+    :param history: Flow name to past duration in seconds, updated as flows finish
+    :param max_workers: Number of worker processes
+    :param worker_args: Browser, headless and profile for _init_flow_worker
+    :param output_dir: Directory for the per flow logs and failure screenshots
+    :param timeout: How long one flow may run, 0 for no limit
+    :return: Indexes of the flows that were stopped along with a timed out one and need running again
+    :rtype: List of int
+    """
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    started = multiprocessing.Queue()
+    running = {}
+    timed_out = None
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_flow_worker,
+                                   initargs=worker_args + (started,))
+    try:
+        futures = {executor.submit(_run_flow_in_worker, flows[i], names[i], output_dir, i): i for i in order}
+        pending = set(futures)
+        while pending and timed_out is None:
+            done, pending = wait(pending, timeout=min(timeout, 1.0) if timeout else None,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = FlowResult(names[index], False, 0.0, f"Worker failed: {e!r}", None, None, None)
+                _record_flow_result(index, result, results, history)
+            while not started.empty():
+                index, pid = started.get()
+                running[index] = (pid, monotonic())
+            for future in pending:
+                index = futures[future]
+                if timeout and index in running and monotonic() - running[index][1] > timeout:
+                    timed_out = index
+                    break
+        if timed_out is None:
+            return []
+        pid = running[timed_out][0]
+        _helper_log.error("Flow %s did not finish in %s seconds, killing its worker %s", names[timed_out], timeout,
+                          pid)
+        os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        _record_flow_result(timed_out, FlowResult(names[timed_out], False, monotonic() - running[timed_out][1],
+                                                  f"Timed out after {timeout} seconds", None, None, pid),
+                            results, history, record_duration=False)
+    finally:
+        executor.shutdown(wait=True)
+        started.close()
+    # The pool is broken once a worker is killed, so flows that had not finished before then are run again
+    for future, index in futures.items():
+        if index not in results and future.done() and not future.cancelled() and future.exception() is None:
+            _record_flow_result(index, future.result(), results, history)
+    return [index for index in order if index not in results]
+
+def _save_flow_durations(history_file, history):
+    """
+    _save_flow_durations
+
+    :param history_file: JSON file of past flow durations
+    :param history: Flow name to duration in seconds
+    """
+    with open(history_file, 'w') as history_out:
+        json.dump(history, history_out, indent=2, sort_keys=True)
+
+def _script_timeout(driver):
+    """
+    _script_timeout
+
+    :param driver: Webdriver for the browser
+    :return: Script timeout last set through set_script_timeout, SCRIPT_TIMEOUT_SECONDS if it never was
+    :rtype: Float
+    """
+    return _script_timeouts.get(driver, SCRIPT_TIMEOUT_SECONDS)
+
+def _session_snapshot_cipher():
+    """
+    _session_snapshot_cipher
+
+    :return: Fernet cipher for the session snapshots, keyed from UI_SESSION_SNAPSHOT_KEY or SESSION_SNAPSHOT_KEY_FILE
+    :raises ImportError: If the cryptography package is not installed
+    :raises ValueError: If no key is given, or the key is not a Fernet key
+    """
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError as e:
+        raise ImportError("Session snapshots are encrypted with the cryptography package, pip install cryptography") \
+            from e
+
+    key = os.environ.get('UI_SESSION_SNAPSHOT_KEY')
+    if not key and SESSION_SNAPSHOT_KEY_FILE:
+        try:
+            with open(SESSION_SNAPSHOT_KEY_FILE, 'rb') as key_in:
+                key = key_in.read().strip().decode()
+        except OSError as e:
+            raise ValueError(f"Could not read the session snapshot key file {SESSION_SNAPSHOT_KEY_FILE}. {e}") from e
+    if not key:
+        raise ValueError("Session snapshots need a key, set UI_SESSION_SNAPSHOT_KEY or UI_SESSION_SNAPSHOT_KEY_FILE")
+    return Fernet(key.encode())
+
+def _split_compartment_path(path):
+    """
+    _split_compartment_path
+
+    :param path: Compartment path as "parent/child" or a list of names
+    :return: List of the names in the path
+    """
+    if isinstance(path, str):
+        return [name for name in path.split('/') if name]
+    return list(path)
+
+def _remove_on_quit(driver, path):
+    """
+    _remove_on_quit
+
+    Makes quitting a driver also remove a directory that belongs to its browser, e.g its disk cache
+
+    :param driver: Webdriver for the browser
+    :param path: Directory to remove
+    """
+    quit_browser = driver.quit
+
+    def quit_and_remove():
+        try:
+            quit_browser()
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    driver.quit = quit_and_remove
+
+def _route_path(url):
+    """
+    _route_path
+
+    :param url: URL of a page
+    :return: Path and fragment of the URL, leaving out the query string, which holds the tenancy, region and
+        compartment the page was opened for
+    """
+    parts = urlsplit(url)
+    return f"{parts.path}#{parts.fragment}" if parts.fragment else parts.path
+
+def _route_scope(url, scope=None):
+    """
+    _route_scope
+
+    :param url: URL of the current page
+    :param scope: Caller's scope, e.g tenancy and region. Defaults to the ROUTE_SCOPE_PARAMS query parameters of url
+    :return: Key routes from the page are kept under, None for pages that are not served over HTTP
+    """
+    origin = _url_origin(url)
+    if origin is None:
+        return None
+    if scope is None:
+        scope = urlencode(sorted(_scope_params(url)))
+    return f"{origin} {scope}" if scope else origin
+
+def _route_url(url, route):
+    """
+    _route_url
+
+    :param url: URL of the current page
+    :param route: Remembered path
+    :return: URL of the route on the current page's origin, carrying over its ROUTE_SCOPE_PARAMS query parameters
+    """
+    query = urlencode(_scope_params(url))
+    path, _, fragment = route.partition('#')
+    return _url_origin(url) + path + (f"?{query}" if query else '') + (f"#{fragment}" if fragment else '')
+
+def _scope_params(url):
+    """
+    _scope_params
+
+    :param url: URL of a page
+    :return: Its query parameters named in ROUTE_SCOPE_PARAMS
+    :rtype: List of tuples
+    """
+    return [(name, value) for name, value in parse_qsl(urlsplit(url).query) if name in ROUTE_SCOPE_PARAMS]
+
+def _url_origin(url):
+    """
+    _url_origin
+
+    :param url: URL of a page
+    :return: Scheme, host and port of the URL, None for pages that are not served over HTTP, e.g about:blank
+    """
+    parts = urlsplit(url or '')
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _xpath_literal(text):
+    """
+    _xpath_literal
+
+    :param text: Any string
+    :return: XPath string literal for the text, using concat() when it contains both kinds of quote
+    """
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in text.split("'")) + ")"
+
+def _xpath_of(locator):
+    """
+    _xpath_of
+
+    Gets an XPath for the helpers that evaluate locators inside the page
+
+    :param locator: Xpath string, or Locator by XPath, ID or class name
+    :return: Xpath string
+    :raises ValueError: If the locator has no XPath equivalent
+    """
+    by, value = locator if isinstance(locator, tuple) else ('xpath', locator)
+    problem = _locator_problem(by, value)
+    if problem:
+        raise ValueError(f"Invalid {by} locator {value!r}: {problem}")
+    if by == 'xpath':
+        return value
+    if by == 'id':
+        return f"//*[@id={_xpath_literal(value)}]"
+    if by == 'class name':
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), {_xpath_literal(f' {value} ')})]"
+    raise ValueError(f"This helper needs an XPath, ID or class name locator, got {by} {value!r}")
+
+@lru_cache(maxsize=2048)
+def _xpath_to_css(xpath):
+    """
+    _xpath_to_css
+
+    Memoized implementation of xpath_to_css
+
+    :param xpath: Xpath string
+    :return: CSS selector, or None if the XPath has no CSS equivalent
+    """
+    selector = []
+    position = 0
+    while position < len(xpath):
+        step = _XPATH_STEP.match(xpath, position)
+        if step is None:
+            return None
+        axis, tag, predicates = step.groups()
+        position = step.end()
+        if selector:
+            selector.append(' ' if axis == '//' else ' > ')
+        elif axis == '/' and tag not in ('html', '*'):
+            return None
+        selector.append(':root' if not selector and axis == '/' and tag == '*' else tag)
+        for number, predicate in enumerate(_XPATH_PREDICATE.findall(predicates)):
+            conditions = []
+            offset = 0
+            while offset < len(predicate):
+                condition = _XPATH_CONDITION.match(predicate, offset)
+                if condition is None or condition.end() == offset:
+                    return None
+                conditions.append(condition)
+                offset = condition.end()
+            if not conditions:
+                return None
+            for condition in conditions:
+                css = _condition_to_css(condition, tag, number == 0 and len(conditions) == 1)
+                if css is None:
+                    return None
+                selector.append(css)
+    return ''.join(selector) or None
 
 def _setup_driver_options(browser, options):
     """
@@ -561,7 +5155,11 @@ def _setup_driver_options(browser, options):
     :return: Browser object for the chosen browser
     :rtype: Webdriver object
     """
-    global driver
+    from selenium import webdriver
+    from lib.pca.pca_3x.constants.ui_constants.driver_constants import OSSE_CHROMEDRIVER_WINDOWS_PATH, \
+        OSSE_CHROMEDRIVER_LINUX_PATH
+    from tests.pca_3x.config import OSSE_UI_OPERATING_SYSTEM
+
     if browser == 'chrome':  # TODO OTHER BROWSERS
         if OSSE_UI_OPERATING_SYSTEM == "windows":
             path = OSSE_CHROMEDRIVER_WINDOWS_PATH
@@ -569,11 +5167,30 @@ def _setup_driver_options(browser, options):
             path = OSSE_CHROMEDRIVER_LINUX_PATH
         else:
             raise NotImplementedError(f"Operating system {OSSE_UI_OPERATING_SYSTEM} not yet supported in testware")
-        Log.info(
-            f"Setting up {OSSE_UI_OPERATING_SYSTEM} {browser} browser "
-            f"with driver executable at {path}")
+        _helper_log.info("Setting up %s %s browser with driver executable at %s",
+                         OSSE_UI_OPERATING_SYSTEM, browser, path)
         driver = webdriver.Chrome(
             options=options,
             executable_path=path)
-    Log.info(f"Using browser version {driver.capabilities['browserVersion']}")
+    else:
+        raise NotImplementedError(f"Browser {browser} not yet supported in testware")
+    _helper_log.info("Using browser version %s", driver.capabilities['browserVersion'])
     return driver
+
+
+def _reset_writers_after_fork():
+    """
+    _reset_writers_after_fork
+
+    Gives a forked child, e.g a run_flows_in_parallel worker, its own log and screenshot queues. The parent's
+    background threads do not exist in the child, so flushing the inherited queues would block forever
+    """
+    _helper_log._reset_after_fork()
+    if _screenshot_writer is not None:
+        _screenshot_writer._reset_after_fork()
+
+
+# The log every helper writes through, see configure_helper_logging
+_helper_log = HelperLog()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_writers_after_fork)
@@ -0,0 +1,748 @@
+#!/usr/bin/env python
+#
+"""
+base_ui_utils_benchmark
+
+Offline benchmarks for the helpers in base_ui_utils. Every public helper is run against a synthetic console, either
+through FakeConsoleDriver, an in-process stand-in for WebDriver that counts the commands it receives and can add a
+simulated round trip latency to each, or through a real browser pointed at the synthetic console pages served by
+serve_synthetic_console. Wall time and command counts are reported per helper, can be saved as JSON and are
+compared against a saved baseline to flag regressions between versions.
+
+Usage:
+    python base_ui_utils_benchmark.py --rows 500 --latency-ms 2 --save after.json --baseline before.json
+    python base_ui_utils_benchmark.py --browser chrome --profile fast
+    python base_ui_utils_benchmark.py --serve --port 8000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from time import monotonic, sleep
+from urllib.parse import parse_qs, urlparse
+
+import base_ui_utils
+
+# Locators of the synthetic console. The pages served by serve_synthetic_console and FakeConsoleDriver both honour
+# them, so the same benchmark cases run against either.
+NAME_CELLS_XPATH = "//table[@id='items']//td[@class='name']"
+OCID_CELLS_XPATH = "//table[@id='items']//td[@class='ocid']"
+STATE_CELLS_XPATH = "//table[@id='items']//td[@class='state']"
+CHECKBOXES_XPATH = "//table[@id='items']//td[@class='select']/input"
+NEXT_PAGE_XPATH = "//button[@id='next']"
+CIDR_FIELD_XPATH = "//input[@id='cidr']"
+SUBMIT_BUTTON_XPATH = "//button[@id='submit']"
+DELAYED_BUTTON_XPATH = "//button[@id='delayed-button']"
+CONSOLE_TITLE = "Resources | Console"
+MENU_TITLES = {'menu-networking': "Networking | Console", 'menu-vcns': "Virtual Cloud Networks | Console"}
+
+
+class SyntheticConsole:
+    """
+    SyntheticConsole
+
+    Model of a console page: a paginated resource list, a create form, a navigation menu and a button that only
+    appears some time after the page loads. Rendered as HTML by serve_synthetic_console and simulated in process
+    by FakeConsoleDriver.
+    """
+
+    def __init__(self, rows=200, page_size=50, appear_delay=0.2, render_latency=0.0, compartments=50):
+        """
+        :param rows: Number of resources in the list
+        :param page_size: Resources shown per list page
+        :param appear_delay: Seconds after a page load before the delayed button appears
+        :param render_latency: Seconds the server waits before answering a page request
+        :param compartments: Number of compartments in the compartment dropdown
+        """
+        self.rows = rows
+        self.page_size = page_size
+        self.appear_delay = appear_delay
+        self.render_latency = render_latency
+        self.items = [{'name': f"resource-{i:05d}", 'ocid': f"ocid1.resource.synthetic..{i:05d}",
+                       'state': 'AVAILABLE' if i % 7 else 'PROVISIONING'} for i in range(rows)]
+        self.compartments = [f"compartment-{i:04d}" for i in range(compartments)]
+
+    @property
+    def pages(self):
+        return max(1, -(-self.rows // self.page_size))
+
+    def page_items(self, page):
+        """
+        page_items
+
+        :param page: Page number, counting from 1
+        :return: Resources shown on that page
+        """
+        return self.items[(page - 1) * self.page_size:page * self.page_size]
+
+    def render(self, page=1):
+        """
+        render
+
+        :param page: Page number, counting from 1
+        :return: HTML of the console page
+        """
+        rows = "".join(
+            f"<tr><td class='select'><input type='checkbox'></td><td class='name'>{escape(item['name'])}</td>"
+            f"<td class='ocid'>{escape(item['ocid'])}</td><td class='state'>{escape(item['state'])}</td></tr>"
+            for item in self.page_items(page))
+        next_button = (f"<button id='next' onclick=\"location.href='/console?page={page + 1}'\">Next</button>"
+                       if page < self.pages else "<button id='next' disabled>Next</button>")
+        menu = "".join(f"<button id='{menu_id}' onclick=\"document.title='{escape(title)}'\">{menu_id}</button>"
+                       for menu_id, title in MENU_TITLES.items())
+        compartments = "".join(f"<li>{escape(name)}</li>" for name in self.compartments)
+        return f"""<!DOCTYPE html>
+<html><head><title>{CONSOLE_TITLE}</title></head><body>
+<nav>{menu}</nav>
+<table id='items'><tbody>{rows}</tbody></table>
+{next_button}
+<form onsubmit='return false'>
+<input id='display-name' class='display-name'><input id='description'><input id='cidr'>
+<button id='submit' type='button' onclick='this.remove()'>Create</button>
+</form>
+<div id='compartment'><span>{escape(self.compartments[0])}</span></div>
+<ul id='compartments'>{compartments}</ul>
+<script>
+setTimeout(function () {{
+    var button = document.createElement('button');
+    button.id = 'delayed-button';
+    button.className = 'delayed';
+    button.textContent = 'Ready';
+    document.body.appendChild(button);
+}}, {int(self.appear_delay * 1000)});
+</script>
+</body></html>"""
+
+
+def serve_synthetic_console(console, port=0):
+    """
+    serve_synthetic_console
+
+    Serves the synthetic console over HTTP from a background thread, at /console?page=N
+
+    :param console: SyntheticConsole to serve
+    :param port: Port to listen on. 0 picks a free one
+    :return: The server, to shut down when done, and the URL of the first console page
+    :rtype: Tuple
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            request = urlparse(self.path)
+            if request.path not in ('/', '/console'):
+                self.send_error(404)
+                return
+            page = int(parse_qs(request.query).get('page', ['1'])[0])
+            sleep(console.render_latency)
+            body = console.render(page).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, name='synthetic-console', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/console"
+
+
+class FakeElement:
+    """
+    FakeElement
+
+    WebElement stand-in for FakeConsoleDriver. Every method call counts as a command.
+    """
+
+    def __init__(self, driver, key, text='', tag_name='div', attributes=None, on_click=None):
+        self._driver = driver
+        self.key = key
+        self._text = text
+        self.tag_name = tag_name
+        self.attributes = dict(attributes or {})
+        self.value = ''
+        self.checked = False
+        self._on_click = on_click
+        self._generation = driver.generation
+
+    @property
+    def text(self):
+        self._command('getElementText')
+        return self._text
+
+    def click(self):
+        self._command('clickElement')
+        if self.tag_name == 'input' and self.attributes.get('type') == 'checkbox':
+            self.checked = not self.checked
+        if self._on_click is not None:
+            self._on_click()
+
+    def send_keys(self, *values):
+        self._command('sendKeysToElement')
+        self.value += "".join(str(value) for value in values)
+
+    def clear(self):
+        self._command('clearElement')
+        self.value = ''
+
+    def is_displayed(self):
+        self._command('isElementDisplayed')
+        return True
+
+    def is_enabled(self):
+        self._command('isElementEnabled')
+        return not self.attributes.get('disabled')
+
+    def is_selected(self):
+        self._command('isElementSelected')
+        return self.checked
+
+    def get_attribute(self, name):
+        self._command('getElementAttribute')
+        return self.value if name == 'value' else self.attributes.get(name)
+
+    def _command(self, name):
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        self._driver.command(name)
+        if self._generation != self._driver.generation:
+            raise StaleElementReferenceException(f"{self.key} is from a previous page")
+
+
+class _FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        self._driver.command('switchToWindow')
+
+
+class FakeConsoleDriver:
+    """
+    FakeConsoleDriver
+
+    In-process WebDriver stand-in simulating a SyntheticConsole page. It answers element lookups for the synthetic
+    console locators and the scripts base_ui_utils runs, counts every command it receives and sleeps for
+    command_latency on each one to model the WebDriver round trip.
+    """
+
+    def __init__(self, console, command_latency=0.0):
+        """
+        :param console: SyntheticConsole to simulate
+        :param command_latency: Seconds each command takes
+        """
+        self.console = console
+        self.command_latency = command_latency
+        self.commands = 0
+        self.command_counts = {}
+        self.generation = 0
+        self.switch_to = _FakeSwitchTo(self)
+        self._extra_locators = self._console_constant_locators()
+        self._css_xpaths = {base_ui_utils.xpath_to_css(xpath): xpath for xpath in (
+            NAME_CELLS_XPATH, OCID_CELLS_XPATH, STATE_CELLS_XPATH, CHECKBOXES_XPATH, NEXT_PAGE_XPATH, CIDR_FIELD_XPATH,
+            SUBMIT_BUTTON_XPATH, DELAYED_BUTTON_XPATH, *self._extra_locators)}
+        self.load_page(1)
+
+    # Page state
+
+    def load_page(self, page):
+        """
+        load_page
+
+        Simulates navigating to a console page, making every element from the previous page stale
+
+        :param page: Page number, counting from 1
+        """
+        self.generation += 1
+        self.page = page
+        self.loaded_at = monotonic()
+        self._title = CONSOLE_TITLE
+        self._submit_present = True
+        self._selected_compartment = self.console.compartments[0]
+        self._elements = {}
+
+    def command(self, name):
+        """
+        command
+
+        Counts a WebDriver command and waits for the simulated round trip
+
+        :param name: Name of the command
+        """
+        self.commands += 1
+        self.command_counts[name] = self.command_counts.get(name, 0) + 1
+        if self.command_latency:
+            sleep(self.command_latency)
+
+    def reset_counts(self):
+        self.commands = 0
+        self.command_counts = {}
+
+    # WebDriver surface
+
+    @property
+    def title(self):
+        self.command('getTitle')
+        return self._title
+
+    @property
+    def current_url(self):
+        self.command('getCurrentUrl')
+        return f"fake://console?page={self.page}"
+
+    @property
+    def window_handles(self):
+        self.command('getWindowHandles')
+        return ['main']
+
+    def get(self, url):
+        self.command('get')
+        query = parse_qs(urlparse(url).query)
+        self.load_page(int(query.get('page', ['1'])[0]))
+
+    def find_element(self, by, locator):
+        from selenium.common.exceptions import NoSuchElementException
+
+        elements = self._find(by, locator)
+        self.command('findElement')
+        if not elements:
+            raise NoSuchElementException(f"No element {by} {locator}")
+        return elements[0]
+
+    def find_elements(self, by, locator):
+        self.command('findElements')
+        return self._find(by, locator)
+
+    def find_element_by_id(self, element_id):
+        return self.find_element('id', element_id)
+
+    def find_element_by_xpath(self, xpath):
+        return self.find_element('xpath', xpath)
+
+    def find_element_by_class_name(self, class_name):
+        return self.find_element('class name', class_name)
+
+    def find_elements_by_xpath(self, xpath):
+        return self.find_elements('xpath', xpath)
+
+    def execute_script(self, script, *args):
+        self.command('executeScript')
+        if script is base_ui_utils._READ_ELEMENTS_SCRIPT:
+            return [{'element': element, 'text': element._text, 'attributes': {name: element.attributes.get(name)
+                                                                                for name in args[1]},
+                     'displayed': True, 'enabled': True, 'selected': element.checked}
+                    for element in self._find('xpath', args[0])]
+        if script is base_ui_utils._READ_LIST_PAGE_SCRIPT:
+            names = self._find('xpath', args[0])
+            next_buttons = self._find('xpath', args[3])
+            return {'names': [element._text for element in names], 'name_elements': names,
+                    'ocids': [element._text for element in self._find('xpath', args[1])],
+                    'states': [element._text for element in self._find('xpath', args[2])], 'paired': False,
+                    'next': next_buttons[0] if next_buttons else None,
+                    'next_enabled': bool(next_buttons) and self.page < self.console.pages}
+        if script is base_ui_utils._FILL_FORM_SCRIPT:
+            return self._fill_form(args[0])
+        if script is base_ui_utils._PAGE_SNAPSHOT_SCRIPT:
+            return {'html': self.console.render(self.page), 'version': self.generation,
+                    'url': f"fake://console?page={self.page}"}
+        if script is base_ui_utils._PAGE_VERSION_SCRIPT:
+            return self.generation
+        if script is base_ui_utils._LIST_ITEM_NAMES_SCRIPT:
+            return list(self.console.compartments)
+        if script is base_ui_utils._CLICK_LIST_ITEM_SCRIPT:
+            names = self.console.compartments
+            if args[2] is None and args[1] not in names:
+                return False
+            if args[2] is not None and (args[2] >= len(names) or names[args[2]] != args[1]):
+                return False
+            self._selected_compartment = args[1]
+            return True
+        return None
+
+    def execute_async_script(self, script, *args):
+        self.command('executeAsyncScript')
+        if script is base_ui_utils._OBSERVE_XPATH_SCRIPT:
+            deadline = monotonic() + args[1] / 1000
+            while not self._find('xpath', args[0]) and monotonic() < deadline:
+                sleep(0.005)
+            return bool(self._find('xpath', args[0]))
+        return None
+
+    def set_script_timeout(self, seconds):
+        self.command('setScriptTimeout')
+
+    def delete_all_cookies(self):
+        self.command('deleteAllCookies')
+
+    def close(self):
+        self.command('closeWindow')
+
+    def quit(self):
+        self.command('quit')
+
+    def get_screenshot_as_png(self):
+        self.command('screenshot')
+        return f"synthetic screenshot of page {self.page} at {monotonic()}".encode()
+
+    def save_screenshot(self, filename):
+        with open(filename, 'wb') as screenshot:
+            screenshot.write(self.get_screenshot_as_png())
+        return True
+
+    # Simulated page
+
+    def _find(self, by, locator):
+        if by == 'css selector':
+            by, locator = 'xpath', self._css_xpaths.get(locator, locator)
+        key = (by, locator)
+        if key in self._elements:
+            return self._elements[key]
+        elements = self._build(by, locator)
+        if elements is not None and key != ('xpath', DELAYED_BUTTON_XPATH):
+            self._elements[key] = elements
+        return elements or []
+
+    def _build(self, by, locator):
+        items = self.console.page_items(self.page)
+        columns = {NAME_CELLS_XPATH: 'name', OCID_CELLS_XPATH: 'ocid', STATE_CELLS_XPATH: 'state'}
+        if by == 'xpath' and locator in columns:
+            return [FakeElement(self, key=(locator, i), text=item[columns[locator]], tag_name='td')
+                    for i, item in enumerate(items)]
+        if by == 'xpath' and locator == CHECKBOXES_XPATH:
+            return [FakeElement(self, key=(locator, i), tag_name='input', attributes={'type': 'checkbox'})
+                    for i in range(len(items))]
+        if (by, locator) in (('xpath', NEXT_PAGE_XPATH), ('id', 'next')):
+            return [FakeElement(self, 'next', 'Next', 'button', {'disabled': self.page >= self.console.pages},
+                                on_click=lambda: self.load_page(self.page + 1))]
+        if by == 'id' and locator in MENU_TITLES:
+            return [FakeElement(self, locator, locator, 'button', on_click=lambda: self._set_title(locator))]
+        if (by, locator) in (('id', 'display-name'), ('class name', 'display-name'), ('id', 'description'),
+                             ('xpath', CIDR_FIELD_XPATH)):
+            return [FakeElement(self, locator, tag_name='input')]
+        if (by, locator) in (('id', 'submit'), ('xpath', SUBMIT_BUTTON_XPATH)):
+            if not self._submit_present:
+                return []
+            return [FakeElement(self, 'submit', 'Create', 'button', on_click=self._remove_submit)]
+        if (by, locator) in (('id', 'delayed-button'), ('class name', 'delayed'), ('xpath', DELAYED_BUTTON_XPATH)):
+            if monotonic() - self.loaded_at < self.console.appear_delay:
+                return None
+            return [FakeElement(self, 'delayed-button', 'Ready', 'button')]
+        if by == 'xpath' and locator in self._extra_locators:
+            return self._extra_locators[locator]()
+        return []
+
+    def _console_constant_locators(self):
+        """
+        _console_constant_locators
+
+        Makes the compartment dropdown and list constants from the wider testware resolve on the fake page, when
+        those constants are importable, so the helpers that default to them can be benchmarked too
+        """
+        try:
+            constants = {name: getattr(base_ui_utils, name) for name in (
+                'DRG_DETAILS_COMPARTMENT_DROPDOWN', 'DRG_DETAILS_COMPARTMENT_SELECTION_LIST_XPATH',
+                'COMPARTMENT_RELOAD_BUTTON', 'DRG_ALREADY_SELECTED_COMPARTMENT_XPATH', 'NAMES_LIST_XPATH',
+                'OCID_OF_LIST_ITEM_XPATH', 'STATE_XPATH', 'NEXT_PAGE_BUTTONS_XPATH')}
+        except ImportError:
+            return {}
+        return {
+            constants['DRG_DETAILS_COMPARTMENT_DROPDOWN']: lambda: [FakeElement(self, 'dropdown', tag_name='div')],
+            constants['COMPARTMENT_RELOAD_BUTTON']: lambda: [FakeElement(self, 'reload', tag_name='button')],
+            constants['DRG_DETAILS_COMPARTMENT_SELECTION_LIST_XPATH']: lambda: [
+                FakeElement(self, ('compartment', i), name, 'li') for i, name in enumerate(self.console.compartments)],
+            constants['DRG_ALREADY_SELECTED_COMPARTMENT_XPATH']: lambda: [
+                FakeElement(self, 'selected', self._selected_compartment, 'span')],
+            constants['NAMES_LIST_XPATH']: lambda: self._build('xpath', NAME_CELLS_XPATH),
+            constants['OCID_OF_LIST_ITEM_XPATH']: lambda: self._build('xpath', OCID_CELLS_XPATH),
+            constants['STATE_XPATH']: lambda: self._build('xpath', STATE_CELLS_XPATH),
+            constants['NEXT_PAGE_BUTTONS_XPATH']: lambda: self._build('xpath', NEXT_PAGE_XPATH),
+        }
+
+    def _fill_form(self, specs):
+        elements = [self._find(spec['by'], spec['locator']) for spec in specs]
+        missing = [spec['locator'] for spec, found in zip(specs, elements) if not found]
+        if missing:
+            return {'missing': missing, 'results': []}
+        results = []
+        for spec, found in zip(specs, elements):
+            if spec['keys']:
+                results.append({'status': 'keys', 'value': None, 'valid': True, 'message': ''})
+                continue
+            found[0].value = spec['value']
+            results.append({'status': 'filled', 'value': spec['value'], 'valid': True, 'message': ''})
+        return {'missing': [], 'results': results}
+
+    def _remove_submit(self):
+        self._submit_present = False
+        self._elements.pop(('id', 'submit'), None)
+        self._elements.pop(('xpath', SUBMIT_BUTTON_XPATH), None)
+
+    def _set_title(self, menu_id):
+        self._title = MENU_TITLES[menu_id]
+
+
+def benchmark_cases(console):
+    """
+    benchmark_cases
+
+    One case per public helper in base_ui_utils. Each case is (name, needs_testware_constants, callable taking the
+    driver). The page is reloaded before every case, and before every repetition.
+
+    :param console: SyntheticConsole the cases run against
+    :return: The benchmark cases
+    :rtype: List of tuples
+    """
+    last_name = console.page_items(1)[-1]['name']
+    last_item = console.items[-1]
+    h = base_ui_utils
+    return [
+        ('clear_field_by_class_name', False, lambda d: h.clear_field_by_class_name(d, 'display-name')),
+        ('clear_field_by_id', False, lambda d: h.clear_field_by_id(d, 'display-name')),
+        ('clear_field_by_xpath', False, lambda d: h.clear_field_by_xpath(d, CIDR_FIELD_XPATH)),
+        ('click_by_class', False, lambda d: h.click_by_class(d, 'display-name')),
+        ('click_element_by_id', False, lambda d: h.click_element_by_id(d, 'submit')),
+        ('click_element_by_xpath', False, lambda d: h.click_element_by_xpath(d, SUBMIT_BUTTON_XPATH)),
+        ('click_then_wait_for_element_not_to_be_present', False,
+         lambda d: h.click_then_wait_for_element_not_to_be_present(d, SUBMIT_BUTTON_XPATH, max_wait_time=5)),
+        ('find_and_click_checkbox_from_display_name', False,
+         lambda d: h.find_and_click_checkbox_from_display_name(d, last_name, NAME_CELLS_XPATH, CHECKBOXES_XPATH)),
+        ('find_by_id', False, lambda d: h.find_by_id(d, 'display-name')),
+        ('find_by_xpath', False, lambda d: h.find_by_xpath(d, CIDR_FIELD_XPATH)),
+        ('find_list_row', True, lambda d: h.find_list_row(d, ocid=last_item['ocid'])),
+        ('fill_in_text_element_by_class', False, lambda d: h.fill_in_text_element_by_class(d, 'display-name', 'x')),
+        ('fill_in_text_element_by_id', False, lambda d: h.fill_in_text_element_by_id(d, 'display-name', 'x')),
+        ('fill_in_text_element_by_xpath', False, lambda d: h.fill_in_text_element_by_xpath(d, CIDR_FIELD_XPATH, 'x')),
+        ('fill_form', False, lambda d: h.fill_form(d, {('id', 'display-name'): 'vcn', ('id', 'description'): 'bench',
+                                                       CIDR_FIELD_XPATH: '10.0.0.0/16'})),
+        ('generate_contains_string', True, lambda d: h.generate_contains_string('resource')),
+        ('get_element_by_xpath', False, lambda d: h.get_element_by_xpath(d, NAME_CELLS_XPATH)),
+        ('get_element_xpath_by_text_only', False, lambda d: h.get_element_xpath_by_text_only('resource')),
+        ('get_elements_by_xpath', False, lambda d: h.get_elements_by_xpath(d, NAME_CELLS_XPATH)),
+        ('get_first_element_of_list_by_xpath', False,
+         lambda d: h.get_first_element_of_list_by_xpath(d, NAME_CELLS_XPATH)),
+        ('get_texts_by_xpath', False, lambda d: h.get_texts_by_xpath(d, NAME_CELLS_XPATH)),
+        ('is_driver_healthy', False, lambda d: h.is_driver_healthy(d)),
+        ('iter_list_rows', False, lambda d: sum(1 for _ in h.iter_list_rows(
+            d, NAME_CELLS_XPATH, OCID_CELLS_XPATH, STATE_CELLS_XPATH, NEXT_PAGE_XPATH))),
+        ('launch_menu', False, lambda d: h.launch_menu(d, MENU_TITLES['menu-vcns'], list(MENU_TITLES))),
+        ('open_url', False, lambda d: h.open_url(d, 'fake://console?page=1')),
+        ('read_elements_by_xpath', False, lambda d: h.read_elements_by_xpath(d, NAME_CELLS_XPATH, ['class'])),
+        ('reset_driver_state', False, lambda d: h.reset_driver_state(d)),
+        ('select_compartment', True, lambda d: h.select_compartment(d, console.compartments[-1])),
+        ('take_page_snapshot', False, lambda d: h.take_page_snapshot(d).texts(NAME_CELLS_XPATH)),
+        ('take_screenshot', False, lambda d: h.take_screenshot(d, 'benchmark.png')),
+        ('wait_for_page_changes', False, lambda d: (h.click_element_by_id(d, 'menu-networking'),
+                                                    h.wait_for_page_changes(d, 'Networking', 5))),
+        ('wait_for_by_id_then_click', False, lambda d: h.wait_for_by_id_then_click(d, 'delayed-button', 5)),
+        ('wait_for_by_xpath_then_click', False, lambda d: h.wait_for_by_xpath_then_click(d, DELAYED_BUTTON_XPATH, 5)),
+        ('wait_for_by_id_then_fill_in', False, lambda d: h.wait_for_by_id_then_fill_in(d, 'display-name', 'x', 5)),
+        ('wait_for_by_xpath', False, lambda d: h.wait_for_by_xpath(d, DELAYED_BUTTON_XPATH, 5)),
+        ('wait_for_by_xpath_then_fill_in', False,
+         lambda d: h.wait_for_by_xpath_then_fill_in(d, CIDR_FIELD_XPATH, 'x', 5)),
+        ('wait_for_by_xpath_then_get_text', False,
+         lambda d: h.wait_for_by_xpath_then_get_text(d, DELAYED_BUTTON_XPATH, 5)),
+        ('wait_for_element_not_to_be_clickable', False, lambda d: (
+            h.click_element_by_xpath(d, SUBMIT_BUTTON_XPATH),
+            h.wait_for_element_not_to_be_clickable(d, SUBMIT_BUTTON_XPATH, max_wait_time=5))),
+        ('wait_for_element_to_be_clickable', False,
+         lambda d: h.wait_for_element_to_be_clickable(d, 'delayed-button', 'id', 5)),
+        ('wait_for_xpath_with_observer', False, lambda d: h.wait_for_xpath_with_observer(d, DELAYED_BUTTON_XPATH, 5)),
+    ]
+
+
+def run_benchmarks(console, driver, url, repeat=3, command_counter=None):
+    """
+    run_benchmarks
+
+    Runs every benchmark case against a driver
+
+    :param console: SyntheticConsole the driver is showing
+    :param driver: FakeConsoleDriver, or a real driver pointed at serve_synthetic_console
+    :param url: URL of the first console page, loaded before every repetition
+    :param repeat: Number of timed repetitions per case
+    :param command_counter: Callable returning the number of commands issued so far. Defaults to driver.commands
+    :return: Per case mean wall seconds, commands per repetition and status ('ok', 'failed: ...' or 'skipped...')
+    :rtype: Dictionary
+    """
+    count = command_counter or (lambda: driver.commands)
+    fake = isinstance(driver, FakeConsoleDriver)
+    results = {}
+    for name, needs_constants, case in benchmark_cases(console):
+        if needs_constants and not _testware_constants_available():
+            results[name] = {'status': 'skipped', 'wall_seconds': None, 'commands': None}
+            continue
+        if not fake and name in ('find_list_row', 'select_compartment'):
+            results[name] = {'status': 'skipped', 'wall_seconds': None, 'commands': None}
+            continue
+        wall = 0.0
+        commands = 0
+        status = 'ok'
+        for _ in range(repeat):
+            driver.get(url)
+            start_commands = count()
+            start = monotonic()
+            try:
+                case(driver)
+            except ImportError as e:
+                status = f"skipped: {e}"
+                break
+            except Exception as e:
+                status = f"failed: {type(e).__name__}: {e}"
+                break
+            wall += monotonic() - start
+            commands += count() - start_commands
+        results[name] = {'status': status, 'wall_seconds': wall / repeat if status == 'ok' else None,
+                         'commands': commands // repeat if status == 'ok' else None}
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2, min_wall_delta=0.005):
+    """
+    compare_to_baseline
+
+    Flags cases that got slower than the baseline by more than tolerance, issue more commands, or stopped passing
+
+    :param results: Results from run_benchmarks
+    :param baseline: Results saved from an earlier version
+    :param tolerance: Allowed relative wall time increase
+    :param min_wall_delta: Wall time increases below this many seconds are treated as noise
+    :return: Description of each regression
+    :rtype: List of strings
+    """
+    regressions = []
+    for name, before in baseline.items():
+        after = results.get(name)
+        if after is None or before['status'] != 'ok':
+            continue
+        if after['status'] != 'ok':
+            regressions.append(f"{name}: was ok, now {after['status']}")
+            continue
+        if after['commands'] > before['commands']:
+            regressions.append(f"{name}: commands went from {before['commands']} to {after['commands']}")
+        slower_by = after['wall_seconds'] - before['wall_seconds']
+        if slower_by > before['wall_seconds'] * tolerance and slower_by > min_wall_delta:
+            regressions.append(f"{name}: wall time went from {before['wall_seconds']:.4f}s to "
+                               f"{after['wall_seconds']:.4f}s")
+    return regressions
+
+
+@contextmanager
+def _temporary_screenshots():
+    """
+    _temporary_screenshots
+
+    Sends the screenshots the helpers take to a temporary directory, removed afterwards, and puts the screenshot
+    writer the caller had back
+    """
+    with tempfile.TemporaryDirectory(prefix='base_ui_benchmark_') as directory:
+        with base_ui_utils._screenshot_writer_lock:
+            previous = base_ui_utils._screenshot_writer
+            base_ui_utils._screenshot_writer = base_ui_utils.ScreenshotWriter(directory)
+        try:
+            yield directory
+        finally:
+            with base_ui_utils._screenshot_writer_lock:
+                writer, base_ui_utils._screenshot_writer = base_ui_utils._screenshot_writer, previous
+            writer.close()
+
+
+def _testware_constants_available():
+    """
+    _testware_constants_available
+
+    :return: Whether the ui_constants modules of the wider testware can be imported
+    """
+    try:
+        base_ui_utils.CONTAINS_TEXT_HEADER
+        base_ui_utils.DRG_DETAILS_COMPARTMENT_DROPDOWN
+        base_ui_utils.NAMES_LIST_XPATH
+    except ImportError:
+        return False
+    return True
+
+
+def _count_real_driver_commands(driver):
+    """
+    _count_real_driver_commands
+
+    Counts the commands a real driver issues by wrapping its execute method
+
+    :param driver: Webdriver for the browser
+    :return: Callable returning the number of commands issued so far
+    """
+    issued = [0]
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        issued[0] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    return lambda: issued[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the base_ui_utils helpers against a synthetic console")
+    parser.add_argument('--rows', type=int, default=200, help="Resources in the synthetic list")
+    parser.add_argument('--page-size', type=int, default=50, help="Resources per list page")
+    parser.add_argument('--appear-delay', type=float, default=0.2, help="Seconds before the delayed button appears")
+    parser.add_argument('--render-latency', type=float, default=0.0, help="Seconds the server takes per page")
+    parser.add_argument('--latency-ms', type=float, default=1.0, help="Simulated round trip per fake command")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repetitions per helper")
+    parser.add_argument('--browser', help="Run against a real browser instead of the fake driver, e.g chrome")
+    parser.add_argument('--profile', help="Driver profile for --browser, see base_ui_utils.DRIVER_PROFILES")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against results saved from an earlier version")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative wall time increase")
+    parser.add_argument('--serve', action='store_true', help="Only serve the synthetic console")
+    parser.add_argument('--port', type=int, default=0, help="Port for the synthetic console server")
+    args = parser.parse_args(argv)
+
+    console = SyntheticConsole(args.rows, args.page_size, args.appear_delay, args.render_latency)
+    if args.serve:
+        server, url = serve_synthetic_console(console, args.port)
+        print(f"Serving the synthetic console at {url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    with _temporary_screenshots():
+        if args.browser:
+            server, url = serve_synthetic_console(console, args.port)
+            driver = base_ui_utils.setup_driver(args.browser, profile=args.profile)
+            try:
+                results = run_benchmarks(console, driver, url, args.repeat, _count_real_driver_commands(driver))
+            finally:
+                driver.quit()
+                server.shutdown()
+        else:
+            url = 'fake://console?page=1'
+            results = run_benchmarks(console, FakeConsoleDriver(console, args.latency_ms / 1000), url, args.repeat)
+
+    print(f"{'helper':<48} {'wall ms':>10} {'commands':>9}  status")
+    for name, result in sorted(results.items()):
+        wall = f"{result['wall_seconds'] * 1000:.2f}" if result['wall_seconds'] is not None else '-'
+        commands = result['commands'] if result['commands'] is not None else '-'
+        print(f"{name:<48} {wall:>10} {commands:>9}  {result['status']}")
+    if args.save:
+        with open(args.save, 'w') as results_out:
+            json.dump(results, results_out, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline_in:
+            regressions = compare_to_baseline(results, json.load(baseline_in), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
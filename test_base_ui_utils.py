@@ -0,0 +1,756 @@
+import base64
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import base_ui_utils
+
+# Cold import budget of base_ui_utils, in seconds. Heavy dependencies must stay lazily loaded to fit in it.
+IMPORT_BUDGET_SECONDS = float(os.environ.get('UI_IMPORT_BUDGET_SECONDS', 0.5))
+
+
+@pytest.mark.parametrize('xpath', [
+    '//a/ancestor-or-self::div',
+    '//x/descendant-or-self::*',
+    '//oj-select-or-combo',
+    "//div[@id='a' or @id='b']",
+    '//order/android',
+])
+def test_normalize_locator_accepts_names_containing_and_or(xpath):
+    assert base_ui_utils._normalize_locator(xpath, 'xpath').by in ('xpath', 'css selector')
+
+
+@pytest.mark.parametrize('xpath', [
+    "//a = 'x'",
+    '//a or //b',
+    '//div/@id',
+    '//div/text()',
+])
+def test_normalize_locator_rejects_non_element_xpaths(xpath):
+    with pytest.raises(ValueError):
+        base_ui_utils._normalize_locator(xpath, 'xpath')
+
+
+@pytest.mark.parametrize('xpath, css', [
+    ('//li[2]', 'li:nth-of-type(2)'),
+    ('//ul/*[1]', 'ul > *:nth-child(1)'),
+    ('//li[last()]', 'li:last-of-type'),
+    ("//li[2][@class='x']", 'li:nth-of-type(2)[class="x"]'),
+    ("//div[contains(concat(' ', normalize-space(@class), ' '), ' btn ')]", 'div.btn'),
+    ('//div[contains(concat(" ", normalize-space(@class), " "), " 2col ")]', 'div[class~="2col"]'),
+    ("//div[contains(@class, 'btn')]", 'div[class*="btn"]'),
+    ("//a[starts-with(@href, '/compute')]", 'a[href^="/compute"]'),
+    ("//table[@id='items']//td", 'table#items td'),
+    ("//div[@id='1st']", 'div[id="1st"]'),
+    ("//div[@id='a.b']", 'div[id="a.b"]'),
+    ('//div[@title="it\'s"]', 'div[title="it\'s"]'),
+    ("//div[@title='say \"hi\"']", 'div[title="say \\"hi\\""]'),
+    ("//input[@type='text' and @disabled]", 'input[type="text"][disabled]'),
+    ('/html/body', 'html > body'),
+    ('/*', ':root'),
+    ("//li[@class='x'][2]", None),
+    ('//li[1 and @class]', None),
+    ('.//div', None),
+    ('/body', None),
+    ('//a.b', None),
+    ("//div[contains(@class, '')]", None),
+    ("//div[text()='Save']", None),
+    ('//div[position()=2]', None),
+    ("//div[@id='a' or @id='b']", None),
+    ('//a/ancestor-or-self::div', None),
+    ('//a | //b', None),
+])
+def test_xpath_to_css_rewrites_only_equivalent_selectors(xpath, css):
+    assert base_ui_utils._xpath_to_css(xpath) == css
+
+
+def test_locator_constants_are_validated_when_their_module_loads(monkeypatch):
+    module = types.ModuleType('fake_ui_constants')
+    module.SAVE_BUTTON_XPATH = "//button[@id='save']"
+    module.CANCEL_BUTTON_ID = '//button'
+    monkeypatch.setitem(sys.modules, 'fake_ui_constants', module)
+    with pytest.raises(ValueError, match='CANCEL_BUTTON_ID'):
+        base_ui_utils._load_locator_constants('fake_ui_constants')
+    module.CANCEL_BUTTON_ID = 'cancel'
+    base_ui_utils._load_locator_constants('fake_ui_constants')
+    assert base_ui_utils.get_locator_registry().get('CANCEL_BUTTON_ID') == ('id', 'cancel')
+
+
+def test_cold_import_stays_within_budget_and_loads_no_heavy_dependencies():
+    script = ("import json, sys, time; start = time.perf_counter(); import base_ui_utils; "
+              "print(json.dumps([time.perf_counter() - start, sorted(sys.modules)]))")
+    output = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            check=True, capture_output=True, text=True).stdout
+    seconds, modules = json.loads(output.splitlines()[-1])
+    heavy = [name for name in modules if name == 'selenium' or name.startswith(('selenium.', 'lib.pca', 'tests.'))]
+    assert not heavy, f"Importing base_ui_utils loaded {heavy}"
+    assert seconds < IMPORT_BUDGET_SECONDS, f"Cold import took {seconds:.3f}s, budget is {IMPORT_BUDGET_SECONDS}s"
+
+
+class _DetachableElement:
+    def __init__(self):
+        self.attached = True
+        self.clicks = 0
+
+    def is_enabled(self):
+        if not self.attached:
+            raise base_ui_utils._exceptions.StaleElementReferenceException('detached')
+        return True
+
+    def click(self):
+        self.is_enabled()
+        self.clicks += 1
+
+
+class _FindCountingDriver:
+    def __init__(self):
+        self.finds = 0
+
+    def find_element(self, by, locator):
+        self.finds += 1
+        return _DetachableElement()
+
+
+def test_find_helpers_do_not_return_cached_elements_from_a_previous_page():
+    driver = _FindCountingDriver()
+    base_ui_utils.enable_element_cache(driver)
+    first = base_ui_utils.find_by_id(driver, 'save')
+    assert base_ui_utils.find_by_id(driver, 'save') is first
+    first.attached = False
+    second = base_ui_utils.find_by_id(driver, 'save')
+    assert second is not first and second.attached
+    assert driver.finds == 2
+
+
+def test_clicking_a_stale_cached_element_finds_it_again_without_retrying():
+    driver = _FindCountingDriver()
+    base_ui_utils.enable_element_cache(driver)
+    stale = base_ui_utils.find_by_id(driver, 'save')
+    stale.attached = False
+    base_ui_utils.set_retry_policy(base_ui_utils.RetryPolicy(retry_on=()), budget=0)
+    try:
+        base_ui_utils.click_element_by_id(driver, 'save')
+        assert base_ui_utils.get_retry_metrics()['spent'] == 0
+    finally:
+        base_ui_utils.set_retry_policy()
+    fresh = base_ui_utils.find_by_id(driver, 'save')
+    assert fresh is not stale and fresh.clicks == 1
+    assert driver.finds == 2
+
+
+class _ScriptedExecutor:
+    ANSWERS = {
+        'newSession': {'value': {'sessionId': 'live', 'capabilities': {'browserName': 'chrome'}}},
+        'getTitle': {'value': 'Instances | Console'},
+        'findElement': {'value': {'element-6066-11e4-a52e-4f735466cecf': 'name-cell'}},
+        'getElementText': {'value': 'vcn-a'},
+    }
+
+    def execute(self, command, params):
+        return json.loads(json.dumps(self.ANSWERS.get(command, {'value': None})))
+
+
+def _read_instances_page(driver):
+    base_ui_utils.open_url(driver, 'https://console.example.com/instances')
+    return driver.title, base_ui_utils.find_by_id(driver, 'name').text
+
+
+def test_a_recorded_flow_replays_to_the_same_results(tmp_path):
+    from selenium import webdriver
+
+    driver = webdriver.Remote(command_executor=_ScriptedExecutor(), desired_capabilities={})
+    trace_path = str(tmp_path / 'flow.json.gz')
+    with base_ui_utils.record_commands(driver, trace_path) as recorder:
+        recorded = _read_instances_page(driver)
+    assert [command[0] for command in recorder.commands] == ['get', 'getTitle', 'findElement', 'getElementText']
+    replay = base_ui_utils.replay_driver(trace_path, check_params=True)
+    assert _read_instances_page(replay) == recorded == ('Instances | Console', 'vcn-a')
+    with pytest.raises(ValueError, match='past the end'):
+        replay.title
+
+
+def _compartment_index():
+    return base_ui_utils.CompartmentIndex([
+        {'id': 'root', 'name': 'tenancy', 'compartment_id': None},
+        {'id': 'net', 'name': 'network', 'compartment_id': 'root'},
+        {'id': 'net-prod', 'name': 'prod', 'compartment_id': 'net'},
+        {'id': 'app', 'name': 'App', 'compartment_id': 'root'},
+        {'id': 'app-prod', 'name': 'prod', 'compartment_id': 'app'},
+    ])
+
+
+def test_compartment_index_positions_follow_the_listed_dom_order():
+    index = _compartment_index()
+    listed = ['tenancy', 'network', 'prod', 'App', 'prod']
+    assert index.position(index.resolve('network/prod')[2], listed) == 2
+    assert index.position(index.resolve('App/prod')[2], listed) == 4
+    listed = ['tenancy', 'App', 'prod', 'network', 'prod']
+    assert index.position(index.resolve('network/prod')[2], listed) == 4
+    with pytest.raises(ValueError):
+        index.position(index.resolve('network/prod')[2], ['tenancy', 'unknown', 'network', 'prod'])
+
+
+def test_selected_compartment_shortcut_needs_an_unambiguous_match():
+    index = _compartment_index()
+    path = index.resolve('App/prod')[2]
+    assert not base_ui_utils._is_selected_compartment('prod', path, index)
+    assert base_ui_utils._is_selected_compartment('tenancy/App/prod', path, index)
+    assert not base_ui_utils._is_selected_compartment('tenancy/network/prod', path, index)
+    assert base_ui_utils._is_selected_compartment('App', index.resolve('App')[2], index)
+
+
+def test_routes_are_kept_per_region_without_their_query_string():
+    url = 'https://console.example.com/networking/vcns?region=us-east&compartmentId=ocid1.compartment.a'
+    assert base_ui_utils._route_path(url) == '/networking/vcns'
+    assert base_ui_utils._route_scope(url) == 'https://console.example.com region=us-east'
+    assert base_ui_utils._route_scope(url.replace('us-east', 'eu-west')) != base_ui_utils._route_scope(url)
+    assert base_ui_utils._route_scope(url, 'tenancy-a') == 'https://console.example.com tenancy-a'
+    assert (base_ui_utils._route_url('https://console.example.com/?region=eu-west&page=2', '/networking/vcns')
+            == 'https://console.example.com/networking/vcns?region=eu-west')
+
+
+def test_route_cache_without_a_file_stays_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    routes = base_ui_utils.RouteCache()
+    routes.remember('https://console.example.com', 'VCNs', '/networking/vcns')
+    assert routes.get('https://console.example.com', 'VCNs') == '/networking/vcns'
+    routes.forget('https://console.example.com', 'VCNs')
+    assert routes.get('https://console.example.com', 'VCNs') is None
+    assert not list(tmp_path.iterdir())
+
+
+class _QuitRecordingDriver:
+    def __init__(self, options):
+        self.options = options
+        self.quit_calls = 0
+
+    def execute_cdp_cmd(self, command, params):
+        return {}
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def test_fast_profile_gives_each_driver_its_own_disk_cache(monkeypatch):
+    monkeypatch.setattr(base_ui_utils, '_setup_driver_options', lambda browser, options: _QuitRecordingDriver(options))
+    drivers = [base_ui_utils.setup_driver(profile='fast') for _ in range(2)]
+    cache_dirs = [next(argument.split('=', 1)[1] for argument in driver.options.arguments
+                       if argument.startswith('--disk-cache-dir=')) for driver in drivers]
+    assert cache_dirs[0] != cache_dirs[1] and all(os.path.isdir(path) for path in cache_dirs)
+    for driver in drivers:
+        driver.quit()
+    assert not any(os.path.exists(path) for path in cache_dirs)
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_helper_log_records_carry_the_time_and_thread_of_the_call_and_repeats_are_per_call():
+    collector = _RecordCollector()
+    logger = logging.getLogger(base_ui_utils.__name__)
+    logger.addHandler(collector)
+    helper_log = base_ui_utils.HelperLog('INFO', repeat_every=3, background=True)
+    try:
+        before = time.time()
+        helper_log.info("Checking row %s", 1)
+        helper_log.flush()
+        record = collector.records.pop()
+        assert record.threadName == threading.current_thread().name and record.created >= before
+        assert record.funcName.startswith('test_helper_log_records_carry_the_time_and_thread_of_the_call')
+        assert record.getMessage() == 'Checking row 1'
+
+        def log_rows():
+            with helper_log.repeated('rows') as rows:
+                for row in range(4):
+                    rows.info("Checking row %s", row)
+
+        threads = [threading.Thread(target=log_rows) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        helper_log.flush()
+        messages = sorted(record.getMessage() for record in collector.records)
+        assert messages == sorted(['Checking row 0', 'Checking row 2 (seen 3 times)',
+                                   'Left out 2 of 4 records for rows'] * 2)
+        assert all(record.funcName == 'log_rows' for record in collector.records)
+    finally:
+        helper_log.close()
+        logger.removeHandler(collector)
+
+
+def test_a_timed_retry_spends_one_from_the_retry_budget():
+    base_ui_utils.set_retry_policy(base_ui_utils.RetryPolicy(base_delay=0.001, max_delay=0.001), budget=2)
+    failures = []
+
+    def attempt():
+        if len(failures) < 10:
+            failures.append(1)
+            raise base_ui_utils._exceptions.StaleElementReferenceException('stale')
+        return 'clicked'
+
+    try:
+        assert base_ui_utils._retry(object(), attempt, 'save button', wait_for_seconds=5) == 'clicked'
+        assert base_ui_utils.get_retry_metrics()['spent'] == 1
+    finally:
+        base_ui_utils.set_retry_policy()
+
+
+class _ObservingDriver:
+    def __init__(self):
+        self.script_timeouts = []
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+
+    def execute_async_script(self, script, *args):
+        return True
+
+
+def test_observer_wait_puts_the_script_timeout_back():
+    driver = _ObservingDriver()
+    assert base_ui_utils.wait_for_xpath_with_observer(driver, "//div[@id='done']", wait_for_seconds=60) is True
+    assert driver.script_timeouts == [65, base_ui_utils.SCRIPT_TIMEOUT_SECONDS]
+    base_ui_utils.set_script_timeout(driver, 120)
+    base_ui_utils.wait_for_xpath_with_observer(driver, "//div[@id='done']", wait_for_seconds=10)
+    assert driver.script_timeouts[2:] == [120, 15, 120]
+
+
+class _LoadingDriver:
+    def __init__(self, titles):
+        self.titles = list(titles)
+
+    @property
+    def title(self):
+        return self.titles.pop(0) if len(self.titles) > 1 else self.titles[0]
+
+
+def test_async_waits_run_the_blocking_steps_without_sleeping_in_a_thread(monkeypatch):
+    import asyncio
+
+    def blocking_sleep(seconds):
+        raise AssertionError("An async wait slept on a pool thread")
+
+    monkeypatch.setattr(base_ui_utils, '_driver_clock', lambda driver: (time.monotonic, blocking_sleep))
+    monkeypatch.setattr(base_ui_utils, 'sleep', blocking_sleep)
+    driver = _LoadingDriver(['Loading', 'Loading', 'Loading', 'Instances'])
+    session = base_ui_utils.AsyncUiSession(driver)
+    asyncio.run(session.wait_for_page_changes('Instances', wait_for_seconds=5))
+    assert driver.title == 'Instances'
+    with pytest.raises(base_ui_utils._exceptions.TimeoutException):
+        asyncio.run(base_ui_utils.AsyncUiSession(_LoadingDriver(['Loading'])).wait_until(
+            lambda d: d.title == 'Instances', 0.2, 'the instances page'))
+
+
+class _InterceptedElement:
+    def __init__(self, failures):
+        self.failures = failures
+        self.clicks = 0
+
+    def click(self):
+        if self.failures:
+            self.failures -= 1
+            raise base_ui_utils._exceptions.ElementClickInterceptedException('spinner in the way')
+        self.clicks += 1
+
+
+class _OneElementDriver:
+    def __init__(self, element):
+        self.element = element
+
+    def find_element(self, by, locator):
+        return self.element
+
+
+def test_async_clicks_back_off_on_the_event_loop(monkeypatch):
+    import asyncio
+
+    def blocking_sleep(seconds):
+        raise AssertionError("An async click backed off on a pool thread")
+
+    monkeypatch.setattr(base_ui_utils, '_driver_clock', lambda driver: (time.monotonic, blocking_sleep))
+    monkeypatch.setattr(base_ui_utils, 'sleep', blocking_sleep)
+    element = _InterceptedElement(failures=2)
+    driver = _OneElementDriver(element)
+    base_ui_utils.set_retry_policy(base_ui_utils.RetryPolicy(base_delay=0.001, max_delay=0.001))
+    try:
+        asyncio.run(base_ui_utils.AsyncUiSession(driver).click_element_by_xpath("//button[@id='save']"))
+    finally:
+        base_ui_utils.set_retry_policy()
+    assert element.clicks == 1
+
+
+class _XpathRecordingDriver:
+    def __init__(self):
+        self.finds = []
+
+    def find_elements(self, by, locator):
+        self.finds.append((by, locator))
+        return []
+
+    def execute_script(self, script, *args):
+        raise AssertionError("Read the live page although a snapshot was given")
+
+
+class _TextSnapshot:
+    def __init__(self, texts):
+        self.texts_by_xpath = texts
+
+    def exists(self, xpath):
+        return bool(self.texts_by_xpath.get(xpath))
+
+    def texts(self, xpath):
+        return self.texts_by_xpath.get(xpath, [])
+
+    def text(self, xpath):
+        return self.texts(xpath)[0]
+
+
+def test_page_snapshots_query_the_live_page_with_the_same_xpath():
+    driver = _XpathRecordingDriver()
+    snapshot = base_ui_utils.PageSnapshot.__new__(base_ui_utils.PageSnapshot)
+    snapshot.driver = driver
+    snapshot.live_elements("//table[@id='items']//td")
+    assert driver.finds == [('xpath', "//table[@id='items']//td")]
+
+
+def test_text_helpers_read_from_a_page_snapshot():
+    driver = _XpathRecordingDriver()
+    snapshot = _TextSnapshot({'//td': ['vcn-a', 'vcn-b'], "//span[@id='state']": ['Available']})
+    assert base_ui_utils.get_texts_by_xpath(driver, '//td', snapshot=snapshot) == ['vcn-a', 'vcn-b']
+    state = base_ui_utils.wait_for_by_xpath_then_get_text(driver, "//span[@id='state']", snapshot=snapshot)
+    assert state == 'Available'
+    assert driver.finds == []
+
+
+class _LoggedInDriver:
+    current_url = 'https://console.example.com/compute/instances'
+
+    def execute_script(self, script, *args):
+        return {'local': {'theme': 'dark'}, 'session': {'tab': 'instances'}}
+
+    def get_cookies(self):
+        return [{'name': 'session', 'value': 's3cret', 'path': '/'}]
+
+
+def test_session_snapshots_are_encrypted_and_only_read_back_with_their_key(monkeypatch, tmp_path):
+    pytest.importorskip('cryptography.fernet')
+    monkeypatch.setattr(base_ui_utils, 'SESSION_SNAPSHOT_KEY_FILE', None)
+    monkeypatch.setenv('UI_SESSION_SNAPSHOT_KEY', base64.urlsafe_b64encode(b'1' * 32).decode())
+    snapshot_path = str(tmp_path / 'session.snapshot')
+    base_ui_utils.save_session_snapshot(_LoggedInDriver(), snapshot_path)
+    with open(snapshot_path, 'rb') as snapshot_in:
+        assert b's3cret' not in snapshot_in.read()
+    snapshot = base_ui_utils._read_session_snapshot(snapshot_path)
+    assert snapshot['cookies'] == _LoggedInDriver().get_cookies()
+    assert snapshot['local_storage'] == {'theme': 'dark'} and snapshot['url'] == _LoggedInDriver.current_url
+    monkeypatch.setenv('UI_SESSION_SNAPSHOT_KEY', base64.urlsafe_b64encode(b'2' * 32).decode())
+    assert base_ui_utils._read_session_snapshot(snapshot_path) is None
+
+
+@pytest.mark.parametrize('missing', ['package', 'key'])
+def test_ensure_logged_in_falls_back_to_the_ui_login_without_snapshot_support(monkeypatch, tmp_path, missing):
+    if missing == 'package':
+        monkeypatch.setitem(sys.modules, 'cryptography.fernet', None)
+    else:
+        pytest.importorskip('cryptography.fernet')
+        monkeypatch.delenv('UI_SESSION_SNAPSHOT_KEY', raising=False)
+        monkeypatch.setattr(base_ui_utils, 'SESSION_SNAPSHOT_KEY_FILE', None)
+    logins = []
+    snapshot_path = str(tmp_path / 'session.snapshot')
+    assert base_ui_utils.ensure_logged_in(object(), logins.append, snapshot_path=snapshot_path) is False
+    assert len(logins) == 1 and not list(tmp_path.iterdir())
+
+
+def test_instrumentation_counts_wait_polls_apart_from_retries_and_exports_once(monkeypatch, tmp_path):
+    registered = []
+    monkeypatch.setattr(base_ui_utils.atexit, 'register', registered.append)
+    monkeypatch.setattr(base_ui_utils, '_helper_metrics_export_path', None)
+    monkeypatch.setattr(base_ui_utils, '_instrumentation_enabled', False)
+    for name in ('first.json', 'second.json'):
+        base_ui_utils.enable_helper_instrumentation(str(tmp_path / name))
+    assert len(registered) == 1
+    driver = _LoadingDriver(['Loading', 'Loading', 'Instances'])
+    try:
+        base_ui_utils.reset_helper_metrics()
+        base_ui_utils.wait_for_page_changes(driver, 'Instances', wait_for_seconds=5)
+        metrics = base_ui_utils.get_helper_metrics()['wait_for_page_changes']
+        assert metrics['polls'] >= 1 and metrics['retries'] == 0 and metrics['retry_kinds'] == {}
+        registered[0]()
+        assert [path.name for path in tmp_path.iterdir()] == ['second.json']
+    finally:
+        base_ui_utils.disable_helper_instrumentation()
+        base_ui_utils.reset_helper_metrics()
+
+
+def test_screenshot_writer_skips_identical_frames_and_stays_under_its_disk_cap(tmp_path):
+    writer = base_ui_utils.ScreenshotWriter(str(tmp_path), max_total_bytes=25)
+    try:
+        first = writer.submit('page', b'a' * 10)
+        assert writer.submit('page again', b'a' * 10) == first
+        writer.submit('second', b'b' * 10)
+        writer.submit('third', b'c' * 10)
+        writer.flush()
+    finally:
+        writer.close()
+    assert sorted(path.read_bytes() for path in tmp_path.iterdir()) == [b'b' * 10, b'c' * 10]
+    assert writer.total_bytes == 20
+
+
+class _FormDriver:
+    def __init__(self):
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append(args)
+        return {'missing': [], 'results': [
+            {'status': 'filled', 'value': spec['value'], 'valid': True, 'message': ''} for spec in args[0]]}
+
+    def find_element(self, by, locator):
+        raise AssertionError(f"Looked up {locator} on its own round trip")
+
+
+def test_fill_form_fills_every_field_in_one_round_trip():
+    driver = _FormDriver()
+    report = base_ui_utils.fill_form(driver, {"//input[@id='name']": 'vcn-a', ('id', 'cidr'): '10.0.0.0/16',
+                                              "//input[@id='ipv6']": True})
+    assert len(driver.scripts) == 1
+    assert [spec['value'] for spec in driver.scripts[0][0]] == ['vcn-a', '10.0.0.0/16', True]
+    assert report[('id', 'cidr')] == {'value': '10.0.0.0/16', 'valid': True, 'message': ''}
+
+
+class _ListPageDriver:
+    def __init__(self, page):
+        self.page = page
+
+    def execute_script(self, script, *args):
+        return self.page
+
+
+def _list_page(ocids, paired):
+    return {'names': ['vcn-a', 'vcn-b'], 'name_elements': [None, None], 'ocids': ocids,
+            'states': ['Available', 'Available'], 'paired': paired, 'next': None, 'next_enabled': False}
+
+
+def test_list_rows_keep_each_row_together(monkeypatch):
+    monkeypatch.setattr(base_ui_utils, '_load_locator_constants', lambda name: types.SimpleNamespace(
+        NAMES_LIST_XPATH='//td[1]', OCID_OF_LIST_ITEM_XPATH='//td[2]', STATE_XPATH='//td[3]',
+        NEXT_PAGE_BUTTONS_XPATH='//button'))
+    rows = list(base_ui_utils.iter_list_rows(_ListPageDriver(_list_page([None, 'ocid1.vcn.b'], True))))
+    assert [(row.name, row.ocid) for row in rows] == [('vcn-a', None), ('vcn-b', 'ocid1.vcn.b')]
+    with pytest.raises(ValueError, match='1 OCIDs'):
+        list(base_ui_utils.iter_list_rows(_ListPageDriver(_list_page(['ocid1.vcn.b'], False))))
+
+
+class _NextPageButton:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def click(self):
+        self.driver.clicks += 1
+        self.driver.current += 1
+
+
+class _PagedListDriver:
+    def __init__(self, page_count):
+        self.page_count = page_count
+        self.current = 0
+        self.clicks = 0
+
+    def execute_script(self, script, *args):
+        stale_button = _DetachableElement()
+        stale_button.attached = False
+        return {'names': [f"vcn-{self.current}"], 'name_elements': [None], 'ocids': [None], 'states': [None],
+                'paired': True, 'next': stale_button, 'next_enabled': self.current + 1 < self.page_count}
+
+    def find_element(self, by, locator):
+        return _NextPageButton(self)
+
+
+def test_list_rows_find_the_next_page_button_again_when_it_went_stale(monkeypatch):
+    def no_constants(name):
+        raise AssertionError(f"Loaded {name} although every xpath was given")
+
+    monkeypatch.setattr(base_ui_utils, '_load_locator_constants', no_constants)
+    base_ui_utils.set_retry_policy(base_ui_utils.RetryPolicy(base_delay=0.001, max_delay=0.001))
+    driver = _PagedListDriver(3)
+    try:
+        rows = list(base_ui_utils.iter_list_rows(driver, '//td[1]', '//td[2]', '//td[3]', '//button'))
+    finally:
+        base_ui_utils.set_retry_policy()
+    assert [row.name for row in rows] == ['vcn-0', 'vcn-1', 'vcn-2']
+    assert driver.clicks == 2
+
+
+def test_ttl_cache_drops_expired_values_and_stays_bounded(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(base_ui_utils, 'monotonic', lambda: now[0])
+    cache = base_ui_utils.TtlCache(ttl_seconds=10, max_size=3)
+    for key in range(3):
+        cache.get_or_load(key, lambda key=key: key)
+    now[0] = 11
+    cache.get_or_load('fresh', lambda: 'fresh')
+    assert cache.stats()['size'] == 1
+    for key in range(5):
+        cache.get_or_load(key, lambda key=key: key)
+    assert cache.stats()['size'] == 3
+    assert cache.get_or_load(4, lambda: 'reloaded') == 4
+
+
+def test_compartment_rest_utils_are_shared_unless_their_arguments_are_unhashable(monkeypatch):
+    module = types.ModuleType('compartment_rest')
+    module.CompartmentRestUtils = lambda *args, **kwargs: types.SimpleNamespace(args=args, kwargs=kwargs)
+    monkeypatch.setitem(sys.modules, 'lib.pca.pca_3x.utils.CE.IAM.compartment_utils.compartment_rest', module)
+    monkeypatch.setattr(base_ui_utils, '_compartment_rest_utils', {})
+    shared = base_ui_utils.cached_compartment_rest_utils('tenancy', region='us-east-1')
+    assert base_ui_utils.cached_compartment_rest_utils('tenancy', region='us-east-1') is shared
+    config = {'region': 'us-east-1'}
+    unshared = base_ui_utils.cached_compartment_rest_utils(config, headers=['x'])
+    assert unshared.args == (config,) and unshared is not base_ui_utils.cached_compartment_rest_utils(config)
+
+
+def test_provision_takes_the_delete_callable_by_keyword(monkeypatch):
+    monkeypatch.setattr(base_ui_utils, 'get_rest_lookup_cache', lambda: base_ui_utils.TtlCache())
+    deleted = []
+    with base_ui_utils.RestFixtures() as fixtures:
+        vcn = fixtures.provision(lambda name, cidr: f"{name} {cidr}", 'vcn-a', '10.0.0.0/16', delete=deleted.append)
+        assert vcn == 'vcn-a 10.0.0.0/16'
+    assert deleted == ['vcn-a 10.0.0.0/16']
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.commands = []
+        self.quit_calls = 0
+        self.switch_to = types.SimpleNamespace(window=lambda handle: self.execute('switchToWindow'))
+
+    def execute(self, command, params=None):
+        self.commands.append(command)
+        return {'value': None}
+
+    @property
+    def window_handles(self):
+        self.execute('getWindowHandles')
+        return ['main']
+
+    def close(self):
+        self.execute('closeWindow')
+
+    def delete_all_cookies(self):
+        self.execute('deleteAllCookies')
+
+    def execute_script(self, script, *args):
+        self.execute('executeScript')
+
+    def get(self, url):
+        self.execute('get')
+
+    def save_screenshot(self, path):
+        self.execute('screenshot')
+        return False
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def flow_logging_through_the_helpers(driver):
+    base_ui_utils.get_helper_log().info("Flow ran in worker %s", os.getpid())
+    writer = base_ui_utils.get_screenshot_writer()
+    writer.submit('worker', b'worker png')
+    writer.flush()
+
+
+def flow_that_stops_responding(driver):
+    time.sleep(600)
+
+
+def flow_that_opens_a_page(driver):
+    driver.get('https://console.example.com/')
+
+
+def flow_that_fails(driver):
+    assert driver.window_handles == [], "Window left open"
+
+
+_FORKED_RUN_SCRIPT = """
+import json, multiprocessing, sys
+multiprocessing.set_start_method('fork')
+import base_ui_utils, test_base_ui_utils
+base_ui_utils.configure_helper_logging(level='INFO', background=True)
+base_ui_utils.get_helper_log().info("Starting the log thread before the workers fork")
+base_ui_utils.configure_screenshots(sys.argv[1]).submit('parent', b'parent png')
+base_ui_utils.setup_driver = lambda *args, **kwargs: test_base_ui_utils._FakeBrowser()
+flows = [getattr(test_base_ui_utils, name) for name in sys.argv[2:]]
+results = base_ui_utils.run_flows_in_parallel(flows, max_workers=1, output_dir=sys.argv[1])
+print(json.dumps([[result.name, result.passed, result.error, result.log_file] for result in results]))
+"""
+
+
+def _run_forked_flows(tmp_path, *flow_names, timeout=60, flow_timeout=30):
+    completed = subprocess.run([sys.executable, '-c', _FORKED_RUN_SCRIPT, str(tmp_path), *flow_names],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                               timeout=timeout, env=dict(os.environ, UI_FLOW_TIMEOUT_SECONDS=str(flow_timeout)))
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="Needs fork")
+def test_forked_flow_workers_write_their_background_log(tmp_path):
+    [(name, passed, error, log_path)] = _run_forked_flows(tmp_path, 'flow_logging_through_the_helpers')
+    assert passed, error
+    with open(log_path) as log:
+        assert 'Flow ran in worker' in log.read()
+    assert len(list(tmp_path.glob('worker-*.png'))) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="Needs fork")
+def test_parallel_runner_fails_a_flow_whose_worker_stops_responding(tmp_path):
+    start = time.monotonic()
+    hung, opened, failed = _run_forked_flows(tmp_path, 'flow_that_stops_responding', 'flow_that_opens_a_page',
+                                             'flow_that_fails', flow_timeout=2)
+    assert time.monotonic() - start < 30
+    assert hung[:3] == ['test_base_ui_utils.flow_that_stops_responding', False, 'Timed out after 2.0 seconds']
+    assert opened[1], opened[2]
+    assert not failed[1] and 'Window left open' in failed[2]
+    assert os.path.exists(failed[3])
+
+
+def test_session_pool_quits_a_session_released_while_it_closes():
+    pool = base_ui_utils.DriverSessionPool(size=1, driver_factory=_FakeBrowser)
+    driver = pool.acquire()
+    driver.delete_all_cookies = pool.close
+    pool.release(driver)
+    assert driver.quit_calls == 1
+    assert pool._total() == 0
+
+
+def test_driver_recycler_swaps_the_browser_after_max_commands():
+    recycler = base_ui_utils.DriverRecycler(_FakeBrowser, max_rss_bytes=0, max_commands=5, carry_session=False)
+    base_ui_utils.reset_helper_metrics()
+    try:
+        first = recycler.get_driver()
+        for _ in range(4):
+            first.get('https://console.example.com/')
+        assert recycler.between_flows() is None
+        first.get('https://console.example.com/')
+        assert recycler.between_flows() == 'commands'
+        second = recycler.get_driver()
+        assert second is not first and first.quit_calls == 1 and second.quit_calls == 0
+        metrics = base_ui_utils.get_browser_recycle_metrics()
+        assert metrics['reasons'] == {'commands': 1} and metrics['commands'] == [5]
+    finally:
+        recycler.close()
+        base_ui_utils.reset_helper_metrics()